@@ -0,0 +1,92 @@
+"""
+Benchmark: requisições por segundo em GET /auth/me sem e com o cache de usuário.
+
+Roda a aplicação em processo (TestClient) com BENCH_CONCURRENCY threads por
+BENCH_SECONDS segundos em cada cenário. O usuário tem uma foto de ~100 KB e o
+hash de senha, como em produção; sem o cache cada requisição faz o SELECT em users.
+
+Uso:
+    python -m backend.benchmarks.auth_me
+    BENCH_DATABASE_URL=postgresql://... BENCH_CONCURRENCY=16 python -m backend.benchmarks.auth_me
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import base64
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.benchmarks._common import make_session_factory, print_table
+from backend.core.database import get_db
+from backend.core.limiter import limiter
+from backend.core.security import create_access_token, get_password_hash
+from backend.core.user_cache import user_cache
+from backend.models.users import User
+from backend.server import app
+
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "8"))
+SECONDS = float(os.getenv("BENCH_SECONDS", "5"))
+
+
+def run_load(client, headers):
+    done = []
+    deadline = time.perf_counter() + SECONDS
+
+    def worker():
+        count = 0
+        while time.perf_counter() < deadline:
+            response = client.get("/auth/me", headers=headers)
+            assert response.status_code == 200, response.text
+            count += 1
+        done.append(count)
+
+    threads = [threading.Thread(target=worker) for _ in range(CONCURRENCY)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(done) / (time.perf_counter() - start)
+
+
+def run():
+    engine, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        db.add(User(
+            email="bench@user.com",
+            hashed_password=get_password_hash("benchmark123"),
+            full_name="Bench User",
+            photo_base64="data:image/jpeg;base64," + base64.b64encode(os.urandom(75_000)).decode(),
+            plan_id="pro",
+        ))
+        db.commit()
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    limiter.enabled = False
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'bench@user.com'})}"}
+
+    rows = []
+    with TestClient(app) as client:
+        for label, ttl in (("sem cache", 0), ("com cache", 60)):
+            user_cache.ttl = ttl
+            user_cache.clear()
+            client.get("/auth/me", headers=headers)
+            rows.append((label, f"{run_load(client, headers):.0f}"))
+
+    print(f"Banco: {engine.dialect.name} - {CONCURRENCY} threads x {SECONDS:.0f}s por cenário")
+    print_table(["cenário", "req/s"], rows)
+
+
+if __name__ == "__main__":
+    run()
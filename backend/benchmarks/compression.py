@@ -0,0 +1,100 @@
+"""
+Benchmark: bytes trafegados em GET /products/?per_page=100 sem compressão,
+com gzip e com brotli, e o tempo da requisição em cada caso.
+
+Os produtos têm nomes, descrições, SKUs, códigos de barras e image_url como os
+de uma loja real. BENCH_PRODUCTS controla o tamanho do catálogo.
+
+Uso:
+    python -m backend.benchmarks.compression
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import random
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.benchmarks._common import make_session_factory, measure, print_table, seed_products
+from backend.core.database import get_async_db, get_async_read_db, get_db
+from backend.core.limiter import limiter
+from backend.core.security import get_async_current_user_flexible
+from backend.models.products import Product
+from backend.models.users import User
+from backend.server import app
+
+PRODUCT_COUNT = int(os.getenv("BENCH_PRODUCTS", "500"))
+
+_NOUNS = ["Caneta", "Caderno", "Camiseta", "Parafuso", "Sabonete", "Arroz", "Cabo USB", "Tomada", "Fita Adesiva", "Copo Térmico"]
+_ADJECTIVES = ["Azul", "Preto", "Branco", "Premium", "Econômico", "Inox", "Reforçado", "Tamanho M", "500 g", "1,5 m"]
+_BRANDS = ["Tramontina", "Faber-Castell", "Tilibra", "Hering", "Camil", "Multilaser", "Pial", "3M"]
+
+
+def realistic_name(i: int) -> str:
+    rng = random.Random(i)
+    return f"{rng.choice(_NOUNS)} {rng.choice(_ADJECTIVES)} {rng.choice(_BRANDS)} {i % 97:02d}"
+
+
+def async_url(url: str) -> str:
+    if url.startswith("sqlite"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+
+def run():
+    engine, SessionLocal = make_session_factory()
+    async_engine = create_async_engine(async_url(engine.url.render_as_string(hide_password=False)))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    with SessionLocal() as db:
+        seed_products(db, PRODUCT_COUNT, name_for=realistic_name)
+        rng = random.Random(42)
+        for product in db.query(Product).all():
+            product.description = f"{product.name}. Embalagem com {rng.randint(1, 48)} unidades, garantia de {rng.choice([3, 6, 12])} meses."
+            product.cost_price = round(product.price * 0.6, 2)
+            product.image_path = f"images/{rng.randbytes(1).hex()}/{rng.randbytes(32).hex()}.webp"
+        user = User(email="bench@user.com", hashed_password="x", full_name="Bench", plan_id="pro")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    app.dependency_overrides[get_async_current_user_flexible] = lambda: user
+    limiter.enabled = False
+
+    rows = []
+    params = {"page": 1, "per_page": 100}
+    with TestClient(app, base_url="http://localhost") as client:
+        identity = None
+        for label, accept in (("identity", "identity"), ("gzip", "gzip"), ("br", "br")):
+            response = client.get("/products/", params=params, headers={"Accept-Encoding": accept})
+            assert response.status_code == 200, response.text
+            assert response.headers.get("content-encoding", "identity") == label, response.headers
+            wire = response.num_bytes_downloaded
+            identity = identity or wire
+            ms = measure(lambda: client.get("/products/", params=params, headers={"Accept-Encoding": accept}), repeat=20)
+            rows.append((label, f"{wire:,}", f"{(1 - wire / identity) * 100:.1f}%", f"{ms:.1f}"))
+
+    print(f"GET /products/?per_page=100 ({len(response.json()['items'])} itens, catálogo de {PRODUCT_COUNT})")
+    print_table(["encoding", "bytes", "economia", "ms (mediana)"], rows)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,120 @@
+"""
+Benchmark: exportar BENCH_MOVEMENTS movimentações em CSV e NDJSON.
+
+- streaming: o gerador da rota (routers/exports.py) sobre o cursor de
+  stream_movements_export; mede o tempo até o primeiro lote de linhas, o total
+  e, numa segunda passada, o pico de memória alocada pelo Python (tracemalloc)
+- tudo em memória: a lista inteira carregada (como get_movements com um limit
+  enorme) e o CSV montado de uma vez, só até BENCH_NAIVE_LIMIT linhas
+
+O pico do streaming não depende do tamanho do histórico; o da lista cresce com ele.
+
+Uso:
+    python -m backend.benchmarks.exports
+    BENCH_MOVEMENTS=5000000 python -m backend.benchmarks.exports
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import asyncio
+import csv
+import io
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.benchmarks._common import make_session_factory, print_table, seed_products
+from backend.benchmarks.compression import async_url
+from backend.crud import inventory as crud
+from backend.models.inventory import InventoryMovement, MovementType
+from backend.routers import exports
+
+MOVEMENTS = int(os.getenv("BENCH_MOVEMENTS", "1000000"))
+NAIVE_LIMIT = int(os.getenv("BENCH_NAIVE_LIMIT", "200000"))
+_SEED_BATCH = 50_000
+
+
+def seed(SessionLocal):
+    with SessionLocal() as db:
+        product_ids = seed_products(db, 1000)
+        start = datetime(2024, 1, 1)
+        for offset in range(0, MOVEMENTS, _SEED_BATCH):
+            db.execute(insert(InventoryMovement), [
+                {"product_id": product_ids[i % 1000], "quantity": 1 + i % 7,
+                 "movement_type": MovementType.OUT if i % 4 else MovementType.IN,
+                 "product_name_snapshot": f"Produto {i % 1000:06d}", "product_barcode_snapshot": f"789{i % 1000:010d}",
+                 "unit_price_snapshot": 10.0 + i % 100, "unit_snapshot": "UN", "romaneio_id": f"ROM-{i // 20:07d}",
+                 "created_at": start + timedelta(seconds=30 * i)}
+                for i in range(offset, min(offset + _SEED_BATCH, MOVEMENTS))
+            ])
+            db.commit()
+
+
+async def streamed(async_engine, fmt: str, traced: bool):
+    """(s até o primeiro lote, s total, bytes, pico MB ou None)"""
+    async with AsyncSession(async_engine) as db:
+        batches = crud.stream_movements_export(db, batch_size=exports.EXPORT_BATCH_SIZE)
+        columns = crud.MOVEMENT_EXPORT_COLUMNS
+        stream = exports._ndjson_stream(columns, batches) if fmt == "ndjson" else exports._csv_stream(columns, batches, ",")
+        if traced:
+            tracemalloc.start()
+        began = time.perf_counter()
+        first, size = None, 0
+        async for chunk in stream:
+            size += len(chunk)
+            if first is None and chunk.count(b"\n") > 1:
+                first = time.perf_counter() - began
+        total = time.perf_counter() - began
+    return first, total, size, traced_peak() if traced else None
+
+
+async def in_memory(async_engine, limit: int, traced: bool):
+    async with AsyncSession(async_engine) as db:
+        if traced:
+            tracemalloc.start()
+        began = time.perf_counter()
+        rows = (await db.execute(crud.movements_export_query().limit(limit))).all()
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        body = buffer.getvalue().encode()
+        total = time.perf_counter() - began
+    return total, len(body), traced_peak() if traced else None
+
+
+def traced_peak() -> float:
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def run():
+    engine, SessionLocal = make_session_factory()
+    began = time.perf_counter()
+    seed(SessionLocal)
+    print(f"{MOVEMENTS} movimentações inseridas em {time.perf_counter() - began:.1f} s; lotes de {exports.EXPORT_BATCH_SIZE}")
+    async_engine = create_async_engine(async_url(engine.url.render_as_string(hide_password=False)))
+
+    rows = []
+    # tempos sem o tracemalloc, que deixa tudo várias vezes mais lento; o pico vem de uma segunda passada
+    for fmt in ("csv", "ndjson"):
+        first, total, size, _ = asyncio.run(streamed(async_engine, fmt, traced=False))
+        peak = asyncio.run(streamed(async_engine, fmt, traced=True))[3]
+        rows.append((f"streaming {fmt}", MOVEMENTS, f"{first * 1000:.0f}", f"{total:.1f}", f"{MOVEMENTS / total:,.0f}",
+                     f"{size / 1024 / 1024:.0f}", f"{peak:.1f}"))
+    limit = min(NAIVE_LIMIT, MOVEMENTS)
+    total, size, _ = asyncio.run(in_memory(async_engine, limit, traced=False))
+    peak = asyncio.run(in_memory(async_engine, limit, traced=True))[2]
+    rows.append(("tudo em memória csv", limit, "-", f"{total:.1f}", f"{limit / total:,.0f}", f"{size / 1024 / 1024:.0f}", f"{peak:.1f}"))
+
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+    print_table(["caminho", "linhas", "ms até 1º lote", "s total", "linhas/s", "MB gerados", "pico MB"], rows)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,74 @@
+"""
+Benchmark: folha de BENCH_LABELS etiquetas (produtos distintos) por simbologia,
+pelo mesmo caminho de POST /products/labels (páginas em core.render_pool, PDF
+montado no worker).
+
+- frio:          cache de códigos vazio e pool recém-criado
+- cache disco:   pool novo (processos sem nada em memória, tempo de subir
+                 incluído), códigos já no disco
+- reimpressão:   mesmo pool de novo: códigos e glifos em memória
+- zpl:           render_zpl no próprio processo (a impressora desenha os códigos)
+
+Uso:
+    python -m backend.benchmarks.labels
+    BENCH_LABELS=5000 BENCH_POOL_WORKERS=4 python -m backend.benchmarks.labels
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import asyncio
+import tempfile
+import time
+
+from backend.benchmarks._common import print_table
+from backend.benchmarks.compression import realistic_name
+from backend.core import labels, render_pool
+from backend.core.config import settings
+
+LABELS = int(os.getenv("BENCH_LABELS", "1000"))
+settings.RENDER_POOL_WORKERS = int(os.getenv("BENCH_POOL_WORKERS", "2"))
+
+
+async def sheet(items: list, symbology: str) -> bytes:
+    pages = await asyncio.gather(*(
+        render_pool.run_in_pool(labels.render_label_page, items[start:start + labels.LABELS_PER_PAGE], symbology)
+        for start in range(0, len(items), labels.LABELS_PER_PAGE)
+    ))
+    return labels.build_label_pdf(pages)
+
+
+def timed(fn):
+    began = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - began, result
+
+
+def run():
+    rows = []
+    for symbology in labels.SYMBOLOGIES:
+        items = [
+            {"name": realistic_name(i), "price": 10.0 + i % 100,
+             "value": labels.label_value(symbology, f"789{i:09d}", f"SKU-{i:07d}")}
+            for i in range(LABELS)
+        ]
+        # Os processos do pool leem RENDER_CACHE_DIR ao importar core.file_cache
+        os.environ["RENDER_CACHE_DIR"] = tempfile.mkdtemp(prefix="labels_bench_")
+        render_pool.shutdown_pool()
+        cold, content = timed(lambda: asyncio.run(sheet(items, symbology)))
+        render_pool.shutdown_pool()
+        disk, _ = timed(lambda: asyncio.run(sheet(items, symbology)))
+        warm, _ = timed(lambda: asyncio.run(sheet(items, symbology)))
+        render_pool.shutdown_pool()
+        zpl, _ = timed(lambda: labels.render_zpl(items, symbology))
+        pages = -(-LABELS // labels.LABELS_PER_PAGE)
+        rows.append((symbology, pages, f"{cold:.2f}", f"{disk:.2f}", f"{warm:.2f}", f"{LABELS / warm:,.0f}",
+                     f"{len(content) / 1024:.0f}", f"{zpl * 1000:.0f}"))
+
+    print(f"{LABELS} etiquetas; pool de {settings.RENDER_POOL_WORKERS} processos; CPUs: {os.cpu_count()}")
+    print_table(["código", "páginas", "frio s", "cache disco s", "reimpressão s", "etiquetas/s", "PDF KB", "zpl ms"], rows)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,85 @@
+"""
+Benchmark: GET /products/ com COUNT separado vs. total na mesma consulta.
+
+Popula 100k produtos e mede, para cada cenário, quantas instruções SQL cada
+listagem envia ao banco e a latência mediana:
+  - legacy:  count_products + get_products (duas avaliações completas do filtro)
+  - current: crud.products.get_products (count(*) OVER() / contagem em cache)
+
+Uso:
+    python -m backend.benchmarks.list_round_trips
+    BENCH_PRODUCTS=1000000 BENCH_DATABASE_URL=postgresql://... python -m backend.benchmarks.list_round_trips
+"""
+import os
+
+from sqlalchemy import event
+
+from backend.benchmarks._common import make_session_factory, seed_products, measure, print_table
+from backend.core.count_cache import product_counts
+from backend.crud import products as crud
+from backend.models.products import Product
+
+PRODUCT_COUNT = int(os.getenv("BENCH_PRODUCTS", "100000"))
+PER_PAGE = 20
+
+SCENARIOS = [
+    ("sem filtro, página 1", {"skip": 0}),
+    ("sem filtro, página 200", {"skip": 199 * PER_PAGE}),
+    ("busca 'Produto 01'", {"skip": 0, "search": "Produto 01"}),
+    ("busca '789000001'", {"skip": 0, "search": "789000001"}),
+]
+
+
+def legacy_list(db, skip=0, search=None):
+    """Caminho anterior: uma consulta de contagem + uma de página, cada uma reavaliando o filtro."""
+    def base():
+        query = db.query(Product).filter(Product.is_active == True)
+        if search:
+            query = query.filter(
+                (Product.name.ilike(f"%{search}%")) |
+                (Product.barcode.ilike(f"%{search}%")) |
+                (Product.sku.ilike(f"%{search}%"))
+            )
+        return query
+    total = base().count()
+    items = base().order_by(Product.name.asc()).offset(skip).limit(PER_PAGE).all()
+    return items, total
+
+
+def current_list(db, skip=0, search=None):
+    return crud.get_products(db, skip=skip, limit=PER_PAGE, search=search)
+
+
+def run():
+    engine, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        seed_products(db, PRODUCT_COUNT)
+
+    statements = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements["count"] += 1
+
+    rows = []
+    for label, kwargs in SCENARIOS:
+        results = []
+        for fn in (legacy_list, current_list):
+            product_counts.invalidate()
+            with SessionLocal() as db:
+                fn(db, **kwargs)  # aquece o cache de contagem / páginas do SQLite
+                statements["count"] = 0
+                fn(db, **kwargs)
+                round_trips = statements["count"]
+                elapsed = measure(lambda: fn(db, **kwargs), repeat=5)
+            results.append((round_trips, elapsed))
+        (legacy_trips, legacy_ms), (current_trips, current_ms) = results
+        rows.append((label, legacy_trips, current_trips, f"{legacy_ms:.1f}", f"{current_ms:.1f}"))
+
+    print(f"Banco: {engine.url.render_as_string(hide_password=True)} - {PRODUCT_COUNT} produtos, {PER_PAGE} por página")
+    print_table(["cenário", "SQL legacy", "SQL atual", "legacy ms", "atual ms"], rows)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    run()
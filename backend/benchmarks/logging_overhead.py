@@ -0,0 +1,128 @@
+"""
+Benchmark: latência por requisição com logging desligado, com o handler
+síncrono anterior (portalocker + write a cada registro) e com a fila atual
+(QueueHandler -> um escritor por processo, JSON lines em lote).
+
+Cada requisição gera a linha do middleware log_requests e BENCH_EXTRA_LOGS
+linhas de uma rota de teste, como um router típico. Roda em processo
+(TestClient) com BENCH_CONCURRENCY threads e grava os logs numa pasta temporária.
+
+Uso:
+    python -m backend.benchmarks.logging_overhead
+    BENCH_REQUESTS=5000 BENCH_CONCURRENCY=8 python -m backend.benchmarks.logging_overhead
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import logging
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import portalocker
+
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from backend.benchmarks._common import print_table
+from backend.config import logger as log_config
+from backend.core.limiter import limiter
+from backend.server import app
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "3000"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "8"))
+EXTRA_LOGS = int(os.getenv("BENCH_EXTRA_LOGS", "1"))
+
+bench_logger = log_config.get_dynamic_logger("bench")
+
+
+def logged_route(request: Request):
+    for _ in range(EXTRA_LOGS):
+        bench_logger.info(f"Consulta de teste: {request.url.path}")
+    return {"ok": True}
+
+
+class SyncDailyFileHandler(logging.FileHandler):
+    """O handler anterior: arquivo diário gravado na thread da requisição, com um lock do portalocker por registro."""
+
+    def __init__(self, base_filename: str):
+        base, ext = os.path.splitext(base_filename)
+        super().__init__(f"{base}_{datetime.now():%Y-%m-%d}{ext}", encoding="utf-8")
+
+    def emit(self, record):
+        try:
+            with portalocker.Lock(f"{self.baseFilename}.lock", "a", timeout=10):
+                super().emit(record)
+        except Exception:
+            self.handleError(record)
+
+
+def use_sync_handlers(folder: str):
+    """Restaura o caminho anterior: SyncDailyFileHandler direto em cada logger."""
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(name)s] - %(message)s', datefmt='%d-%m-%y %H:%M:%S')
+    for key, logger in log_config._LOGGERS.items():
+        context = key.split(".", 1)[0]
+        os.makedirs(os.path.join(folder, context), exist_ok=True)
+        handler = SyncDailyFileHandler(os.path.join(folder, context, f"{context}.log"))
+        handler.setFormatter(formatter)
+        logger.handlers = [handler]
+
+
+def use_queue_handlers(folder: str):
+    for logger in log_config._LOGGERS.values():
+        logger.handlers = [log_config._queue_handler(folder)]
+
+
+def run_load(client):
+    latencies = []
+    per_thread = REQUESTS // CONCURRENCY
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            response = client.get("/bench/logged")
+            local.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+        latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(CONCURRENCY)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def run():
+    app.add_api_route("/bench/logged", logged_route, methods=["GET"])
+    limiter.enabled = False
+    folder = tempfile.mkdtemp(prefix="romaneio_logs_")
+
+    scenarios = (
+        ("desligado", lambda: logging.disable(logging.CRITICAL)),
+        ("síncrono (portalocker por registro)", lambda: (logging.disable(logging.NOTSET), use_sync_handlers(os.path.join(folder, "sync")))),
+        ("fila + escritor em lote (JSON)", lambda: (logging.disable(logging.NOTSET), use_queue_handlers(os.path.join(folder, "queue")))),
+    )
+    rows = []
+    with TestClient(app) as client:
+        for label, setup in scenarios:
+            setup()
+            client.get("/bench/logged")
+            rps, p50, p95 = run_load(client)
+            rows.append((label, f"{rps:.0f}", f"{p50:.2f}", f"{p95:.2f}"))
+    log_config.shutdown_logging()
+
+    print(f"{REQUESTS} requisições, {CONCURRENCY} threads, {1 + EXTRA_LOGS} linhas de log por requisição (logs em {folder})")
+    print_table(["logging", "req/s", "p50 ms", "p95 ms"], rows)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,124 @@
+"""
+Microbenchmark: custo por requisição da cadeia de middlewares, chamando o app
+ASGI direto (sem rede nem cliente HTTP), numa rota que não faz nada.
+
+- sem middleware: só o FastAPI
+- BaseHTTPMiddleware: MaxBodySize + log de requisições como eram antes
+- ASGI puro: backend.core.middleware (atual)
+
+O log vai para um logger desligado, para medir só a mecânica dos middlewares.
+
+Uso:
+    python -m backend.benchmarks.middleware_overhead
+    BENCH_REQUESTS=50000 python -m backend.benchmarks.middleware_overhead
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, HTTPException, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from backend.benchmarks._common import print_table
+from backend.core.middleware import MaxBodySizeMiddleware, RequestLogMiddleware
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "20000"))
+MAX_BODY_SIZE = 10 * 1024 * 1024
+BODY = b'{"name": "Caneta Azul", "price": 2.5}'
+
+quiet_logger = logging.getLogger("bench.middleware")
+quiet_logger.disabled = True
+
+
+class LegacyMaxBodySizeMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        content_length = request.headers.get("content-length")
+        if content_length and int(content_length) > MAX_BODY_SIZE:
+            raise HTTPException(status_code=413, detail="Payload excede o limite máximo permitido.")
+        return await call_next(request)
+
+
+async def legacy_log_requests(request: Request, call_next):
+    start_time = time.time()
+    response = await call_next(request)
+    process_time = time.time() - start_time
+    quiet_logger.info(f"{request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.4f}s")
+    return response
+
+
+def make_app(chain: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    if chain == "legacy":
+        app.add_middleware(LegacyMaxBodySizeMiddleware)
+        app.middleware("http")(legacy_log_requests)
+    elif chain == "asgi":
+        app.add_middleware(MaxBodySizeMiddleware, max_size=MAX_BODY_SIZE)
+        app.add_middleware(RequestLogMiddleware, logger=quiet_logger)
+    return app
+
+
+def _scope(method: str, path: str, body: bytes):
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 1234), "server": ("localhost", 80),
+    }
+
+
+async def measure(app, method: str, path: str, body: bytes = b"") -> float:
+    async def send(message):
+        pass
+
+    async def one():
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await app(_scope(method, path, body), receive, send)
+
+    for _ in range(200):
+        await one()
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await one()
+    return (time.perf_counter() - start) / REQUESTS * 1_000_000
+
+
+async def main():
+    rows = []
+    results = {}
+    for label, chain in (("sem middleware", "none"), ("BaseHTTPMiddleware (antes)", "legacy"), ("ASGI puro (atual)", "asgi")):
+        app = make_app(chain)
+        results[chain] = (await measure(app, "GET", "/ping"), await measure(app, "POST", "/echo", BODY))
+    for label, chain in (("sem middleware", "none"), ("BaseHTTPMiddleware (antes)", "legacy"), ("ASGI puro (atual)", "asgi")):
+        get_us, post_us = results[chain]
+        rows.append((
+            label, f"{get_us:.1f}", f"{get_us - results['none'][0]:+.1f}",
+            f"{post_us:.1f}", f"{post_us - results['none'][1]:+.1f}",
+        ))
+    print(f"{REQUESTS} requisições por cenário, app ASGI chamado direto")
+    print_table(["cadeia", "GET µs", "overhead", "POST µs", "overhead"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""
+Benchmark: cadastrar BENCH_ROWS produtos com estoque inicial.
+
+- item a item: POST /products/ para cada linha, como faria um script de
+  integração (o estoque inicial vai junto, na movimentação criada pelo CRUD);
+  medido em BENCH_SAMPLE linhas e extrapolado
+- importação: um CSV com todas as linhas em POST /products/import, até o job
+  terminar (o TestClient só devolve a resposta depois das BackgroundTasks)
+
+Uso:
+    python -m backend.benchmarks.product_import
+    BENCH_ROWS=10000 IMPORT_CHUNK_SIZE=2000 python -m backend.benchmarks.product_import
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.benchmarks._common import make_session_factory, print_table
+from backend.benchmarks.compression import async_url, realistic_name
+from backend.core.database import get_async_db, get_async_read_db, get_db
+from backend.core.limiter import limiter
+from backend.core.plans_config import PLANS_CONFIG
+from backend.core.product_import import IMPORT_CHUNK_SIZE
+from backend.core.security import get_async_current_user_flexible
+from backend.models.inventory import InventoryMovement
+from backend.models.products import Product
+from backend.models.users import User
+from backend.server import app
+
+ROWS = int(os.getenv("BENCH_ROWS", "50000"))
+SAMPLE = int(os.getenv("BENCH_SAMPLE", "500"))
+
+
+def csv_content(count: int) -> bytes:
+    lines = ["nome;codigo_de_barras;sku;preco;preco_custo;estoque;unidade"]
+    for i in range(count):
+        price = 10 + (i % 900) / 10
+        lines.append(f"{realistic_name(i)};IMP{i:010d};IMP-SKU-{i:07d};{price:.2f}".replace(".", ",")
+                     + f";{price * 0.6:.2f}".replace(".", ",") + f";{i % 40};UN")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def run():
+    engine, SessionLocal = make_session_factory()
+    async_engine = create_async_engine(async_url(engine.url.render_as_string(hide_password=False)))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    with SessionLocal() as db:
+        user = User(email="bench@user.com", hashed_password="x", full_name="Bench", plan_id="pro", is_active=True)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    app.dependency_overrides[get_async_current_user_flexible] = lambda: user
+    limiter.enabled = False
+    PLANS_CONFIG["pro"] = {**PLANS_CONFIG["pro"], "limit_products": ROWS + SAMPLE}
+
+    content = csv_content(ROWS)
+    with TestClient(app, base_url="http://localhost") as client:
+        began = time.perf_counter()
+        for i in range(SAMPLE):
+            response = client.post("/products/", json={
+                "name": realistic_name(i), "barcode": f"ONE{i:010d}", "sku": f"ONE-SKU-{i:07d}",
+                "price": 10.0, "cost_price": 6.0, "stock_quantity": i % 40, "unit": "UN",
+            })
+            assert response.status_code == 200, response.text
+        per_item = (time.perf_counter() - began) / SAMPLE
+
+        began = time.perf_counter()
+        response = client.post("/products/import", files={"file": ("produtos.csv", content, "text/csv")})
+        assert response.status_code == 202, response.text
+        job = client.get(f"/products/import/{response.json()['id']}").json()
+        imported = time.perf_counter() - began
+        assert job["status"] == "completed" and job["created_count"] == ROWS, job
+
+    with SessionLocal() as db:
+        products = db.query(Product).count()
+        movements = db.query(InventoryMovement).count()
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+    print(f"{ROWS} linhas ({len(content) / 1024 / 1024:.1f} MB de CSV), lotes de {IMPORT_CHUNK_SIZE}; "
+          f"{products} produtos e {movements} movimentações no banco ao final")
+    print_table(
+        ["caminho", "s total", "linhas/s"],
+        [
+            (f"item a item (extrapolado de {SAMPLE})", f"{per_item * ROWS:.1f}", f"{1 / per_item:.0f}"),
+            ("POST /products/import", f"{imported:.1f}", f"{ROWS / imported:.0f}"),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    run()
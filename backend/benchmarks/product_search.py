@@ -0,0 +1,68 @@
+"""
+Benchmark: latência p50/p95 da busca de produtos — contains (ILIKE) vs. ranked.
+
+Para cada tamanho de catálogo (padrão 10k, 100k e 1M) recria o banco, popula
+com nomes em português (com acentos) e executa a mesma bateria de buscas pelos
+dois modos de crud.products.get_products, 20 itens por página.
+
+Uso:
+    python -m backend.benchmarks.product_search
+    BENCH_SIZES=10000,100000 python -m backend.benchmarks.product_search
+    BENCH_DATABASE_URL=postgresql://... python -m backend.benchmarks.product_search
+"""
+import os
+import statistics
+import time
+
+from backend.benchmarks._common import make_session_factory, seed_products, print_table
+from backend.crud import products as crud
+
+SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "10000,100000,1000000").split(",")]
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "20"))
+
+_NOUNS = ["Eletrônicos", "Caneta", "Café", "Açúcar", "Pão", "Feijão", "Maçã", "Sabão", "Ração", "Óleo",
+          "Lâmpada", "Parafuso", "Tomada", "Cabo", "Fone", "Teclado", "Mouse", "Monitor", "Caderno", "Limão"]
+_ADJECTIVES = ["Orgânico", "Prêmio", "Econômico", "Clássico", "Integral", "Elétrico", "Básico", "Jumbo"]
+_BRANDS = ["São Jorge", "Tropical", "Aurora", "Mineirão", "Guaraná", "Ipê", "Jequitibá", "Paraná"]
+
+QUERIES = ["eletronicos", "Eletrônicos Prêmio", "acucar", "feijão integral", "cafe", "limao tropical", "ipe", "7890000123"]
+
+
+def realistic_name(i: int) -> str:
+    return f"{_NOUNS[i % len(_NOUNS)]} {_ADJECTIVES[(i // 20) % len(_ADJECTIVES)]} {_BRANDS[(i // 160) % len(_BRANDS)]} {i}"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run():
+    rows = []
+    for size in SIZES:
+        engine, SessionLocal = make_session_factory()
+        start = time.perf_counter()
+        with SessionLocal() as db:
+            seed_products(db, size, name_for=realistic_name)
+        seed_s = time.perf_counter() - start
+
+        for mode in ("contains", "ranked"):
+            samples = []
+            with SessionLocal() as db:
+                for query in QUERIES:  # aquecimento
+                    crud.get_products(db, limit=20, search=query, search_mode=mode)
+                for _ in range(ROUNDS):
+                    for query in QUERIES:
+                        t0 = time.perf_counter()
+                        crud.get_products(db, limit=20, search=query, search_mode=mode)
+                        samples.append((time.perf_counter() - t0) * 1000)
+            rows.append((size, mode, f"{statistics.median(samples):.1f}", f"{percentile(samples, 95):.1f}", f"{seed_s:.0f}s"))
+        print(f"  ... {size} produtos concluído", flush=True)
+        engine.dispose()
+
+    print(f"Banco: {engine.url.get_backend_name()} - {len(QUERIES)} buscas x {ROUNDS} rodadas por modo")
+    print_table(["produtos", "modo", "p50 ms", "p95 ms", "seed"], rows)
+
+
+if __name__ == "__main__":
+    run()
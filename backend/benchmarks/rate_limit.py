@@ -0,0 +1,93 @@
+"""
+Benchmark: latência de cada checagem do rate limit (acquire da janela
+deslizante), com BENCH_WORKERS processos batendo no mesmo storage ao mesmo
+tempo, como os workers do uvicorn.
+
+- memory://: um storage por processo (referência; não limita o conjunto)
+- sqlite: arquivo compartilhado de core.rate_limit_storage
+
+Metade das checagens usa uma chave comum a todos (um IP atrás de NAT, uma API
+key muito usada) e metade chaves próprias de cada processo.
+
+Cada processo faz BENCH_RATE checagens por segundo (o resto do tempo seria a
+própria requisição); BENCH_RATE=0 bate sem pausa, o que com mais processos que
+CPUs mede sobretudo a preempção de quem segura o lock.
+
+Uso:
+    python -m backend.benchmarks.rate_limit
+    BENCH_WORKERS=8 BENCH_CHECKS=20000 python -m backend.benchmarks.rate_limit
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import multiprocessing
+import statistics
+import tempfile
+import time
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from backend.benchmarks._common import print_table
+from backend.core import rate_limit_storage  # noqa: F401  registra sqlite://
+
+WORKERS = int(os.getenv("BENCH_WORKERS", "4"))
+CHECKS = int(os.getenv("BENCH_CHECKS", "5000"))
+RATE = float(os.getenv("BENCH_RATE", "500"))
+
+
+def worker(uri: str, index: int, start, results):
+    strategy = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    item = parse("1000000/minute")
+    strategy.hit(item, "aquecimento", str(index))
+    samples = []
+    interval = 1 / RATE if RATE else 0
+    start.wait()
+    for i in range(CHECKS):
+        key = "shared" if i % 2 else f"worker-{index}-{i % 50}"
+        began = time.perf_counter()
+        strategy.hit(item, key)
+        samples.append((time.perf_counter() - began) * 1_000_000)
+        if interval:
+            time.sleep(interval)
+    results.put(samples)
+
+
+def run_scenario(uri: str):
+    context = multiprocessing.get_context("fork")
+    start, results = context.Barrier(WORKERS), context.Queue()
+    processes = [context.Process(target=worker, args=(uri, i, start, results)) for i in range(WORKERS)]
+    for process in processes:
+        process.start()
+    samples = []
+    for _ in processes:
+        samples.extend(results.get())
+    for process in processes:
+        process.join()
+    samples.sort()
+    return samples
+
+
+def percentile(samples, fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(prefix="romaneio_ratelimit_"), "rate_limits.sqlite")
+    rows = []
+    for label, uri in (("memory:// (por processo)", "memory://"), ("sqlite compartilhado", f"sqlite:///{path}")):
+        samples = run_scenario(uri)
+        rows.append((
+            label, f"{statistics.median(samples):.1f}", f"{percentile(samples, 0.99):.1f}",
+            f"{percentile(samples, 0.999):.1f}", f"{samples[-1]:.1f}",
+        ))
+    pace = f"{RATE:g}/s por processo" if RATE else "sem pausa"
+    print(f"{WORKERS} processos x {CHECKS} checagens ({pace}), µs por checagem")
+    print_table(["storage", "p50", "p99", "p99.9", "máx"], rows)
+
+
+if __name__ == "__main__":
+    main()
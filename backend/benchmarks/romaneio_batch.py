@@ -0,0 +1,55 @@
+"""
+Benchmark: finalizar um romaneio com um POST por item vs. POST /inventory/romaneios.
+
+Compara, para carrinhos de 1 a 500 linhas:
+  - per_line: crud.create_movement chamado uma vez por item (SELECT + commit por linha),
+    como o RomaneioPage fazia antes
+  - batch:    crud.create_romaneio (um SELECT ... IN, um INSERT em lote, um commit)
+
+Uso:
+    python -m backend.benchmarks.romaneio_batch
+    BENCH_DATABASE_URL=postgresql://... python -m backend.benchmarks.romaneio_batch
+"""
+from backend.benchmarks._common import make_session_factory, seed_products, measure, print_table
+from backend.crud import inventory as crud
+from backend.models.inventory import MovementType
+from backend.schemas.inventory import InventoryMovementCreate, RomaneioCreate, RomaneioItem
+
+CART_SIZES = [1, 10, 60, 100, 250, 500]
+
+
+def run():
+    engine, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        product_ids = seed_products(db, max(CART_SIZES))
+
+    rows = []
+    for size in CART_SIZES:
+        cart = product_ids[:size]
+
+        def per_line():
+            with SessionLocal() as db:
+                for product_id in cart:
+                    crud.create_movement(db, InventoryMovementCreate(
+                        product_id=product_id, quantity=1, movement_type=MovementType.OUT,
+                        romaneio_id="ROM-BENCH-LINE",
+                    ))
+
+        def batch():
+            with SessionLocal() as db:
+                crud.create_romaneio(db, RomaneioCreate(
+                    items=[RomaneioItem(product_id=product_id, quantity=1) for product_id in cart],
+                ))
+
+        repeat = 5 if size <= 100 else 3
+        line_ms = measure(per_line, repeat)
+        batch_ms = measure(batch, repeat)
+        rows.append((size, f"{line_ms:.1f}", f"{batch_ms:.1f}", f"{line_ms / batch_ms:.1f}x"))
+
+    print(f"Banco: {engine.url.render_as_string(hide_password=True)}")
+    print_table(["linhas", "per_line ms", "batch ms", "speedup"], rows)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,150 @@
+"""
+Benchmark: renderizações por segundo do documento de romaneio (PDF e PNG) com
+10 e 200 linhas.
+
+- direto:   render_romaneio_document no próprio processo, uma por vez
+- pool N:   BENCH_CONCURRENCY renderizações simultâneas por core.render_pool com
+            N processos; mede também o atraso do event loop enquanto elas rodam
+            (com RENDER_POOL_WORKERS=0 a renderização disputa o GIL com o loop)
+- cache:    GET /inventory/romaneios/{id}/document já renderizado (TestClient),
+            o que um segundo pedido do mesmo romaneio custa
+
+Em uma máquina com 1 CPU o pool não aumenta a vazão; o ganho ali é o loop livre.
+
+Uso:
+    python -m backend.benchmarks.romaneio_document
+    BENCH_POOL_WORKERS=1,2,4 BENCH_CONCURRENCY=16 python -m backend.benchmarks.romaneio_document
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import asyncio
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.benchmarks._common import make_session_factory, print_table, seed_products
+from backend.benchmarks.compression import async_url, realistic_name
+from backend.core import render_pool
+from backend.core.config import settings
+from backend.core.database import get_async_db, get_async_read_db, get_db
+from backend.core.file_cache import FileCache
+from backend.core.limiter import limiter
+from backend.core.romaneio_document import render_romaneio_document
+from backend.core.security import get_async_current_user_flexible
+from backend.crud import inventory as crud
+from backend.models.users import User
+from backend.routers import inventory
+from backend.schemas.inventory import RomaneioCreate, RomaneioItem
+from backend.server import app
+
+LINES = (10, 200)
+POOL_WORKERS = [int(n) for n in os.getenv("BENCH_POOL_WORKERS", "0,1,2").split(",")]
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "8"))
+
+
+def seed(SessionLocal) -> dict:
+    """Cria um romaneio de cada tamanho; retorna {linhas: romaneio_id}."""
+    with SessionLocal() as db:
+        product_ids = seed_products(db, max(LINES), name_for=realistic_name)
+        return {
+            lines: crud.create_romaneio(db, RomaneioCreate(
+                romaneio_id=f"ROM-BENCH-{lines}", customer_name="Mercado São Jorge Ltda",
+                items=[RomaneioItem(product_id=pid, quantity=1 + i % 5) for i, pid in enumerate(product_ids[:lines])],
+            )).romaneio_id
+            for lines in LINES
+        }
+
+
+def inline_rate(document: dict, fmt: str) -> float:
+    render_romaneio_document(document, fmt)  # aquece fontes e máscaras dos glifos
+    count, began = 0, time.perf_counter()
+    while count < 3 or time.perf_counter() - began < 2:
+        render_romaneio_document(document, fmt)
+        count += 1
+    return count / (time.perf_counter() - began)
+
+
+async def pool_rate(document: dict, fmt: str):
+    """(renderizações/s, maior atraso do event loop em ms)"""
+    await asyncio.gather(*(render_pool.run_in_pool(render_romaneio_document, document, fmt) for _ in range(max(settings.RENDER_POOL_WORKERS, 1))))
+    lag, done = 0.0, False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            expected = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - expected)
+
+    probe = asyncio.create_task(ticker())
+    began = time.perf_counter()
+    await asyncio.gather(*(render_pool.run_in_pool(render_romaneio_document, document, fmt) for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - began
+    done = True
+    await probe
+    return CONCURRENCY / elapsed, lag * 1000
+
+
+def cached_rate(client: TestClient, romaneio_id: str, fmt: str) -> float:
+    url = f"/inventory/romaneios/{romaneio_id}/document"
+    assert client.get(url, params={"format": fmt}).status_code == 200  # renderiza e grava no cache
+    count, began = 0, time.perf_counter()
+    while time.perf_counter() - began < 1:
+        client.get(url, params={"format": fmt})
+        count += 1
+    return count / (time.perf_counter() - began)
+
+
+def run():
+    engine, SessionLocal = make_session_factory()
+    romaneios = seed(SessionLocal)
+    async_engine = create_async_engine(async_url(engine.url.render_as_string(hide_password=False)))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_get_db():
+        with SessionLocal() as db:
+            yield db
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    app.dependency_overrides[get_async_current_user_flexible] = lambda: User(id=1, email="bench@romaneio.com", is_active=True)
+    limiter.enabled = False
+    inventory.document_cache = FileCache("romaneio_documents", 100, directory=tempfile.mkdtemp(prefix="romaneio_documents_"))
+
+    with SessionLocal() as db:
+        documents = {lines: inventory.build_document(inventory.RomaneioResponse.model_validate(crud.get_romaneio(db, romaneio_id)))
+                     for lines, romaneio_id in romaneios.items()}
+
+    rows = []
+    client = TestClient(app)
+    for lines, document in documents.items():
+        for fmt in ("pdf", "png"):
+            size = len(render_romaneio_document(document, fmt))
+            rows.append((lines, fmt, "direto", f"{inline_rate(document, fmt):.1f}", "-", f"{size / 1024:.0f}"))
+            for workers in POOL_WORKERS:
+                settings.RENDER_POOL_WORKERS = workers
+                rate, lag = asyncio.run(pool_rate(document, fmt))
+                render_pool.shutdown_pool()
+                label = f"pool {workers}" if workers else "thread"
+                rows.append((lines, fmt, label, f"{rate:.1f}", f"{lag:.0f}", ""))
+            rows.append((lines, fmt, "cache (HTTP)", f"{cached_rate(client, romaneios[lines], fmt):.0f}", "-", ""))
+
+    app.dependency_overrides.clear()
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+    print(f"CPUs: {os.cpu_count()}; {CONCURRENCY} renderizações simultâneas por medição do pool")
+    print_table(["linhas", "formato", "caminho", "renderizações/s", "atraso máx. do loop ms", "KB"], rows)
+
+
+if __name__ == "__main__":
+    run()
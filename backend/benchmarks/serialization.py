@@ -0,0 +1,158 @@
+"""
+Benchmark: custo de montar o JSON das listagens paginadas (produtos, clientes,
+movimentações) com 100 e 1000 itens por página.
+
+- padrão: objetos ORM serializados pelo mesmo caminho do FastAPI (validação
+  contra o response_model da rota e dump_json; clientes, sem response_model,
+  passam pelo jsonable_encoder; movimentações ainda são validadas item a item)
+- rápido: linhas projetadas (projected=True no CRUD) + FastJSONResponse, com
+  orjson e com o fallback do pydantic-core
+
+"consulta + JSON" inclui a ida ao banco; "só JSON" parte dos itens já carregados.
+
+Uso:
+    python -m backend.benchmarks.serialization
+"""
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import asyncio
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from backend.benchmarks._common import make_session_factory, measure, print_table, seed_products
+from backend.core import serialization
+from backend.core.serialization import FastJSONResponse
+from backend.crud import clients as clients_crud
+from backend.crud import inventory as inventory_crud
+from backend.crud import products as products_crud
+from backend.models.clients import Client
+from backend.models.inventory import InventoryMovement, MovementType
+from backend.models.users import User
+from backend.routers import clients as clients_router
+from backend.routers import inventory as inventory_router
+from backend.routers import products as products_router
+from backend.routers.inventory import _validated_page
+from backend.schemas.inventory import InventoryMovementResponse
+
+PAGE_SIZES = (100, 1000)
+REPEAT = int(os.getenv("BENCH_REPEAT", "20"))
+
+loop = asyncio.new_event_loop()
+
+
+def response_field(router, path: str):
+    for route in router.routes:
+        if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods:
+            return route.response_field
+    raise LookupError(path)
+
+
+def default_render(field, payload) -> bytes:
+    """O que o FastAPI faz com o retorno da rota quando ela devolve um dict."""
+    if field is None:
+        return JSONResponse(jsonable_encoder(payload)).body
+    return loop.run_until_complete(serialize_response(field=field, response_content=payload, dump_json=True))
+
+
+def fast_render(payload, use_orjson: bool) -> bytes:
+    saved = serialization.orjson
+    if not use_orjson:
+        serialization.orjson = None
+    try:
+        return FastJSONResponse(payload).body
+    finally:
+        serialization.orjson = saved
+
+
+def seed(db, count: int):
+    product_ids = seed_products(db, count)
+    user = User(email="bench@user.com", hashed_password="x", full_name="Bench", plan_id="pro")
+    db.add(user)
+    db.commit()
+    db.bulk_insert_mappings(Client, [
+        {"user_id": user.id, "name": f"Cliente {i:05d}", "phone": f"11 9{i:08d}", "document": f"{i:011d}",
+         "email": f"cliente{i}@exemplo.com", "notes": "Entrega pela manhã"}
+        for i in range(count)
+    ])
+    clients = [row[0] for row in db.query(Client.id).order_by(Client.id)]
+    db.bulk_insert_mappings(InventoryMovement, [
+        {"product_id": product_ids[i], "quantity": 1 + i % 7, "movement_type": MovementType.OUT,
+         "client_id": clients[i] if i % 2 else None, "product_name_snapshot": f"Produto {i:06d}",
+         "product_barcode_snapshot": f"789{i:010d}", "unit_price_snapshot": 10.0 + i % 100, "unit_snapshot": "UN",
+         "romaneio_id": f"ROM-BENCH-{i // 20:04d}"}
+        for i in range(count)
+    ])
+    db.commit()
+    return user.id
+
+
+def run():
+    engine, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        user_id = seed(db, max(PAGE_SIZES))
+
+    listings = {
+        "produtos": (
+            response_field(products_router.router, "/products/"),
+            lambda db, size, projected: products_crud.get_products(db, limit=size, projected=projected),
+            lambda items, total, size: {"items": items, "total": total, "page": 1, "per_page": size, "pages": 1},
+        ),
+        "clientes": (
+            response_field(clients_router.router, "/clients/"),
+            lambda db, size, projected: clients_crud.get_clients(db, user_id=user_id, limit=size, projected=projected),
+            lambda items, total, size: {"items": items, "total": total, "page": 1, "per_page": size, "pages": 1},
+        ),
+        "movimentações": (
+            response_field(inventory_router.router, "/inventory/movements"),
+            lambda db, size, projected: (
+                inventory_crud.get_movements(db, limit=size, projected=True) if projected
+                else _validated_page(InventoryMovementResponse, inventory_crud.get_movements)(db, limit=size)
+            ),
+            lambda items, total, size: {"items": items, "total": total, "page": 1, "per_page": size},
+        ),
+    }
+
+    rows = []
+    for label, (field, fetch, page) in listings.items():
+        for size in PAGE_SIZES:
+            with SessionLocal() as db:
+                orm_items, total = fetch(db, size, False)
+                row_items, _ = fetch(db, size, True)
+                default_payload = page(orm_items, total, size)
+                fast_payload = page(row_items, total, size)
+                assert len(orm_items) == len(row_items) == size
+
+                only_default = measure(lambda: default_render(field, default_payload), REPEAT)
+                only_fast = measure(lambda: fast_render(fast_payload, True), REPEAT)
+                only_core = measure(lambda: fast_render(fast_payload, False), REPEAT)
+
+            def full(projected):
+                with SessionLocal() as db:
+                    items, total = fetch(db, size, projected)
+                    payload = page(items, total, size)
+                    return fast_render(payload, True) if projected else default_render(field, payload)
+
+            full_default = measure(lambda: full(False), REPEAT)
+            full_fast = measure(lambda: full(True), REPEAT)
+            rows.append((
+                label, size,
+                f"{only_default:.2f}", f"{only_fast:.2f}", f"{only_core:.2f}",
+                f"{full_default:.2f}", f"{full_fast:.2f}", f"{full_default / full_fast:.1f}x",
+            ))
+
+    engine.dispose()
+    print(f"mediana de {REPEAT} execuções, ms")
+    print_table(
+        ["listagem", "itens", "só JSON padrão", "só JSON orjson", "só JSON pydantic-core",
+         "consulta + JSON padrão", "consulta + JSON rápido", "ganho"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -1,105 +1,192 @@
 import os
+import sys
+import copy
+import json
+import queue
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import threading
+import warnings
+from logging.handlers import QueueHandler, QueueListener
 import portalocker
-import inspect
-from datetime import datetime, timedelta
+from datetime import datetime
 
-class SafeDailyRotatingFileHandler(TimedRotatingFileHandler):
+class JsonLinesWriter(logging.Handler):
     """
-    Handler que garante:
-      - arquivo diário com data no nome (ex: main_2025-11-04.log)
-      - troca automática no início do novo dia (mesmo com processo long-running)
-      - lock via portalocker para escrita segura entre processos
+    Único escritor de logs do processo (roda na thread do QueueListener).
+
+    Cada registro vira uma linha JSON em <base_folder>/<context>/<context>_<data>.log,
+    o mesmo arquivo diário de antes. As linhas ficam em memória até flush(), que
+    grava cada arquivo com um único lock do portalocker (seguro entre os workers)
+    e um único write. Mantém os backup_count arquivos mais recentes por contexto.
     """
-    def __init__(self, filename, when='midnight', interval=1, backupCount=120,
-                 encoding=None, delay=False, utc=False, atTime=None):
-        self._base_filename = filename
-        self.current_date = datetime.now().strftime("%Y-%m-%d")
-        dated = self._dated_filename(self.current_date)
-        super().__init__(dated, when=when, interval=interval,
-                         backupCount=backupCount, encoding=encoding,
-                         delay=delay, utc=utc, atTime=atTime)
-        self.lock_file = f"{self.baseFilename}.lock"
-
-    def _dated_filename(self, date_str):
-        base, ext = os.path.splitext(self._base_filename)
-        return f"{base}_{date_str}{ext}"
-
-    def _switch_if_needed(self):
-        """Se o dia mudou, fecha stream e abre novo arquivo com nova data."""
-        today = datetime.now().strftime("%Y-%m-%d")
-        if today != self.current_date:
-            try:
-                if self.stream:
-                    self.stream.close()
-            except Exception:
-                pass
-            
-            self.current_date = today
-            new_name = self._dated_filename(self.current_date)
-            self.baseFilename = new_name
-            self.stream = self._open()
-            self.lock_file = f"{self.baseFilename}.lock"
-            
-            t = datetime.now()
-            tomorrow = (t + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-            self.rolloverAt = int(tomorrow.timestamp())
+    def __init__(self, base_folder: str = ".log", backup_count: int = 120):
+        super().__init__()
+        self.base_folder = base_folder
+        self.backup_count = backup_count
+        self._pending = {}
+        self._known_files = set()
+
+    def _path(self, context: str, date_str: str) -> str:
+        return os.path.join(self.base_folder, context, f"{context}_{date_str}.log")
 
     def emit(self, record):
         try:
-            self._switch_if_needed()
-            with portalocker.Lock(self.lock_file, 'a', timeout=10):
-                super().emit(record)
+            context, _, module = record.name.partition(".")
+            entry = {
+                "ts": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+                "level": record.levelname,
+                "context": context,
+                "module": module,
+                "message": record.getMessage(),
+            }
+            for key, value in record.__dict__.items():
+                if key not in _RECORD_ATTRS:
+                    entry[key] = value
+            if record.exc_text:
+                entry["exc"] = record.exc_text
+            date_str = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d")
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+            self._pending.setdefault(self._path(context, date_str), []).append(line)
         except Exception:
             self.handleError(record)
 
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        for path, lines in pending.items():
+            try:
+                if path not in self._known_files:
+                    _ensure_dir(os.path.dirname(path))
+                    self._prune(os.path.dirname(path))
+                    self._known_files.add(path)
+                with portalocker.Lock(f"{path}.lock", "a", timeout=10):
+                    with open(path, "a", encoding="utf-8") as stream:
+                        stream.write("\n".join(lines) + "\n")
+            except Exception as e:
+                sys.stderr.write(f"Falha ao gravar {len(lines)} linha(s) de log em {path}: {e}\n")
+
+    def _prune(self, directory: str):
+        logs = sorted(name for name in os.listdir(directory) if name.endswith(".log"))
+        for name in logs[:-self.backup_count] if len(logs) > self.backup_count else []:
+            for stale in (name, f"{name}.lock"):
+                try:
+                    os.remove(os.path.join(directory, stale))
+                except FileNotFoundError:
+                    pass
+
+
+class _JsonQueueHandler(QueueHandler):
+    """Enfileira sem formatar (quem formata é o escritor) e descarta se a fila estiver cheia."""
+    dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Log nunca pode travar a requisição
+            _JsonQueueHandler.dropped += 1
+
+
+class _BatchingQueueListener(QueueListener):
+    """Grava em lote: flush quando a fila esvazia ou a cada LOG_FLUSH_EVERY registros."""
+    def __init__(self, log_queue, writer: JsonLinesWriter, flush_every: int):
+        super().__init__(log_queue, writer, respect_handler_level=False)
+        self.writer = writer
+        self.flush_every = flush_every
+        self._unflushed = 0
+
+    def handle(self, record):
+        self.writer.handle(record)
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every or self.queue.empty():
+            self.writer.flush()
+            self._unflushed = 0
+
+
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+_TRACEBACK_FORMATTER = logging.Formatter()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_FLUSH_EVERY = int(os.getenv("LOG_FLUSH_EVERY", "256"))
 
 _LOGGERS = {}
+_pipeline = {}
+_pipeline_lock = threading.Lock()
 
 def _ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
+def _queue_handler(base_folder: str) -> QueueHandler:
+    """Um QueueHandler/QueueListener (um escritor) por processo e pasta de logs."""
+    with _pipeline_lock:
+        if base_folder not in _pipeline:
+            log_queue = queue.Queue(LOG_QUEUE_SIZE)
+            listener = _BatchingQueueListener(log_queue, JsonLinesWriter(base_folder), LOG_FLUSH_EVERY)
+            listener.start()
+            _pipeline[base_folder] = (_JsonQueueHandler(log_queue), listener)
+        return _pipeline[base_folder][0]
+
+def shutdown_logging(base_folder: str = None):
+    """Esvazia as filas e grava o que falta (atexit; também usado por testes/benchmarks)."""
+    with _pipeline_lock:
+        for folder, (_, listener) in _pipeline.items():
+            if base_folder is not None and folder != base_folder:
+                continue
+            if listener._thread is not None:
+                listener.stop()
+            listener.writer.flush()
+
+def _restart_after_fork():
+    # A thread do escritor não existe no filho de um fork: cada processo sobe a sua
+    for _, listener in _pipeline.values():
+        listener._thread = None
+        listener.start()
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
 def get_logger(module_name: str = None, context: str = "default", base_folder: str = ".log",
                filename: str = None, level=logging.INFO):
     """
     Retorna um logger único por (context, module_name).
     - module_name: normalmente __name__
     - context: 'main', 'api', ou outro valor descritivo
+
+    O logger só enfileira (QueueHandler); a escrita em arquivo, em JSON lines,
+    acontece na thread do escritor do processo, fora do caminho da requisição.
+    Campos passados em extra= viram chaves da linha JSON.
+
+    `filename` está obsoleto e é ignorado: o arquivo é sempre <context>_<data>.log.
     """
+    if filename is not None:
+        warnings.warn(
+            "get_logger(filename=...) é ignorado: o arquivo é sempre <context>_<data>.log",
+            DeprecationWarning,
+            stacklevel=2,
+        )
     if module_name is None:
-        caller = inspect.stack()[1]
-        module_name = caller.frame.f_globals.get("__name__", "unknown")
+        module_name = sys._getframe(1).f_globals.get("__name__", "unknown")
 
     key = f"{context}.{module_name}"
 
     if key in _LOGGERS:
         return _LOGGERS[key]
 
-    log_dir = os.path.join(base_folder, context)
-    _ensure_dir(log_dir)
-    if not filename:
-        filename = f"{context}.log"
-    log_file = os.path.join(log_dir, filename)
-
     logger = logging.getLogger(key)
     logger.setLevel(level)
     logger.propagate = False
 
     if not logger.handlers:
-        handler = SafeDailyRotatingFileHandler(
-            filename=log_file,
-            when='midnight',
-            interval=1,
-            backupCount=120,
-            encoding='utf-8'
-        )
-        formatter = logging.Formatter(
-            '%(asctime)s - %(levelname)s - [%(name)s] - %(message)s',
-            datefmt='%d-%m-%y %H:%M:%S'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.addHandler(_queue_handler(base_folder))
 
     _LOGGERS[key] = logger
     return logger
@@ -110,6 +197,7 @@ def get_dynamic_logger(context: str = "default", level=logging.INFO):
     Conveniência: detecta o módulo chamador e retorna um logger contextualizado.
     Uso: logger = get_dynamic_logger("api")  ou get_dynamic_logger("main")
     """
-    caller = inspect.stack()[1]
-    module_name = caller.frame.f_globals.get("__name__", "unknown")
+    # sys._getframe em vez de inspect.stack(): este só lê o frame do chamador,
+    # sem carregar o código-fonte de toda a pilha (centenas de ms na subida)
+    module_name = sys._getframe(1).f_globals.get("__name__", "unknown")
     return get_logger(module_name=module_name, context=context, level=level)
@@ -0,0 +1,127 @@
+"""
+Autenticação por API Key sem escrita por requisição.
+
+- api_key_cache: chaves já verificadas, por hash, com TTL curto
+  (API_KEY_CACHE_TTL_SECONDS). revoke_api_key invalida na hora em todos os
+  workers (ver core.shared_cache). O usuário dono vem do cache de usuários.
+- usage_buffer: last_used_at e usage_count acumulados em memória e gravados
+  em lote a cada API_KEY_USAGE_FLUSH_SECONDS por uma thread em segundo plano
+  (e na saída do processo), em vez de um UPDATE + commit por chamada.
+"""
+import atexit
+import os
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from backend.config.logger import get_dynamic_logger
+from backend.core.shared_cache import SharedCache
+
+API_KEY_CACHE_TTL_SECONDS = float(os.getenv("API_KEY_CACHE_TTL_SECONDS", "30"))
+API_KEY_CACHE_MAX_ENTRIES = int(os.getenv("API_KEY_CACHE_MAX_ENTRIES", "4096"))
+API_KEY_USAGE_FLUSH_SECONDS = float(os.getenv("API_KEY_USAGE_FLUSH_SECONDS", "5"))
+
+logger = get_dynamic_logger("api_keys")
+
+_CACHED_COLUMNS = ("id", "user_id", "key_prefix", "expires_at")
+
+
+class ApiKeyCache(SharedCache):
+    """Entradas: {id, user_id, key_prefix, expires_at, owner_email}."""
+
+    def __init__(self, ttl: float = API_KEY_CACHE_TTL_SECONDS, max_entries: int = API_KEY_CACHE_MAX_ENTRIES, directory: str = None):
+        super().__init__("api_keys", ttl, max_entries, directory)
+
+    def _snapshot(self, value):
+        api_key, owner_email = value
+        snapshot = {column: getattr(api_key, column) for column in _CACHED_COLUMNS}
+        snapshot["owner_email"] = owner_email
+        return snapshot
+
+
+@lru_cache(maxsize=None)
+def _sync_engine_for(url):
+    # Driver síncrono padrão do mesmo banco (sqlite+aiosqlite -> sqlite, postgresql+asyncpg -> postgresql)
+    return create_engine(url.set(drivername=url.get_backend_name()), poolclass=NullPool)
+
+
+def _sync_bind(bind):
+    """
+    Engine que a thread de flush consegue usar. A engine de uma AsyncSession
+    (AsyncEngine.sync_engine) só funciona dentro do greenlet do event loop;
+    para ela vale a engine síncrona do mesmo banco.
+    """
+    if not bind.dialect.is_async:
+        return bind
+    from backend.core import database
+    if bind is database.async_engine.sync_engine:
+        return database.engine
+    return _sync_engine_for(bind.url)
+
+
+class UsageBuffer:
+    def __init__(self, interval: float = API_KEY_USAGE_FLUSH_SECONDS):
+        self.interval = interval
+        # engine -> {api_key_id: [last_used_at, chamadas]}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def record(self, bind, api_key_id: int) -> None:
+        now = datetime.now(timezone.utc)
+        bind = _sync_bind(bind)
+        with self._lock:
+            usage = self._pending.setdefault(bind, {}).setdefault(api_key_id, [now, 0])
+            usage[0] = now
+            usage[1] += 1
+        if self.interval <= 0:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def flush(self) -> int:
+        """Grava o que estiver pendente; retorna o número de chaves atualizadas."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        flushed = 0
+        for bind, usages in pending.items():
+            rows = [
+                {"id": key_id, "last_used_at": last_used_at, "calls": calls}
+                for key_id, (last_used_at, calls) in usages.items()
+            ]
+            try:
+                with bind.begin() as conn:
+                    conn.execute(
+                        text(
+                            "UPDATE api_keys SET last_used_at = :last_used_at, "
+                            "usage_count = COALESCE(usage_count, 0) + :calls WHERE id = :id"
+                        ),
+                        rows,
+                    )
+                flushed += len(rows)
+            except Exception as e:
+                # Uso de API Key é informativo: registra e segue, sem derrubar a thread
+                logger.error(f"Erro ao gravar uso de {len(rows)} API Key(s): {e}")
+        return flushed
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="api-key-usage-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+api_key_cache = ApiKeyCache()
+usage_buffer = UsageBuffer()
+atexit.register(usage_buffer.flush)
@@ -0,0 +1,82 @@
+"""
+Armazenamento de imagens endereçado por conteúdo.
+
+Cada imagem é gravada uma única vez em <UPLOADS_DIR>/images/<aa>/<sha256>.<ext>
+(servido pelo mount StaticFiles em /uploads); o banco guarda apenas a chave
+relativa ("images/aa/<sha256>.webp"). Imagens iguais compartilham o mesmo arquivo,
+então gravar de novo é idempotente e os arquivos nunca mudam depois de criados.
+"""
+import base64
+import binascii
+import hashlib
+import io
+import os
+import tempfile
+from typing import Optional
+
+
+UPLOADS_DIR = os.getenv("UPLOADS_DIR", "uploads")
+UPLOADS_URL_PREFIX = "/uploads"
+
+# Formatos aceitos (detectados pelo conteúdo, não pelo prefixo data: enviado pelo cliente)
+_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+
+class InvalidImageError(ValueError):
+    """Conteúdo enviado não é uma imagem base64 válida em um formato aceito."""
+
+
+def _decode_base64(data: str) -> bytes:
+    if data.startswith("data:"):
+        data = data.split(",", 1)[-1]
+    try:
+        return base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidImageError("Imagem base64 inválida")
+
+
+def _detect_extension(raw: bytes) -> str:
+    # Pillow só é carregado no primeiro upload, não na subida do worker
+    from PIL import Image, UnidentifiedImageError
+    try:
+        with Image.open(io.BytesIO(raw)) as image:
+            image_format = image.format
+    except (UnidentifiedImageError, OSError):
+        raise InvalidImageError("Formato de imagem não reconhecido")
+    if image_format not in _EXTENSIONS:
+        raise InvalidImageError(f"Formato de imagem não suportado: {image_format}")
+    return _EXTENSIONS[image_format]
+
+
+def save_image_bytes(raw: bytes) -> str:
+    """Grava a imagem (se ainda não existir) e retorna a chave relativa ao diretório de uploads."""
+    extension = _detect_extension(raw)
+    digest = hashlib.sha256(raw).hexdigest()
+    key = f"images/{digest[:2]}/{digest}.{extension}"
+    path = os.path.join(UPLOADS_DIR, key)
+    if os.path.exists(path):
+        return key
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Escrita atômica: outro worker nunca serve um arquivo pela metade
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(raw)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return key
+
+
+def save_base64_image(data: str) -> str:
+    """Aceita base64 puro ou data URL (data:image/png;base64,...)."""
+    return save_image_bytes(_decode_base64(data))
+
+
+def url_for(key: Optional[str]) -> Optional[str]:
+    return f"{UPLOADS_URL_PREFIX}/{key}" if key else None
@@ -17,6 +17,46 @@ class Settings(BaseSettings):
     SMTP_FROM: Optional[str] = None
     FRONTEND_URL: str = "http://localhost:5173"
 
+    # Fuso horário da loja: define o que é "hoje" no resumo do dashboard
+    STORE_TIMEZONE: str = "America/Sao_Paulo"
+
+    # Pool de conexões (por worker; multiplique pelo número de workers do uvicorn)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Conexões abertas antes do worker aceitar tráfego
+    DB_POOL_MIN_CONNECTIONS: int = 2
+    # 0 desativa
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # PgBouncer em pool_mode=transaction: sem prepared statements nomeados
+    # nem parâmetros de sessão (statement_timeout vai por SET LOCAL)
+    DB_PGBOUNCER: bool = False
+    # Depois de uma escrita, as leituras do mesmo cliente vão ao primário por este
+    # tempo (cobre o atraso de replicação); 0 manda toda leitura à réplica
+    DB_READ_YOUR_WRITES_SECONDS: float = 5
+
+    # Bearer token exigido em GET /metrics (Prometheus); vazio desativa o endpoint
+    METRICS_TOKEN: str = ""
+
+    # Contadores do rate limit (janela deslizante). Vazio: arquivo SQLite em
+    # CACHE_INVALIDATION_DIR, compartilhado pelos workers do host (memória nos testes).
+    # Aceita qualquer URI do pacote limits, ex.: redis://redis:6379/0 para vários hosts
+    RATE_LIMIT_STORAGE_URI: str = ""
+
+    # Listagens paginadas (produtos, clientes, movimentações) serializadas direto
+    # de linhas projetadas para bytes, sem objetos ORM nem jsonable_encoder
+    FAST_JSON_RESPONSES: bool = False
+
+    # Processos (por worker) que renderizam documentos de romaneio e etiquetas;
+    # 0 renderiza numa thread do próprio worker. Cada processo ocupa ~50 MB,
+    # somados aos ~110 MB de cada worker do uvicorn
+    RENDER_POOL_WORKERS: int = 1
+    # Limites do cache em disco dos documentos de romaneio (arquivos e MB)
+    ROMANEIO_DOCUMENT_CACHE_MAX_FILES: int = 5000
+    ROMANEIO_DOCUMENT_CACHE_MAX_MB: int = 256
+
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".env"),
         env_file_encoding="utf-8",
@@ -0,0 +1,52 @@
+"""
+Cache de contagens (COUNT(*)) para listagens sem filtro.
+
+Cada worker mantém sua própria cópia, limitada pelo TTL; a invalidação é a de
+core.shared_cache: uma escrita feita pelo CRUD em qualquer worker faz os outros
+recalcularem na próxima leitura, em vez de exibirem o total velho até o TTL
+vencer. invalidate() sem chave atualiza um marcador do namespace inteiro,
+conferido junto com o da chave. Use apenas onde o total é informativo
+(paginação), nunca para validações como limites de plano.
+"""
+import os
+from typing import Callable, Hashable
+
+from backend.core.shared_cache import SharedCache
+
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "1024"))
+
+# Chave do marcador que invalida todas as entradas do namespace
+_ALL = "*"
+
+
+class CountCache(SharedCache):
+    def __init__(self, namespace: str, ttl: float = COUNT_CACHE_TTL_SECONDS,
+                 max_entries: int = COUNT_CACHE_MAX_ENTRIES, directory: str = None):
+        super().__init__(namespace, ttl, max_entries, directory)
+
+    def _invalidated_since(self, key: Hashable, loaded_at: int) -> bool:
+        return super()._invalidated_since(_ALL, loaded_at) or super()._invalidated_since(key, loaded_at)
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], int]):
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        loaded_at = self.clock()
+        value = compute()
+        # Uma escrita durante o cálculo (em qualquer worker) impede guardar o valor velho
+        self.put(key, value, loaded_at)
+        return value
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Remove uma chave (ou todas, se key=None) em todos os workers."""
+        if key is None:
+            self.clear()
+            key = _ALL
+        super().invalidate(key)
+
+
+product_counts = CountCache("product_counts")
+client_counts = CountCache("client_counts")
+# Resumo do dashboard (agregados, não só COUNT): TTL curto, invalidado nas escritas de estoque
+dashboard_summaries = CountCache("dashboard_summaries", ttl=float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "15")))
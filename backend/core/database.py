@@ -1,9 +1,16 @@
-from sqlalchemy import create_engine
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import asyncio
+import uuid
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from fastapi import Depends, Request
 
 import os
 
+from backend.core.config import settings
+from backend.core.read_routing import recent_writes
+
 POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
 POSTGRES_SERVER = os.getenv("POSTGRES_SERVER", "db")
@@ -11,10 +18,137 @@ POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "romaneio_rapido")
 
 DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+
+# Réplica de leitura opcional (streaming replication do primário); sem ela, leituras vão ao primário
+POSTGRES_REPLICA_SERVER = os.getenv("POSTGRES_REPLICA_SERVER", "")
+POSTGRES_REPLICA_PORT = os.getenv("POSTGRES_REPLICA_PORT", POSTGRES_PORT)
+REPLICA_DATABASE_URL = DATABASE_URL.replace(f"@{POSTGRES_SERVER}:{POSTGRES_PORT}/", f"@{POSTGRES_REPLICA_SERVER}:{POSTGRES_REPLICA_PORT}/")
+ASYNC_REPLICA_DATABASE_URL = ASYNC_DATABASE_URL.replace(f"@{POSTGRES_SERVER}:{POSTGRES_PORT}/", f"@{POSTGRES_REPLICA_SERVER}:{POSTGRES_REPLICA_PORT}/")
+
+
+def _pool_options():
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _sync_connect_args():
+    if settings.DB_STATEMENT_TIMEOUT_MS and not settings.DB_PGBOUNCER:
+        return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
+
+
+def _async_connect_args():
+    args = {}
+    if settings.DB_PGBOUNCER:
+        # Em transaction pooling o próximo comando pode cair em outra conexão do servidor:
+        # sem cache de prepared statements e com nomes únicos para não colidirem
+        args["statement_cache_size"] = 0
+        args["prepared_statement_cache_size"] = 0
+        args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    elif settings.DB_STATEMENT_TIMEOUT_MS:
+        args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+    return args
+
+
+def _set_local_statement_timeout(conn):
+    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
 
-engine = create_engine(DATABASE_URL)
+
+# Síncrono: scripts (seed_db.py, migrate.py) e routers ainda em def
+engine = create_engine(DATABASE_URL, connect_args=_sync_connect_args(), **_pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Assíncrono (asyncpg): routers async def não ocupam o threadpool esperando o Postgres.
+# expire_on_commit=False: a resposta é serializada depois do commit, fora do greenlet,
+# onde um atributo expirado não pode ser recarregado.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, connect_args=_async_connect_args(), **_pool_options())
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if POSTGRES_REPLICA_SERVER:
+    replica_engine = create_engine(REPLICA_DATABASE_URL, connect_args=_sync_connect_args(), **_pool_options())
+    async_replica_engine = create_async_engine(ASYNC_REPLICA_DATABASE_URL, connect_args=_async_connect_args(), **_pool_options())
+else:
+    replica_engine, async_replica_engine = engine, async_engine
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+AsyncReplicaSessionLocal = async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False)
+
+
+def _engines():
+    """(nome, engine síncrona) de cada pool deste worker; a réplica só se configurada."""
+    engines = [("sync", engine), ("async", async_engine.sync_engine)]
+    if POSTGRES_REPLICA_SERVER:
+        engines += [("replica_sync", replica_engine), ("replica_async", async_replica_engine.sync_engine)]
+    return engines
+
+
+if settings.DB_PGBOUNCER and settings.DB_STATEMENT_TIMEOUT_MS:
+    # Parâmetros de sessão vazariam para outros clientes do PgBouncer: vale só para a transação
+    for _, _engine in _engines():
+        event.listen(_engine, "begin", _set_local_statement_timeout)
+
+
+def pool_status():
+    """Conexões de cada pool deste worker: em uso, ociosas e acima de pool_size."""
+    status = {}
+    for name, pool_engine in _engines():
+        pool = pool_engine.pool
+        status[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+        }
+    return status
+
+
+async def ping_database():
+    for target in {async_engine, async_replica_engine}:
+        async with target.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+
+async def warm_up_pools(connections: int = None):
+    """
+    Abre `connections` conexões em cada pool (padrão DB_POOL_MIN_CONNECTIONS) e as
+    devolve ociosas, para que as primeiras requisições não paguem o handshake.
+    """
+    connections = min(settings.DB_POOL_MIN_CONNECTIONS if connections is None else connections, settings.DB_POOL_SIZE)
+    if connections <= 0:
+        return
+
+    async def open_async(target, barrier):
+        async with target.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await barrier.wait()
+
+    def open_sync(target):
+        held = [target.connect() for _ in range(connections)]
+        for conn in held:
+            conn.close()
+
+    # Segura todas as conexões ao mesmo tempo; em sequência o pool reutilizaria a mesma
+    tasks = []
+    for target in {async_engine, async_replica_engine}:
+        barrier = asyncio.Barrier(connections)
+        tasks += [open_async(target, barrier) for _ in range(connections)]
+    tasks += [asyncio.to_thread(open_sync, target) for target in {engine, replica_engine}]
+    await asyncio.gather(*tasks)
+
+
+async def dispose_engines():
+    for target in {engine, replica_engine}:
+        target.dispose()
+    for target in {async_engine, async_replica_engine}:
+        await target.dispose()
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -24,3 +158,42 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """
+    Sessão para rotas somente leitura: vai à réplica, exceto logo depois de uma
+    escrita do mesmo cliente (read-your-writes, ver core.read_routing), quando
+    reaproveita a sessão do primário. A sessão do primário só conecta se usada.
+    """
+    if replica_engine is engine or recent_writes.wrote_recently(request):
+        yield db
+        return
+    replica_db = ReplicaSessionLocal()
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+
+
+async def get_async_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Versão async de get_read_db."""
+    if async_replica_engine is async_engine or recent_writes.wrote_recently(request):
+        yield db
+        return
+    async with AsyncReplicaSessionLocal() as replica_db:
+        yield replica_db
+
+
+async def run_sync(db: AsyncSession, fn, *args, **kwargs):
+    """
+    Executa uma função síncrona de CRUD (fn(session, ...)) sobre a AsyncSession.
+    O SQLAlchemy roda o código ORM num greenlet com I/O assíncrono, então o mesmo
+    crud.* serve aos scripts síncronos e aos routers async sem ocupar threads.
+    """
+    return await db.run_sync(lambda session: fn(session, *args, **kwargs))
@@ -0,0 +1,96 @@
+"""
+ETags fracos a partir de contadores de versão mantidos pelo CRUD.
+
+Cada chave ("categories", "products", "products:42") tem uma versão: o mtime
+(ns) de um arquivo marcador em <CACHE_INVALIDATION_DIR>/versions, visível para
+todos os workers, como em core.shared_cache. O CRUD chama table_versions.bump()
+depois do commit; as rotas comparam If-None-Match com o ETag calculado a partir
+das versões e devolvem 304 sem consultar o banco.
+
+Uma chave que nunca foi alterada desde que o diretório foi criado usa a versão
+da "época" do diretório: se ele for apagado (ex.: reinício do container), todos
+os ETags mudam, nunca ficam iguais para dados diferentes.
+
+Escritas fora do CRUD (scripts, SQL manual) não alteram as versões.
+"""
+import hashlib
+import os
+import time
+from typing import Optional
+
+from fastapi import Request, Response
+
+from backend.core import database
+from backend.core.config import settings
+from backend.core.shared_cache import CACHE_INVALIDATION_DIR
+
+_EPOCH = "_epoch"
+
+
+class VersionCounters:
+    def __init__(self, directory: str = None):
+        self.directory = directory or os.path.join(CACHE_INVALIDATION_DIR, "versions")
+
+    def _marker(self, key: str) -> str:
+        return os.path.join(self.directory, key.replace("/", "_"))
+
+    def _touch(self, key: str, stamp: int) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._marker(key)
+        with open(path, "a"):
+            pass
+        os.utime(path, ns=(stamp, stamp))
+
+    def bump(self, *keys: Optional[str]) -> None:
+        """Chamar depois do commit que alterou os dados das chaves."""
+        stamp = time.time_ns()
+        for key in filter(None, keys):
+            self._touch(key, stamp)
+
+    def version(self, key: str) -> int:
+        try:
+            return os.stat(self._marker(key)).st_mtime_ns
+        except FileNotFoundError:
+            pass
+        try:
+            return os.stat(self._marker(_EPOCH)).st_mtime_ns
+        except FileNotFoundError:
+            self._touch(_EPOCH, time.time_ns())
+            return os.stat(self._marker(_EPOCH)).st_mtime_ns
+
+
+table_versions = VersionCounters()
+
+
+def product_key(product_id: int) -> str:
+    return f"products:{product_id}"
+
+
+def etag_for(*keys: str, request: Request) -> Optional[str]:
+    """
+    ETag fraco das versões das chaves + query string da requisição.
+
+    Com réplica de leitura, uma versão mais nova que DB_READ_YOUR_WRITES_SECONDS
+    pode não ter chegado à réplica: sem ETag nesse intervalo, para não associar
+    a versão nova a dados antigos.
+    """
+    versions = [table_versions.version(key) for key in keys]
+    if database.async_replica_engine is not database.async_engine:
+        lag_ns = settings.DB_READ_YOUR_WRITES_SECONDS * 1_000_000_000
+        if time.time_ns() - max(versions) < lag_ns:
+            return None
+    digest = hashlib.sha1(f"{request.url.path}?{request.url.query}|{versions}".encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """Resposta 304 se If-None-Match casar com o ETag (comparação fraca); senão None."""
+    if etag is None:
+        return None
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in candidates or etag.removeprefix("W/") in candidates:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
@@ -0,0 +1,112 @@
+"""
+Cache em disco para resultados de renderização (documentos de romaneio, códigos
+de barras), compartilhado pelos workers do mesmo host.
+
+Um arquivo por chave em <RENDER_CACHE_DIR>/<namespace>/<aa>/<sha256 da chave>,
+gravado de forma atômica como no blob_store: outro worker nunca lê um arquivo
+pela metade. Só serve para conteúdo que não muda depois de gerado; quem muda de
+layout muda a chave (versão no nome), não invalida.
+
+Cada leitura atualiza o mtime; a cada _PRUNE_EVERY gravações (ou max_bytes/10
+gravados) o processo apaga os arquivos menos usados que passarem de max_files
+ou de max_bytes no total.
+
+Gravar é best-effort: um erro de disco (ex.: ENOSPC) é registrado no log e o
+conteúdo, que já foi renderizado, é entregue mesmo assim. RENDER_CACHE_DIR deve
+ficar num volume, não no /tmp em tmpfs do container.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Optional
+
+from backend.config.logger import get_dynamic_logger
+from backend.core.shared_cache import CACHE_INVALIDATION_DIR
+
+logger = get_dynamic_logger("file_cache")
+
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR") or os.path.join(CACHE_INVALIDATION_DIR, "render")
+_PRUNE_EVERY = 200
+
+
+class FileCache:
+    def __init__(self, namespace: str, max_files: int, max_bytes: int = 0, directory: str = None):
+        """max_bytes=0: sem limite de tamanho, só de arquivos."""
+        self.directory = directory or os.path.join(RENDER_CACHE_DIR, namespace)
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._written_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            logger.error(f"Cache em disco {self.directory}: não gravou {len(content)} bytes: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            self._written_bytes += len(content)
+            prune = self._writes % _PRUNE_EVERY == 0 or (self.max_bytes and self._written_bytes >= self.max_bytes // 10)
+            if prune:
+                self._written_bytes = 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Remove os arquivos menos usados acima de max_files/max_bytes; retorna quantos removeu."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        entries.sort()
+        count = len(entries)
+        removed = 0
+        for _, size, path in entries:
+            if count - removed <= self.max_files and (not self.max_bytes or total <= self.max_bytes):
+                break
+            try:
+                os.remove(path)
+                removed += 1
+                total -= size
+            except FileNotFoundError:
+                pass
+        return removed
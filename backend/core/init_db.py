@@ -9,7 +9,11 @@ logger = get_dynamic_logger("init_db")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def init_db(db: Session = next(database.get_db())):
+def init_db(db: Session = None):
+    if db is None:
+        with database.SessionLocal() as session:
+            return init_db(session)
+
     admin_email = os.getenv("PGADMIN_DEFAULT_EMAIL")
     admin_password = os.getenv("PGADMIN_DEFAULT_PASSWORD")
 
@@ -0,0 +1,227 @@
+"""
+Etiquetas de gôndola (EAN-13, Code128 ou QR) para POST /products/labels, numa
+folha só em PDF ou ZPL.
+
+- PDF: folhas A4 de 21 etiquetas de 63,5 x 38,1 mm (3 x 7) a 300 dpi, em preto
+  e branco. Cada página é desenhada num processo de core.render_pool
+  (render_label_page) e o worker só junta as páginas já comprimidas
+  (build_label_pdf).
+- ZPL: uma etiqueta por produto para impressoras Zebra de 203 dpi. O código é
+  desenhado pela própria impressora (^BE, ^BC, ^BQ): não passa pelo pool.
+
+Cada código desenhado fica em cache pelo conteúdo (simbologia, valor e
+BARCODE_VERSION): em memória no processo e em disco (FileCache "barcodes" em
+RENDER_CACHE_DIR, o volume persistente), compartilhado pelos processos do pool e
+pelos workers. Reimprimir uma folha só cola imagens prontas; se o disco não
+aceitar a gravação, o código desenhado é usado mesmo assim.
+"""
+import io
+import os
+from functools import lru_cache
+
+import barcode
+import qrcode
+from barcode.errors import BarcodeError
+from PIL import Image, ImageDraw
+
+from backend.core import raster
+from backend.core.file_cache import FileCache
+
+# Muda quando o desenho dos códigos muda: faz parte da chave do cache
+BARCODE_VERSION = 1
+
+SYMBOLOGIES = {"ean13": "EAN-13", "code128": "Code128", "qr": "QR Code"}
+FORMATS = {"pdf": "application/pdf", "zpl": "application/zpl"}
+
+LABELS_PER_PAGE = 21
+
+_DPI = 300
+_PAGE_WIDTH, _PAGE_HEIGHT = 2480, 3508  # A4 a 300 dpi
+_COLUMNS = 3
+_LABEL_WIDTH, _LABEL_HEIGHT = 750, 450  # 63,5 x 38,1 mm
+_LEFT = (_PAGE_WIDTH - _COLUMNS * _LABEL_WIDTH) // 2
+_TOP = (_PAGE_HEIGHT - LABELS_PER_PAGE // _COLUMNS * _LABEL_HEIGHT) // 2
+_PADDING = 30
+
+# Códigos lineares: módulo de 4 px (0,34 mm, o EAN-13 a 100%) até 2 px, com a
+# zona de silêncio de 10 módulos de cada lado dentro da etiqueta
+_MAX_MODULE, _MIN_MODULE, _QUIET_MODULES = 4, 2, 10
+_BAR_HEIGHT = 190
+_QR_MAX_SIZE = 330
+# Zona de silêncio de 4 módulos do maior módulo possível (QR versão 1, 21 x 21)
+_QR_QUIET = 4 * (_QR_MAX_SIZE // 21)
+
+# ZPL: mesma etiqueta a 203 dpi (8 pontos/mm)
+_ZPL_WIDTH, _ZPL_HEIGHT = 508, 305
+
+_cache = FileCache(
+    "barcodes",
+    max_files=int(os.getenv("BARCODE_CACHE_MAX_FILES", "20000")),
+    max_bytes=int(os.getenv("BARCODE_CACHE_MAX_MB", "64")) * 1024 * 1024,
+)
+
+
+def label_value(symbology: str, barcode_value: str = None, sku: str = None) -> str:
+    """
+    Conteúdo do código na etiqueta do produto: o código de barras (EAN-13 exige
+    um GTIN válido) ou, em Code128/QR, o SKU quando não há código de barras.
+    Levanta ValueError quando o produto não pode ter essa etiqueta.
+    """
+    if symbology == "ean13":
+        digits = (barcode_value or "").strip()
+        if not digits.isdigit() or len(digits) not in (12, 13):
+            raise ValueError("EAN-13 precisa de 12 ou 13 dígitos")
+        full = barcode.get_barcode_class("ean13")(digits).get_fullcode()
+        # O python-barcode troca um dígito verificador errado pelo certo: a etiqueta sairia com outro código
+        if len(digits) == 13 and full != digits:
+            raise ValueError("dígito verificador inválido")
+        return full
+    value = (barcode_value or sku or "").strip()
+    if not value:
+        raise ValueError("produto sem código de barras nem SKU")
+    if symbology == "code128":
+        try:
+            modules = len(_pattern("code128", value))
+        except BarcodeError as e:
+            raise ValueError(str(e)) from e
+        if _module_width(modules) < _MIN_MODULE:
+            raise ValueError("código longo demais para a etiqueta")
+    return value
+
+
+def _pattern(symbology: str, value: str) -> str:
+    """Barras ("1") e espaços ("0"), um caractere por módulo."""
+    return barcode.get_barcode_class(symbology)(value).build()[0]
+
+
+def _module_width(modules: int) -> int:
+    return min(_MAX_MODULE, (_LABEL_WIDTH - 2 * _PADDING) // (modules + 2 * _QUIET_MODULES))
+
+
+def _draw_linear(symbology: str, value: str) -> Image.Image:
+    pattern = _pattern(symbology, value)
+    module = _module_width(len(pattern))
+    text_font = raster.font(30)
+    image = Image.new("L", (len(pattern) * module, _BAR_HEIGHT + 44), 255)
+    draw = ImageDraw.Draw(image)
+    start = None
+    for index, bit in enumerate(pattern + "0"):
+        if bit == "1" and start is None:
+            start = index
+        elif bit == "0" and start is not None:
+            draw.rectangle((start * module, 0, index * module - 1, _BAR_HEIGHT - 1), fill=0)
+            start = None
+    text = text_font.fit(raster.printable(value), image.width)
+    text_font.draw(image, (image.width - text_font.width(text)) / 2, _BAR_HEIGHT + 8, text, 0)
+    return image
+
+
+def _draw_qr(value: str) -> Image.Image:
+    code = qrcode.QRCode(border=0, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    code.add_data(value)
+    code.make(fit=True)
+    matrix = code.get_matrix()
+    box = max(1, _QR_MAX_SIZE // len(matrix))
+    image = Image.new("L", (len(matrix) * box, len(matrix) * box), 255)
+    draw = ImageDraw.Draw(image)
+    for y, row in enumerate(matrix):
+        for x, dark in enumerate(row):
+            if dark:
+                draw.rectangle((x * box, y * box, (x + 1) * box - 1, (y + 1) * box - 1), fill=0)
+    return image
+
+
+@lru_cache(maxsize=4096)
+def barcode_image(symbology: str, value: str) -> Image.Image:
+    """Código desenhado (com os dígitos legíveis, nos lineares); vem do cache quando já existe."""
+    key = f"v{BARCODE_VERSION}:{symbology}:{value}"
+    cached = _cache.get(key)
+    if cached is not None:
+        image = Image.open(io.BytesIO(cached))
+        image.load()
+        return image
+    image = _draw_qr(value) if symbology == "qr" else _draw_linear(symbology, value)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    _cache.put(key, buffer.getvalue())
+    return image
+
+
+def _draw_label(page: Image.Image, x: int, y: int, label: dict, symbology: str) -> None:
+    code = barcode_image(symbology, label["value"])
+    price = raster.brl(label["price"]) if label.get("price") else None
+    if symbology == "qr":
+        page.paste(code, (x + _QR_QUIET, y + (_LABEL_HEIGHT - code.height) // 2))
+        text_x = x + _QR_QUIET + code.width + _PADDING
+        width = x + _LABEL_WIDTH - _PADDING - text_x
+        name_font = raster.font(28, bold=True)
+        text_y = y + _PADDING
+        for line in name_font.lines(raster.printable(label["name"]), width, 4):
+            name_font.draw(page, text_x, text_y, line, 0)
+            text_y += 36
+        if price:
+            raster.font(40, bold=True).draw(page, text_x, text_y + 14, price, 0)
+        value_font = raster.font(22)
+        value_font.draw(page, text_x, y + _LABEL_HEIGHT - _PADDING - 26, value_font.fit(raster.printable(label["value"]), width), 0)
+        return
+
+    name_font = raster.font(30, bold=True)
+    text_y = y + _PADDING - 8
+    for line in name_font.lines(raster.printable(label["name"]), _LABEL_WIDTH - 2 * _PADDING, 2):
+        name_font.draw(page, x + _PADDING, text_y, line, 0)
+        text_y += 36
+    if price:
+        price_font = raster.font(40, bold=True)
+        price_font.draw(page, x + _LABEL_WIDTH - _PADDING - price_font.width(price), y + _PADDING + 66, price, 0)
+    page.paste(code, (x + (_LABEL_WIDTH - code.width) // 2, y + _LABEL_HEIGHT - _PADDING - code.height + 10))
+
+
+def render_label_page(labels: list, symbology: str) -> dict:
+    """
+    Uma página de até LABELS_PER_PAGE etiquetas ({"name", "price", "value"}), na
+    ordem de leitura. Roda no pool; devolve a página de raster.encode_page.
+    """
+    page = Image.new("L", (_PAGE_WIDTH, _PAGE_HEIGHT), 255)
+    for index, label in enumerate(labels):
+        row, column = divmod(index, _COLUMNS)
+        _draw_label(page, _LEFT + column * _LABEL_WIDTH, _TOP + row * _LABEL_HEIGHT, label, symbology)
+    return raster.encode_page(page.convert("1", dither=Image.Dither.NONE))
+
+
+def build_label_pdf(pages: list) -> bytes:
+    return raster.build_pdf(pages, _DPI, "Etiquetas")
+
+
+def _zpl_text(value) -> str:
+    # Campos com ^FH: os caracteres de comando vão em hexadecimal (_5E = "^")
+    text = " ".join(str(value).split())
+    return "".join(f"_{ord(char):02X}" if char in "^~_\\" else char for char in text)
+
+
+def render_zpl(labels: list, symbology: str, copies: int = 1) -> bytes:
+    """Um bloco ^XA...^XZ por etiqueta; as cópias saem pela impressora (^PQ)."""
+    blocks = []
+    for label in labels:
+        value = label["value"]
+        text_x = 260 if symbology == "qr" else 24
+        text_width = _ZPL_WIDTH - text_x - 24
+        lines = [
+            "^XA", "^CI28", f"^PW{_ZPL_WIDTH}", f"^LL{_ZPL_HEIGHT}",
+            f"^FO{text_x},20^A0N,26,26^FB{text_width},{4 if symbology == 'qr' else 2},2,L^FH^FD{_zpl_text(label['name'])}^FS",
+        ]
+        if label.get("price"):
+            price_y = 150 if symbology == "qr" else 80
+            lines.append(f"^FO{text_x},{price_y}^A0N,36,36^FH^FD{_zpl_text(raster.brl(label['price']))}^FS")
+        if symbology == "ean13":
+            # A impressora calcula o dígito verificador a partir dos 12 primeiros
+            lines.append(f"^FO140,130^BY2^BEN,120,Y,N^FD{value[:12]}^FS")
+        elif symbology == "code128":
+            module = 2 if len(_pattern("code128", value)) * 2 <= _ZPL_WIDTH - 48 else 1
+            lines.append(f"^FO24,130^BY{module}^BCN,120,Y,N,N,A^FH^FD{_zpl_text(value)}^FS")
+        else:
+            lines.append(f"^FO24,40^BQN,2,{6 if len(value) <= 30 else 4}^FH^FDMA,{_zpl_text(value)}^FS")
+        if copies > 1:
+            lines.append(f"^PQ{copies}")
+        lines.append("^XZ")
+        blocks.append("\n".join(lines))
+    return ("\n".join(blocks) + "\n").encode()
@@ -1,4 +1,61 @@
+"""
+Rate limit (slowapi) com contadores de janela deslizante num storage
+compartilhado pelos workers (ver core.rate_limit_storage e
+settings.RATE_LIMIT_STORAGE_URI): o limite configurado vale para o conjunto,
+não para cada processo.
+
+- limites das rotas (@limiter.limit): por API key quando a requisição foi
+  autenticada por uma, senão por IP
+- limite do plano (api_rate_limit em PLANS_CONFIG): por API key, aplicado em
+  get_async_current_user_flexible (produtos, estoque, clientes, categorias,
+  exportações) via enforce_api_key_limit. Requisições com JWT (o app) não
+  contam no limite do plano.
+
+Em rotas async o slowapi consulta o storage de forma síncrona, no event loop:
+ver em core.rate_limit_storage o custo de cada checagem.
+"""
+import os
+
+from limits import parse
 from slowapi import Limiter
+from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
+from slowapi.wrappers import Limit
+
+from backend.core import rate_limit_storage  # noqa: F401  registra o esquema sqlite:// no limits
+from backend.core.config import settings
+from backend.core.plans_config import PLANS_CONFIG
+from backend.core.shared_cache import CACHE_INVALIDATION_DIR
+
+
+def _storage_uri() -> str:
+    if settings.RATE_LIMIT_STORAGE_URI:
+        return settings.RATE_LIMIT_STORAGE_URI
+    if os.getenv("TESTING") == "1":
+        return "memory://"
+    return "sqlite:///" + os.path.join(CACHE_INVALIDATION_DIR, "rate_limits.sqlite")
+
+
+def rate_limit_key(request) -> str:
+    api_key_id = getattr(request.state, "api_key_id", None)
+    if api_key_id is not None:
+        return f"apikey:{api_key_id}"
+    return get_remote_address(request)
+
+
+limiter = Limiter(key_func=rate_limit_key, strategy="sliding-window-counter", storage_uri=_storage_uri())
+
+_plan_limits = {plan: parse(config["api_rate_limit"]) for plan, config in PLANS_CONFIG.items()}
+
 
-limiter = Limiter(key_func=get_remote_address)
+def enforce_api_key_limit(request, api_key_id: int, plan_id: str) -> None:
+    """Conta a requisição no limite do plano para esta API key; levanta RateLimitExceeded (429) ao estourar."""
+    request.state.api_key_id = api_key_id
+    if not limiter.enabled:
+        return
+    item = _plan_limits.get(plan_id) or _plan_limits["trial"]
+    key = f"apikey:{api_key_id}"
+    # O handler de 429 do slowapi lê view_rate_limit para os headers
+    request.state.view_rate_limit = (item, [key, "plan"])
+    if not limiter.limiter.hit(item, key, "plan"):
+        raise RateLimitExceeded(Limit(item, rate_limit_key, "plan", False, None, None, None, 1, False))
@@ -0,0 +1,158 @@
+"""
+Métricas no formato Prometheus, expostas em GET /metrics.
+
+Com vários workers do uvicorn, defina PROMETHEUS_MULTIPROC_DIR (diretório
+gravável, limpo a cada deploy pelo backend.prestart): cada processo grava seus
+valores em arquivos mmap e a coleta soma todos. Sem a variável, as métricas são
+só do processo atual (desenvolvimento e testes).
+
+No caminho da requisição, MetricsMiddleware faz um punhado de incrementos em
+memória (alguns microssegundos); nada é formatado até a coleta.
+
+- http_requests_total{method, route, status}: status é a classe (2xx, 4xx...)
+- http_request_duration_seconds{method, route}: histograma de latência
+- http_request_db_seconds{route}: tempo gasto no banco por requisição
+- rate_limit_rejections_total{route}: respostas 429 do slowapi
+- threadpool_in_use / threadpool_capacity: threads do anyio ocupadas (rotas def)
+"""
+import asyncio
+import os
+import time
+from contextvars import ContextVar
+
+from anyio import to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR") or os.getenv("prometheus_multiproc_dir")
+
+_STATUS_CLASSES = {1: "1xx", 2: "2xx", 3: "3xx", 4: "4xx", 5: "5xx"}
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter("http_requests_total", "Requisições HTTP", ["method", "route", "status"])
+LATENCY = Histogram("http_request_duration_seconds", "Latência das requisições HTTP", ["method", "route"], buckets=_LATENCY_BUCKETS)
+DB_TIME = Histogram("http_request_db_seconds", "Tempo de banco por requisição HTTP", ["route"], buckets=_LATENCY_BUCKETS)
+RATE_LIMITED = Counter("rate_limit_rejections_total", "Requisições recusadas pelo rate limit", ["route"])
+THREADPOOL_IN_USE = Gauge("threadpool_in_use", "Threads do threadpool do anyio ocupadas", multiprocess_mode="livesum")
+THREADPOOL_CAPACITY = Gauge("threadpool_capacity", "Tamanho do threadpool do anyio", multiprocess_mode="livesum")
+
+# Segundos de banco acumulados na requisição atual. A lista é mutável de propósito:
+# rotas def rodam no threadpool com uma cópia do contexto, que aponta para a mesma lista.
+_db_seconds: ContextVar = ContextVar("db_seconds", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    accumulator = _db_seconds.get()
+    if accumulator is not None:
+        accumulator[0] += elapsed
+
+
+# Filhos já rotulados: .labels() custa mais que o próprio incremento
+_children = {}
+_threadpool_seen = [None, None]
+_threadpool_limiter = [None, None]  # (loop, CapacityLimiter)
+
+
+def _child(metric, *labels):
+    key = (metric, labels)
+    child = _children.get(key)
+    if child is None:
+        child = _children[key] = metric.labels(*labels)
+    return child
+
+
+def _update_threadpool_gauges() -> None:
+    # O limiter do anyio é um por event loop; buscá-lo a cada requisição custa mais que o resto
+    loop = asyncio.get_running_loop()
+    if _threadpool_limiter[0] is not loop:
+        _threadpool_limiter[:] = [loop, to_thread.current_default_thread_limiter()]
+    limiter = _threadpool_limiter[1]
+    in_use, capacity = limiter.borrowed_tokens, limiter.total_tokens
+    # Só grava quando muda: em modo multiprocesso cada set() escreve no arquivo mmap
+    if in_use != _threadpool_seen[0]:
+        THREADPOOL_IN_USE.set(in_use)
+        _threadpool_seen[0] = in_use
+    if capacity != _threadpool_seen[1]:
+        THREADPOOL_CAPACITY.set(capacity)
+        _threadpool_seen[1] = capacity
+
+
+def route_label(scope) -> str:
+    """Template da rota ("/products/{product_id}"), nunca o path cru: cardinalidade limitada."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "other"
+
+
+def record_rate_limited(scope) -> None:
+    _child(RATE_LIMITED, route_label(scope)).inc()
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        _update_threadpool_gauges()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        db_seconds = [0.0]
+        token = _db_seconds.set(db_seconds)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _db_seconds.reset(token)
+            route = route_label(scope)
+            method = scope["method"]
+            _child(REQUESTS, method, route, _STATUS_CLASSES.get(status[0] // 100, "5xx")).inc()
+            _child(LATENCY, method, route).observe(elapsed)
+            _child(DB_TIME, route).observe(db_seconds[0])
+
+
+def render_latest():
+    """(corpo, content-type) com as métricas de todos os workers."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def clear_multiproc_dir() -> None:
+    """Remove os arquivos da execução anterior (backend.prestart, antes dos workers subirem)."""
+    if not MULTIPROC_DIR:
+        return
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    for name in os.listdir(MULTIPROC_DIR):
+        if name.endswith(".db"):
+            os.remove(os.path.join(MULTIPROC_DIR, name))
+
+
+def mark_process_dead() -> None:
+    """Gauges livesum deixam de contar este worker (chamado no shutdown)."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,289 @@
+"""
+Middlewares ASGI puros (sem BaseHTTPMiddleware, que cria uma task e um
+memory stream extras por requisição e bufferiza a resposta).
+"""
+import json
+import time
+import zlib
+from functools import partial
+
+import anyio
+import anyio.lowlevel
+import anyio.to_thread
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+# Tipos já comprimidos; PDFs (documentos de romaneio, etiquetas) já saem com as páginas comprimidas
+_EXCLUDED_CONTENT_TYPES = frozenset({
+    "application/gzip", "application/x-gzip", "application/zip", "application/pdf",
+    "application/grpc", "text/event-stream", "audio/*", "video/*", "font/woff", "font/woff2",
+    "image/avif", "image/gif", "image/jpeg", "image/png", "image/webp",
+})
+_compression_limiter = anyio.lowlevel.RunVar("_compression_limiter")
+
+_TOO_LARGE_DETAIL = "Payload excede o limite máximo permitido."
+_TOO_LARGE = 413
+
+
+class MaxBodySizeMiddleware:
+    """
+    Limita o corpo da requisição a max_size bytes.
+
+    Recusa na hora quando o content-length declarado já passa do limite e, para
+    corpos chunked (ou content-length mentiroso), conta os bytes à medida que
+    chegam: ao passar do limite, a leitura do corpo levanta 413 antes de o resto
+    ser recebido, sem nada ir para a memória além do que já foi lido.
+    """
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > self.max_size:
+                    await self._reject(send)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise HTTPException(status_code=_TOO_LARGE, detail=_TOO_LARGE_DETAIL)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as exc:
+            # Corpo lido fora de uma rota (ex.: outro middleware): a rota teria virado 413 sozinha
+            if exc.status_code != _TOO_LARGE or response_started:
+                raise
+            await self._reject(send)
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": _TOO_LARGE_DETAIL}, ensure_ascii=False).encode()
+        await send({
+            "type": "http.response.start",
+            "status": _TOO_LARGE,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class RequestLogMiddleware:
+    """Uma linha de log por requisição: método, path, status e duração."""
+    def __init__(self, app, logger):
+        self.app = app
+        self.logger = logger
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            process_time = time.perf_counter() - start_time
+            method, path = scope["method"], scope["path"]
+            self.logger.info(
+                f"{method} {path} - Status: {status_code} - Time: {process_time:.4f}s",
+                extra={"method": method, "path": path, "status": status_code, "duration_ms": round(process_time * 1000, 2)},
+            )
+
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        if more_body:
+            # flush a cada pedaço: o cliente recebe o stream aos poucos
+            return self._compressor.compress(body) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return self._compressor.compress(body) + self._compressor.flush()
+
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality, mode=brotli.MODE_TEXT)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        if more_body:
+            return self._compressor.process(body) + self._compressor.flush()
+        return self._compressor.process(body) + self._compressor.finish()
+
+
+def _thread_limiter() -> anyio.CapacityLimiter:
+    """Threads de compressão separadas das do threadpool das rotas síncronas."""
+    try:
+        return _compression_limiter.get()
+    except LookupError:
+        limiter = anyio.CapacityLimiter(40)
+        _compression_limiter.set(limiter)
+        return limiter
+
+
+class _CompressionResponder:
+    """
+    Uma resposta. new_encoder=None quando o cliente não aceita br nem gzip: o
+    corpo passa intacto, mas a resposta leva Vary: Accept-Encoding como as
+    comprimidas, para um cache intermediário não entregá-la a quem aceita.
+    """
+    def __init__(self, app, new_encoder, minimum_size: int, thread_minimum_size: int):
+        self.app = app
+        self.new_encoder = new_encoder
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+        self.send = None
+        self.pending_start = None
+        self.passthrough = False
+        self.encoder = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] == 206
+                or media_type in _EXCLUDED_CONTENT_TYPES
+                or media_type.partition("/")[0] + "/*" in _EXCLUDED_CONTENT_TYPES
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                # Os headers dependem do primeiro pedaço do corpo
+                self.pending_start = message
+            return
+
+        if self.pending_start is None:
+            if self.encoder is not None and message_type == "http.response.body":
+                message["body"] = await self._compress(message.get("body", b""), message.get("more_body", False))
+            await self.send(message)
+            return
+
+        start, self.pending_start = self.pending_start, None
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if message_type == "http.response.body" and (more_body or len(body) >= self.minimum_size):
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if self.new_encoder is not None:
+                self.encoder = self.new_encoder()
+                message["body"] = await self._compress(body, more_body)
+                headers["Content-Encoding"] = self.encoder.name
+                if more_body or start.get("trailers", False):
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(message["body"]))
+        await self.send(start)
+        await self.send(message)
+
+    async def _compress(self, body: bytes, more_body: bool) -> bytes:
+        if len(body) >= self.thread_minimum_size:
+            # Comprimir pedaços grandes no event loop seguraria as outras requisições
+            return await anyio.to_thread.run_sync(self.encoder.compress, body, more_body, limiter=_thread_limiter())
+        return self.encoder.compress(body, more_body)
+
+
+def _accepted_encodings(accept_encoding: str) -> dict:
+    """{"gzip": 1.0, "br": 0.8, ...} a partir do header Accept-Encoding."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip()] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compressão negociada (br se o cliente aceitar e o pacote brotli existir,
+    senão gzip), em streaming: cada pedaço de uma StreamingResponse é
+    comprimido e enviado sem bufferizar a resposta inteira. Pedaços a partir de
+    thread_minimum_size são comprimidos numa thread.
+
+    Respostas menores que minimum_size, já com Content-Encoding, de tipos já
+    comprimidos (imagens, zip, PDF...) ou sob exclude_paths (ex.: /uploads)
+    passam intactas. As demais levam Vary: Accept-Encoding, comprimidas ou não.
+    """
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 thread_minimum_size: int = 128 * 1024, exclude_paths=()):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.thread_minimum_size = thread_minimum_size
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        accepted = _accepted_encodings(accept_encoding) if accept_encoding else {}
+
+        if brotli is not None and accepted.get("br", 0) > 0 and accepted.get("br", 0) >= accepted.get("gzip", 0):
+            new_encoder = partial(_BrotliEncoder, self.brotli_quality)
+        elif accepted.get("gzip", 0) > 0:
+            new_encoder = partial(_GzipEncoder, self.gzip_level)
+        else:
+            new_encoder = None
+        responder = _CompressionResponder(self.app, new_encoder, self.minimum_size, self.thread_minimum_size)
+        await responder(scope, receive, send)
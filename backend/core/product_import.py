@@ -0,0 +1,329 @@
+"""
+Importação de produtos a partir de CSV ou XLSX, como job em segundo plano.
+
+POST /products/import grava o arquivo enviado num temporário, cria o
+ImportJob e agenda run_product_import; o progresso fica na tabela import_jobs
+(GET /products/import/{id}), visível a partir de qualquer worker.
+
+O arquivo é lido em streaming (csv.reader / openpyxl em modo read_only) e
+processado em lotes de IMPORT_CHUNK_SIZE linhas:
+- leitura e validação (ProductBase) numa thread, fora do event loop
+- barcodes e SKUs do lote checados de uma vez contra os índices únicos, mais
+  as repetições dentro do próprio lote
+- produtos e movimentações "Estoque Inicial" gravados num único commit por lote
+  (crud.products.bulk_create_products)
+
+Linhas inválidas ou duplicadas não interrompem a importação: viram erros no job
+(os primeiros MAX_STORED_ERRORS ficam registrados, todos são contados). Ao
+atingir o limite de produtos do plano, a importação para.
+"""
+import codecs
+import csv
+import os
+import tempfile
+from itertools import islice
+
+from anyio import to_thread
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config.logger import get_dynamic_logger
+from backend.core.database import run_sync
+from backend.core.search import normalize_search_text
+from backend.crud import categories as categories_crud
+from backend.crud import import_jobs as jobs_crud
+from backend.crud import products as products_crud
+from backend.schemas.products import ProductBase
+
+try:
+    import openpyxl
+except ImportError:  # openpyxl é opcional: sem ele, só CSV
+    openpyxl = None
+
+logger = get_dynamic_logger("product_import")
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+MAX_STORED_ERRORS = 100
+_SNIFF_BYTES = 64 * 1024
+_COPY_BYTES = 1024 * 1024
+
+# Cabeçalhos aceitos (normalizados: sem acentos, minúsculas, "_" no lugar de espaços)
+_COLUMN_ALIASES = {
+    "name": "name", "nome": "name", "produto": "name",
+    "sku": "sku", "codigo": "sku", "codigo_interno": "sku",
+    "barcode": "barcode", "codigo_de_barras": "barcode", "codigo_barras": "barcode", "ean": "barcode", "gtin": "barcode",
+    "description": "description", "descricao": "description",
+    "price": "price", "preco": "price", "preco_venda": "price", "valor": "price",
+    "cost_price": "cost_price", "preco_custo": "cost_price", "custo": "cost_price",
+    "stock_quantity": "stock_quantity", "estoque": "stock_quantity", "quantidade": "stock_quantity", "estoque_inicial": "stock_quantity",
+    "min_stock": "min_stock", "estoque_minimo": "min_stock",
+    "unit": "unit", "unidade": "unit",
+    "category_id": "category_id", "categoria_id": "category_id",
+    "category": "category", "categoria": "category",
+    "is_active": "is_active", "ativo": "is_active",
+}
+_NUMBER_FIELDS = {"price", "cost_price", "stock_quantity", "min_stock"}
+_CODE_FIELDS = {"sku", "barcode"}
+_BOOLEANS = {"sim": True, "s": True, "nao": False, "n": False}
+
+
+class ImportFileError(ValueError):
+    """Arquivo ilegível ou sem as colunas obrigatórias: o job inteiro falha."""
+
+
+def detect_format(filename: str = None, content_type: str = None):
+    name = (filename or "").lower()
+    if name.endswith(".xlsx") or content_type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
+        return "xlsx"
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return "csv"
+    return None
+
+
+def xlsx_supported() -> bool:
+    return openpyxl is not None
+
+
+async def save_upload(upload, suffix: str) -> str:
+    """Copia o upload para um temporário próprio: o do Starlette é fechado ao fim da requisição."""
+    fd, path = tempfile.mkstemp(prefix="romaneio_import_", suffix=f".{suffix}")
+    with os.fdopen(fd, "wb") as out:
+        while chunk := await upload.read(_COPY_BYTES):
+            out.write(chunk)
+    return path
+
+
+def _csv_encoding(path: str) -> str:
+    """utf-8 (com ou sem BOM) se o arquivo inteiro decodificar; senão cp1252 (CSV do Excel em português)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(path, "rb") as f:
+            while block := f.read(_COPY_BYTES):
+                decoder.decode(block)
+            decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8-sig"
+
+
+def count_rows(path: str, fmt: str):
+    """Estimativa do total de linhas de dados (sem ler o conteúdo das células)."""
+    if fmt == "xlsx":
+        try:
+            workbook = openpyxl.load_workbook(path, read_only=True)
+            rows = workbook.active.max_row
+            workbook.close()
+        except Exception:
+            return None
+        return max(rows - 1, 0) if rows else None
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        while block := f.read(_COPY_BYTES):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def _iter_csv(path: str):
+    encoding = _csv_encoding(path)
+    with open(path, newline="", encoding=encoding) as f:
+        sample = f.read(_SNIFF_BYTES)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(f, dialect)
+
+
+def _iter_xlsx(path: str):
+    try:
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f"Planilha XLSX inválida: {e}")
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_rows(path: str, fmt: str):
+    return _iter_xlsx(path) if fmt == "xlsx" else _iter_csv(path)
+
+
+def _header_fields(header) -> list:
+    fields = [_COLUMN_ALIASES.get(normalize_search_text(cell).replace(" ", "_")) if cell is not None else None for cell in header]
+    if "name" not in fields:
+        raise ImportFileError("Coluna obrigatória ausente: name (ou nome)")
+    return fields
+
+
+def _number(value):
+    if isinstance(value, str):
+        value = value.replace("R$", "").replace(" ", "")
+        if "," in value:
+            # 1.234,56 (formato brasileiro) ou 10,5
+            value = value.replace(".", "").replace(",", ".")
+    return value
+
+
+def _code(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _row_data(fields: list, row, categories: dict) -> dict:
+    data = {}
+    for field, value in zip(fields, row):
+        if field is None or value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        if field in _NUMBER_FIELDS:
+            value = _number(value)
+        elif field in _CODE_FIELDS:
+            value = _code(value)
+        elif field == "is_active" and isinstance(value, str):
+            value = _BOOLEANS.get(normalize_search_text(value), value)
+        elif field == "category":
+            category_id = categories.get(normalize_search_text(value))
+            if category_id is None:
+                raise ValueError(f"Categoria não encontrada: {value}")
+            data["category_id"] = category_id
+            continue
+        data[field] = value
+    return data
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+
+def validated_chunks(rows, categories: dict, chunk_size: int = IMPORT_CHUNK_SIZE):
+    """
+    Gera (válidas, erros, linhas lidas) por lote; válidas = [(linha, dict)],
+    erros = [(linha, mensagem)]. Linhas totalmente vazias são ignoradas.
+    categories: {nome normalizado: id} (crud.categories.get_category_ids_by_name).
+    """
+    category_ids = set(categories.values())
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ImportFileError("Arquivo vazio")
+    fields = _header_fields(header)
+    line = 1
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        valid, errors = [], []
+        for row in chunk:
+            line += 1
+            if not any(cell not in (None, "") for cell in row):
+                continue
+            try:
+                product = ProductBase.model_validate(_row_data(fields, row, categories))
+                if product.category_id is not None and product.category_id not in category_ids:
+                    raise ValueError(f"Categoria não encontrada: {product.category_id}")
+                valid.append((line, product.model_dump()))
+            except ValidationError as e:
+                errors.append((line, _validation_message(e)))
+            except ValueError as e:
+                errors.append((line, str(e)))
+        yield valid, errors, len(chunk)
+
+
+def _split_duplicates(valid: list, existing_barcodes: set, existing_skus: set):
+    """Separa as linhas cujo barcode/SKU já existe no banco ou se repete no lote."""
+    accepted, errors = [], []
+    barcodes, skus = set(existing_barcodes), set(existing_skus)
+    for line, data in valid:
+        barcode, sku = data.get("barcode"), data.get("sku")
+        if barcode and barcode in barcodes:
+            errors.append((line, f"Código de barras já cadastrado: {barcode}"))
+        elif sku and sku in skus:
+            errors.append((line, f"SKU já cadastrado: {sku}"))
+        else:
+            accepted.append((line, data))
+            if barcode:
+                barcodes.add(barcode)
+            if sku:
+                skus.add(sku)
+    return accepted, errors
+
+
+async def _insert_chunk(db: AsyncSession, valid: list, limit: int):
+    """
+    Grava o lote, sem duplicatas e com no máximo `limit` produtos (o que resta
+    do plano); as linhas além do limite voltam em `over`. Se outra requisição
+    cadastrou um dos códigos no meio tempo, checa de novo e tenta mais uma vez.
+    """
+    if not valid:
+        return 0, [], []
+    for attempt in range(2):
+        barcodes = {data["barcode"] for _, data in valid if data.get("barcode")}
+        skus = {data["sku"] for _, data in valid if data.get("sku")}
+        existing_barcodes, existing_skus = await run_sync(db, products_crud.get_existing_codes, barcodes, skus)
+        accepted, errors = _split_duplicates(valid, existing_barcodes, existing_skus)
+        # Duplicatas não ocupam espaço do plano: o corte vem depois de descartá-las
+        accepted, over = accepted[:max(limit, 0)], accepted[max(limit, 0):]
+        try:
+            created = await run_sync(db, products_crud.bulk_create_products, [data for _, data in accepted])
+            return created, errors, over
+        except IntegrityError:
+            if attempt:
+                return 0, errors + [(line, "Conflito ao gravar: código de barras ou SKU duplicado") for line, _ in accepted], over
+
+
+async def run_product_import(job_id: str, path: str, fmt: str, bind, remaining: int):
+    """Executa o job (agendado com BackgroundTasks); sempre termina com status completed ou failed."""
+    progress = {"processed_rows": 0, "created_count": 0, "error_count": 0, "errors": []}
+
+    def record_errors(errors):
+        progress["error_count"] += len(errors)
+        room = MAX_STORED_ERRORS - len(progress["errors"])
+        progress["errors"] = progress["errors"] + [{"line": line, "error": error} for line, error in errors[:max(room, 0)]]
+
+    rows = iter_rows(path, fmt)
+    async with AsyncSession(bind=bind, autoflush=False, expire_on_commit=False) as db:
+        try:
+            await run_sync(db, jobs_crud.update_import_job, job_id, status="running")
+            categories = await run_sync(db, categories_crud.get_category_ids_by_name)
+
+            chunks = validated_chunks(rows, categories)
+            message = None
+            while (chunk := await to_thread.run_sync(next, chunks, None)) is not None:
+                valid, errors, read = chunk
+                created, duplicate_errors, over = await _insert_chunk(db, valid, remaining)
+                if over:
+                    message = "Limite de produtos do plano atingido; as linhas seguintes não foram importadas"
+                    errors = errors + [(line, "Limite de produtos do plano atingido") for line, _ in over]
+                remaining -= created
+                progress["processed_rows"] += read
+                progress["created_count"] += created
+                record_errors(sorted(errors + duplicate_errors))
+                await run_sync(db, jobs_crud.update_import_job, job_id, **progress)
+                if message:
+                    break
+
+            await run_sync(db, jobs_crud.update_import_job, job_id, status="completed", message=message, **progress)
+            logger.info(f"Importação {job_id} concluída: {progress['created_count']} produtos, {progress['error_count']} erros")
+        except ImportFileError as e:
+            await db.rollback()
+            await run_sync(db, jobs_crud.update_import_job, job_id, status="failed", message=str(e), **progress)
+        except Exception as e:
+            logger.error(f"Erro na importação {job_id}: {e}")
+            await db.rollback()
+            await run_sync(db, jobs_crud.update_import_job, job_id, status="failed", message="Erro interno ao importar o arquivo", **progress)
+        finally:
+            rows.close()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,174 @@
+"""
+Storage do rate limit (pacote limits, usado pelo slowapi) compartilhado entre
+os workers do mesmo host: um arquivo SQLite em WAL, sem fsync
+(synchronous=OFF), com os contadores de janela deslizante.
+
+URI no formato do SQLAlchemy: sqlite:////caminho/absoluto/rate_limits.sqlite.
+
+Cada checagem é uma transação curta (ler janela anterior e atual, somar se
+couber). As transações são serializadas por um flock num arquivo .lock ao lado
+do banco, e não pelo lock do próprio SQLite, cujo busy handler dorme pelo menos
+1 ms a cada colisão; o flock acorda quem espera assim que o lock é liberado.
+
+O slowapi chama o storage de forma síncrona: em rotas async, o flock e a
+escrita no SQLite rodam no event loop. É um custo aceito: a transação segurada
+pelo lock é curta (p50 ~56 µs, p99 ~126 µs em benchmarks/rate_limit.py), sem
+fsync, e o flock é liberado pelo kernel se o processo que o segura morrer. Quem
+espera o lock trava o loop do seu worker só enquanto os outros terminam as
+deles; em disco lento ou com muitos workers, prefira um storage de rede.
+
+Os contadores não são críticos: se o arquivo sumir, os limites recomeçam do zero.
+Para vários hosts, use um storage de rede do limits (ex.: redis://).
+"""
+import fcntl
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from math import floor
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS rate_limits ("
+    "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits (expires_at)",
+)
+# A cada N escritas deste processo, remove até _PURGE_BATCH contadores vencidos:
+# lotes pequenos pelo índice, para a limpeza não pesar na checagem que a executa
+_PURGE_EVERY = 100
+_PURGE_BATCH = 200
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, timeout: float = 5.0, **options):
+        self.path = uri.split(":///", 1)[1]
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return (sqlite3.Error, OSError)
+
+    def _connection(self):
+        # Uma conexão (e um descritor do lock) por thread e por processo: nada herdado do fork
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            local.connection = connection
+            local.lock = open(self.path + ".lock", "a")
+            local.pid = os.getpid()
+        return local.connection, local.lock
+
+    @contextmanager
+    def _transaction(self):
+        connection, lock = self._connection()
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _get(connection, key: str, now: float) -> int:
+        row = connection.execute(
+            "SELECT value FROM rate_limits WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _incr(self, connection, key: str, expiry: float, amount: int, now: float) -> int:
+        value = connection.execute(
+            "INSERT INTO rate_limits (key, value, expires_at) VALUES (?1, ?2, ?3) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "value = CASE WHEN expires_at <= ?4 THEN ?2 ELSE value + ?2 END, "
+            "expires_at = CASE WHEN expires_at <= ?4 THEN ?3 ELSE expires_at END "
+            "RETURNING value",
+            (key, amount, now + expiry, now),
+        ).fetchone()[0]
+        self._writes += 1
+        if self._writes % _PURGE_EVERY == 0:
+            connection.execute(
+                "DELETE FROM rate_limits WHERE key IN "
+                "(SELECT key FROM rate_limits WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)",
+                (now, _PURGE_BATCH),
+            )
+        return value
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        with self._transaction() as connection:
+            return self._incr(connection, key, expiry, amount, time.time())
+
+    def get(self, key: str) -> int:
+        connection, _ = self._connection()
+        return self._get(connection, key, time.time())
+
+    def get_expiry(self, key: str) -> float:
+        connection, _ = self._connection()
+        now = time.time()
+        row = connection.execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def clear(self, key: str) -> None:
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def check(self) -> bool:
+        try:
+            connection, _ = self._connection()
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except (sqlite3.Error, OSError):
+            return False
+
+    def reset(self) -> int:
+        with self._transaction() as connection:
+            return connection.execute("DELETE FROM rate_limits").rowcount
+
+    def _window(self, connection, key: str, expiry: int, now: float):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(connection, previous_key, now)
+        current_count = self._get(connection, current_key, now)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl, current_key
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as connection:
+            previous_count, previous_ttl, current_count, _, current_key = self._window(connection, key, expiry, now)
+            # Ler e somar na mesma transação: sem a corrida (e o estorno) do storage em memória
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            self._incr(connection, current_key, 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key: str, expiry: int):
+        connection, _ = self._connection()
+        return self._window(connection, key, expiry, time.time())[:4]
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM rate_limits WHERE key IN (?, ?)", (previous_key, current_key))
@@ -0,0 +1,92 @@
+"""
+Read-your-writes para a réplica de leitura.
+
+A réplica recebe as alterações do primário com algum atraso. Para que um
+cliente veja o que acabou de gravar, ReadYourWritesMiddleware registra cada
+requisição de escrita bem-sucedida (POST/PUT/PATCH/DELETE com status < 400) e,
+por DB_READ_YOUR_WRITES_SECONDS, get_read_db/get_async_read_db entregam a
+sessão do primário às leituras do mesmo cliente.
+
+O cliente é identificado pela credencial (Authorization ou X-API-Key, em hash).
+O registro é o mtime de um arquivo marcador em <CACHE_INVALIDATION_DIR>/writes,
+como em core.shared_cache, para valer em todos os workers do container.
+"""
+import hashlib
+import os
+import time
+from typing import Optional
+
+from fastapi import Request
+
+from backend.core.config import settings
+from backend.core.shared_cache import CACHE_INVALIDATION_DIR
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+_CREDENTIAL_HEADERS = (b"authorization", b"x-api-key")
+
+
+def _client_key(headers) -> Optional[str]:
+    """headers: pares (nome, valor) em bytes, como no scope ASGI."""
+    for name, value in headers:
+        if name.lower() in _CREDENTIAL_HEADERS and value:
+            return hashlib.sha1(value).hexdigest()
+    return None
+
+
+class RecentWrites:
+    def __init__(self, window: float = None, directory: str = None):
+        self.window = settings.DB_READ_YOUR_WRITES_SECONDS if window is None else window
+        self.directory = directory or os.path.join(CACHE_INVALIDATION_DIR, "writes")
+
+    def mark(self, key: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key)
+        with open(path, "a"):
+            pass
+        os.utime(path)
+
+    def wrote_recently(self, request) -> bool:
+        if self.window <= 0:
+            return False
+        key = _client_key(request.scope.get("headers", ()))
+        if key is None:
+            return False
+        try:
+            return time.time() - os.stat(os.path.join(self.directory, key)).st_mtime < self.window
+        except FileNotFoundError:
+            return False
+
+
+recent_writes = RecentWrites()
+
+
+async def read_only(request: Request) -> None:
+    """
+    Dependency de rotas POST que só leem (ex.: a lista de ids não cabe numa
+    query string): ReadYourWritesMiddleware não as registra como escrita.
+    """
+    request.state.read_only = True
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app, writes: RecentWrites = recent_writes):
+        self.app = app
+        self.writes = writes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in _SAFE_METHODS or self.writes.window <= 0:
+            await self.app(scope, receive, send)
+            return
+        key = _client_key(scope["headers"])
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_mark(message):
+            # Marca antes de o cliente receber a resposta: a próxima leitura já vê o registro
+            # O estado da requisição (scope["state"]) já tem o marcador de read_only, se a rota o usa
+            if message["type"] == "http.response.start" and message["status"] < 400 and not scope.get("state", {}).get("read_only"):
+                self.writes.mark(key)
+            await send(message)
+
+        await self.app(scope, receive, send_and_mark)
@@ -0,0 +1,59 @@
+"""
+Pool de processos para renderizações que gastam CPU (documentos de romaneio,
+etiquetas): o trabalho sai do event loop e não disputa o GIL com as requisições.
+
+Um pool por worker do uvicorn, criado na primeira renderização e encerrado no
+shutdown (lifespan). Os processos nascem com "spawn": não herdam conexões,
+threads nem locks do worker e só importam o módulo da função chamada, que deve
+ser de nível de módulo e receber/devolver valores simples (picklable).
+
+RENDER_POOL_WORKERS=0 renderiza numa thread do próprio worker.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from anyio import to_thread
+
+from backend.config.logger import get_dynamic_logger
+from backend.core.config import settings
+
+logger = get_dynamic_logger("render_pool")
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.RENDER_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+async def run_in_pool(fn, *args, **kwargs):
+    call = partial(fn, *args, **kwargs)
+    if settings.RENDER_POOL_WORKERS <= 0:
+        return await to_thread.run_sync(call)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_pool(), call)
+    except BrokenProcessPool:
+        # Um processo do pool morreu (ex.: OOM): descarta o pool; o próximo pedido cria outro
+        logger.error("Pool de renderização quebrado; será recriado na próxima renderização")
+        shutdown_pool(wait=False)
+        raise
+
+
+def shutdown_pool(wait: bool = True) -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,227 @@
+"""
+Documento do romaneio (PDF A4 ou PNG), desenhado com Pillow no servidor: o mesmo
+layout da impressão A4 do RomaneioExportModal, sem depender do celular do cliente.
+
+render_romaneio_document roda nos processos de core.render_pool: recebe um dict
+simples (ver build_document em routers/inventory.py) e devolve os bytes. Só
+importa Pillow e core.raster (fontes e gravador de PDF), para os processos
+subirem rápido.
+
+- PDF: páginas A4 a 150 dpi, cabeçalho da tabela repetido e "Página x de y"
+- PNG: uma imagem única da largura de uma A4, na altura que as linhas pedirem
+  (para compartilhar pelo celular)
+"""
+import io
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+from backend.core import raster
+from backend.core.raster import brl as _brl, printable as _text
+
+# Muda quando o layout muda: faz parte da chave do cache dos documentos
+LAYOUT_VERSION = 1
+
+FORMATS = {"pdf": "application/pdf", "png": "image/png"}
+
+_DPI = 150
+_WIDTH, _HEIGHT = 1240, 1754  # A4 a 150 dpi
+_MARGIN = 90
+_ROW_HEIGHT = 64
+_TABLE_HEADER_HEIGHT = 52
+_TOTALS_HEIGHT = 120
+_FOOTER_HEIGHT = 70
+
+# Posições x das colunas; preço e subtotal são alinhados pela borda direita
+_COL_QTY = _MARGIN + 12
+_COL_UNIT = _MARGIN + 130
+_COL_PRODUCT = _MARGIN + 220
+_COL_PRICE = 850
+_COL_SUBTOTAL = 1015
+_PRODUCT_WIDTH = _COL_PRICE - 165 - _COL_PRODUCT
+
+# Tons de cinza (modo "L") equivalentes às cores do HTML do modal
+_TEXT, _MUTED, _LIGHT, _RULE, _SHADE, _WATERMARK = 24, 75, 107, 229, 249, 240
+
+
+def _quantity(value: float) -> str:
+    return f"{value:.3f}".rstrip("0").rstrip(".").replace(".", ",")
+
+
+@lru_cache(maxsize=1)
+def _watermark() -> Image.Image:
+    """Máscara do texto diagonal; colada em tom claro antes do conteúdo."""
+    font = raster.freetype(96, bold=True)
+    text = "romaneiorapido.com.br"
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new("L", (right - left + 20, bottom - top + 20), 0)
+    ImageDraw.Draw(mask).text((10 - left, 10 - top), text, font=font, fill=255)
+    return mask.rotate(35, expand=True, resample=Image.BICUBIC)
+
+
+class _Canvas:
+    def __init__(self, height: int):
+        self.image = Image.new("L", (_WIDTH, height), 255)
+        self.draw = ImageDraw.Draw(self.image)
+        mask = _watermark()
+        for center in range(_HEIGHT // 2, height, _HEIGHT):
+            self.image.paste(_WATERMARK, ((_WIDTH - mask.width) // 2, center - mask.height // 2), mask)
+
+    def text(self, x: float, y: float, text: str, font: raster.Glyphs, fill: int = _TEXT, width: float = None) -> float:
+        """Escreve a partir de x; com width, corta o texto. Retorna a largura escrita."""
+        text = _text(text)
+        if width is not None:
+            text = font.fit(text, width)
+        font.draw(self.image, x, y, text, fill)
+        return font.width(text)
+
+    def right(self, right: float, y: float, text: str, font: raster.Glyphs, fill: int = _TEXT) -> None:
+        text = _text(text)
+        font.draw(self.image, right - font.width(text), y, text, fill)
+
+    def center(self, y: float, text: str, font: raster.Glyphs, fill: int = _TEXT) -> None:
+        text = font.fit(_text(text), _WIDTH - 2 * _MARGIN)
+        font.draw(self.image, (_WIDTH - font.width(text)) / 2, y, text, fill)
+
+    def rule(self, y: float, fill: int = _RULE, width: int = 1) -> None:
+        self.draw.line((_MARGIN, y, _WIDTH - _MARGIN, y), fill=fill, width=width)
+
+
+def _header_lines(document: dict) -> list:
+    lines = [("Cliente/Destino:", document.get("customer_name") or "N/A"), ("Data:", document.get("date") or "")]
+    if document.get("romaneio_id"):
+        lines.append(("Romaneio:", document["romaneio_id"]))
+    return lines
+
+
+def _header_height(document: dict) -> int:
+    return _MARGIN + 66 + 36 * len(_header_lines(document)) + (32 if document.get("notes") else 0) + 46
+
+
+def _draw_header(canvas: _Canvas, document: dict) -> int:
+    y = _MARGIN
+    canvas.center(y, "DOCUMENTO DE ROMANEIO", raster.font(40, bold=True))
+    y += 66
+    label_font, value_font = raster.font(24, bold=True), raster.font(24)
+    for label, value in _header_lines(document):
+        label, value = _text(label) + " ", _text(value)
+        label_width = label_font.width(label)
+        value = value_font.fit(value, _WIDTH - 2 * _MARGIN - label_width)
+        x = (_WIDTH - label_width - value_font.width(value)) / 2
+        canvas.text(x, y, label, label_font, _MUTED)
+        canvas.text(x + label_width, y, value, value_font, _MUTED)
+        y += 36
+    if document.get("notes"):
+        canvas.center(y, document["notes"], raster.font(20), _LIGHT)
+        y += 32
+    y += 16
+    canvas.rule(y, width=3)
+    return y + 30
+
+
+def _draw_table_header(canvas: _Canvas, y: int) -> int:
+    canvas.draw.rectangle((_MARGIN, y, _WIDTH - _MARGIN, y + _TABLE_HEADER_HEIGHT), fill=_SHADE)
+    canvas.rule(y + _TABLE_HEADER_HEIGHT, width=3)
+    font = raster.font(21, bold=True)
+    text_y = y + 14
+    for title, x in (("Qtd", _COL_QTY), ("Unid", _COL_UNIT), ("Produto", _COL_PRODUCT)):
+        canvas.text(x, text_y, title, font, _MUTED)
+    canvas.right(_WIDTH - _MARGIN - 8, text_y, "Confirmação", font, _MUTED)
+    canvas.right(_COL_PRICE, text_y, "Val. Unit.", font, _MUTED)
+    canvas.right(_COL_SUBTOTAL, text_y, "Subtotal", font, _MUTED)
+    return y + _TABLE_HEADER_HEIGHT
+
+
+def _draw_row(canvas: _Canvas, y: int, item: dict) -> int:
+    regular, bold = raster.font(23), raster.font(23, bold=True)
+    price = item.get("price") or 0.0
+    canvas.text(_COL_QTY, y + 12, _quantity(item["quantity"]), bold)
+    canvas.text(_COL_UNIT, y + 12, item.get("unit") or "UN", regular, width=_COL_PRODUCT - _COL_UNIT - 10)
+    canvas.text(_COL_PRODUCT, y + 8, item.get("name"), regular, width=_PRODUCT_WIDTH)
+    canvas.text(_COL_PRODUCT, y + 38, item.get("barcode") or "-", raster.font(17), _LIGHT, width=_PRODUCT_WIDTH)
+    canvas.right(_COL_PRICE, y + 12, _brl(price), regular)
+    canvas.right(_COL_SUBTOTAL, y + 12, _brl(price * item["quantity"]), bold)
+    box_x = _WIDTH - _MARGIN - 8 - (raster.font(21, bold=True).width(_text("Confirmação")) + 28) / 2
+    canvas.draw.rounded_rectangle((box_x, y + 16, box_x + 28, y + 44), radius=5, outline=200, width=2)
+    canvas.rule(y + _ROW_HEIGHT - 1)
+    return y + _ROW_HEIGHT
+
+
+def _draw_totals(canvas: _Canvas, y: int, items: list) -> int:
+    total_items = sum(item["quantity"] for item in items)
+    total_value = sum((item.get("price") or 0.0) * item["quantity"] for item in items)
+    right = _WIDTH - _MARGIN
+    y += 24
+    value, value_font = _quantity(total_items), raster.font(23, bold=True)
+    canvas.right(right, y, value, value_font)
+    canvas.right(right - value_font.width(value), y, "Total de Itens: ", raster.font(23), _MUTED)
+    canvas.right(right, y + 40, f"Valor Total: {_brl(total_value)}", raster.font(34, bold=True))
+    return y + _TOTALS_HEIGHT
+
+
+def _draw_footer(canvas: _Canvas, page_label: str = None):
+    y = canvas.image.height - _MARGIN - _FOOTER_HEIGHT + 20
+    canvas.rule(y, width=2)
+    font = raster.font(18)
+    canvas.center(y + 20, "Documento gerado pelo sistema RomaneioRapido.com.br", font, 160)
+    if page_label:
+        canvas.right(_WIDTH - _MARGIN, y + 20, page_label, font, 160)
+
+
+def _render_pages(document: dict) -> list:
+    items = document["items"]
+    table_top = _header_height(document)
+    bottom = _HEIGHT - _MARGIN - _FOOTER_HEIGHT
+    first_capacity = (bottom - table_top - _TABLE_HEADER_HEIGHT) // _ROW_HEIGHT
+    capacity = (bottom - _MARGIN - _TABLE_HEADER_HEIGHT) // _ROW_HEIGHT
+
+    chunks = [items[:first_capacity]]
+    rest = items[first_capacity:]
+    while rest:
+        chunks.append(rest[:capacity])
+        rest = rest[capacity:]
+    # Os totais precisam caber abaixo da última linha; se não, vão para uma página própria
+    last_top = table_top if len(chunks) == 1 else _MARGIN
+    if last_top + _TABLE_HEADER_HEIGHT + len(chunks[-1]) * _ROW_HEIGHT + _TOTALS_HEIGHT > bottom:
+        chunks.append([])
+
+    pages = []
+    for number, chunk in enumerate(chunks, start=1):
+        canvas = _Canvas(_HEIGHT)
+        y = _draw_header(canvas, document) if number == 1 else _MARGIN
+        if chunk or number == 1:
+            y = _draw_table_header(canvas, y)
+        for item in chunk:
+            y = _draw_row(canvas, y, item)
+        if number == len(chunks):
+            _draw_totals(canvas, y, items)
+        _draw_footer(canvas, f"Página {number} de {len(chunks)}")
+        pages.append(canvas.image)
+    return pages
+
+
+def _render_long_image(document: dict) -> Image.Image:
+    items = document["items"]
+    height = _header_height(document) + _TABLE_HEADER_HEIGHT + len(items) * _ROW_HEIGHT + _TOTALS_HEIGHT + _FOOTER_HEIGHT + _MARGIN
+    canvas = _Canvas(max(height, _HEIGHT // 2))
+    y = _draw_table_header(canvas, _draw_header(canvas, document))
+    for item in items:
+        y = _draw_row(canvas, y, item)
+    _draw_totals(canvas, y, items)
+    _draw_footer(canvas)
+    return canvas.image
+
+
+def render_romaneio_document(document: dict, fmt: str = "pdf") -> bytes:
+    """
+    document: {"romaneio_id", "customer_name", "date" (já formatada), "notes",
+    "items": [{"quantity", "unit", "name", "barcode", "price"}]}.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato não suportado: {fmt}")
+    if fmt == "pdf":
+        pages = [raster.encode_page(page) for page in _render_pages(document)]
+        return raster.build_pdf(pages, _DPI, f"Romaneio {document.get('romaneio_id') or ''}".strip())
+    buffer = io.BytesIO()
+    _render_long_image(document).save(buffer, "PNG", compress_level=6, dpi=(_DPI, _DPI))
+    return buffer.getvalue()
@@ -6,22 +6,33 @@ from backend.config.logger import get_dynamic_logger
 
 logger = get_dynamic_logger("router_loader")
 
-def include_routers(app: FastAPI):
-    routers_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "routers")
+# Lista explícita em vez de os.listdir: sem varrer o disco na subida, ordem de
+# registro estável e um router novo precisa ser adicionado aqui.
+ROUTER_MODULES = (
+    "auth",
+    "users",
+    "plans",
+    "api_keys",
+    "categories",
+    "products",
+    "clients",
+    "inventory",
+    "dashboard",
+    "exports",
+    "metrics",
+)
 
-    for filename in os.listdir(routers_dir):
-        if filename.endswith(".py") and filename != "__init__.py":
-            module_name = filename[:-3]
+def include_routers(app: FastAPI, modules=ROUTER_MODULES):
+    for module_name in modules:
+        try:
+            # Import path must be relative to the application root to find submodules correctly
+            module = importlib.import_module(f"backend.routers.{module_name}")
 
-            try:
-                # Import path must be relative to the application root to find submodules correctly
-                module = importlib.import_module(f"backend.routers.{module_name}")
-
-                if hasattr(module, "router"):
-                    tag = module_name.capitalize()
-                    app.include_router(module.router, tags=[tag])
-                    logger.info(f"Included router: {module_name} with tag {tag}")
-            except Exception as e:
-                if os.getenv("TESTING"):
-                    raise
-                logger.error(f"Failed to load router {module_name}: {e}\n{traceback.format_exc()}")
+            if hasattr(module, "router"):
+                tag = module_name.capitalize()
+                app.include_router(module.router, tags=[tag])
+                logger.info(f"Included router: {module_name} with tag {tag}")
+        except Exception as e:
+            if os.getenv("TESTING"):
+                raise
+            logger.error(f"Failed to load router {module_name}: {e}\n{traceback.format_exc()}")
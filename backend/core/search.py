@@ -0,0 +1,36 @@
+"""
+Normalização de texto para a busca de produtos.
+
+O texto pesquisável é gravado já sem acentos e em minúsculas (coluna
+products.search_text), então "Eletrônicos", "ELETRONICOS" e "eletronicos" caem no
+mesmo índice — pg_trgm (GIN) no Postgres e FTS5 com tokenizer trigram no SQLite.
+"""
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_search_text(*parts) -> str:
+    """Junta as partes não vazias, remove acentos, converte para minúsculas e colapsa espaços."""
+    text = " ".join(str(part) for part in parts if part)
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _WHITESPACE.sub(" ", stripped.casefold()).strip()
+
+
+def product_search_text(name: str = None, barcode: str = None, sku: str = None) -> str:
+    return normalize_search_text(name, barcode, sku)
+
+
+LIKE_ESCAPE = "!"
+
+
+def escape_like(value: str) -> str:
+    """Escapa curingas para uso com LIKE ... ESCAPE '!' (mesmo comportamento em Postgres e SQLite)."""
+    return value.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def fts5_phrase(value: str) -> str:
+    """Transforma a busca em uma frase FTS5 literal (sem operadores)."""
+    return '"' + value.replace('"', '""') + '"'
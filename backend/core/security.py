@@ -3,13 +3,20 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from anyio import to_thread
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
 from backend.core.config import settings
-from backend.core.database import get_db
+from backend.core.database import get_async_db, get_db, run_sync
+from backend.core.limiter import enforce_api_key_limit
+from backend.core.user_cache import user_cache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+# Versões que não recusam sozinhas: quem decide é get_async_current_user_flexible
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+api_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -27,31 +34,99 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _load_user_by_subject(db: Session, email: str):
+    """Usuário do token, pelo cache (ver core.user_cache) ou pelo banco sem o hash de senha."""
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+
+    from backend.models.users import User
+    loaded_at = user_cache.clock()
+    db_user = db.query(User).options(defer(User.hashed_password)).filter(User.email == email).first()
+    if db_user is None:
+        return None
+    user_cache.put(email, db_user, loaded_at)
+    return user_cache.get(email) or db_user
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _token_subject(token: str) -> str:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    email: str = payload.get("sub")
+    if email is None:
+        raise _credentials_exception()
+    return email
 
-    from backend.models.users import User
-    user = db.query(User).filter(User.email == email).first()
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    user = _load_user_by_subject(db, _token_subject(token))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
+async def get_async_current_user_flexible(
+    request: Request,
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    api_key: Optional[str] = Depends(api_key_scheme),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Versão async de get_current_user_flexible, para os routers async: JWT
+    (Bearer) ou API Key (X-API-Key). Não ocupa uma thread do threadpool; o
+    usuário e a chave vêm dos caches ou da mesma AsyncSession da rota.
+
+    Cada requisição por API Key conta no limite do plano do dono
+    (api_rate_limit); a checagem (flock + escrita no SQLite do storage) roda
+    numa thread, fora do event loop.
+    """
+    if token:
+        try:
+            email = _token_subject(token)
+        except HTTPException:
+            if not api_key:
+                raise
+        else:
+            user = user_cache.get(email) or await run_sync(db, _load_user_by_subject, email)
+            if user is not None:
+                return user
+            if not api_key:
+                raise _credentials_exception()
+
+    if api_key:
+        from backend.crud.api_keys import get_user_by_api_key
+        result = await run_sync(db, get_user_by_api_key, api_key)
+        if not result:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="API Key inválida, expirada ou revogada.",
+            )
+        user, api_key_obj = result
+        await to_thread.run_sync(enforce_api_key_limit, request, api_key_obj.id, user.plan_id)
+        return user
+
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Credenciais não fornecidas. Use Bearer token ou X-API-Key.",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 def get_current_user_flexible(request: Request, db: Session = Depends(get_db)):
     """
     Autenticação flexível: aceita JWT (Bearer) ou API Key (X-API-Key header).
-    Use este dependency em endpoints que precisam aceitar ambos os métodos.
+    Use este dependency em endpoints síncronos que precisam aceitar ambos os
+    métodos; os routers async usam get_async_current_user_flexible.
     """
     # 1. Tentar Bearer token (JWT)
     auth_header = request.headers.get("Authorization", "")
@@ -61,8 +136,7 @@ def get_current_user_flexible(request: Request, db: Session = Depends(get_db)):
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
             email: str = payload.get("sub")
             if email:
-                from backend.models.users import User
-                user = db.query(User).filter(User.email == email).first()
+                user = _load_user_by_subject(db, email)
                 if user and user.is_active:
                     return user
         except JWTError:
@@ -75,6 +149,7 @@ def get_current_user_flexible(request: Request, db: Session = Depends(get_db)):
         result = get_user_by_api_key(db, api_key_header)
         if result:
             user, api_key_obj = result
+            enforce_api_key_limit(request, api_key_obj.id, user.plan_id)
             return user
 
         raise HTTPException(
@@ -0,0 +1,40 @@
+"""
+Caminho rápido (opcional) de serialização das listagens paginadas.
+
+Por padrão as listagens devolvem objetos ORM: o FastAPI valida cada item contra
+o response_model (from_attributes) ou, sem response_model, percorre tudo com o
+jsonable_encoder. Com FAST_JSON_RESPONSES=true o CRUD busca só as colunas da
+resposta (linhas projetadas, já no formato e na ordem de campos do schema) e
+FastJSONResponse gera os bytes de uma vez, sem validação nem objetos intermediários.
+
+Usa orjson se estiver instalado, senão o serializador do pydantic-core: as datas
+saem no mesmo formato ISO 8601 do pydantic ("...Z" para UTC) nos dois casos.
+"""
+from typing import Any
+
+import pydantic_core
+from fastapi import Response
+
+from backend.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele, pydantic-core
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return pydantic_core.to_json(content)
+
+
+def fast_json_enabled() -> bool:
+    return settings.FAST_JSON_RESPONSES
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
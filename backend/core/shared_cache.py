@@ -0,0 +1,109 @@
+"""
+Cache em memória por worker com invalidação visível para os outros workers.
+
+Cada worker mantém um LRU limitado por tamanho e por TTL. invalidate(key) limpa
+a entrada local e atualiza o mtime de um arquivo marcador em
+<CACHE_INVALIDATION_DIR>/<namespace>/ (diretório compartilhado pelos workers do
+mesmo container). Antes de usar uma entrada, o worker compara o mtime do
+marcador com o instante em que a carregou do banco: custa um os.stat, bem menos
+que a consulta, e nunca devolve um valor invalidado.
+
+As entradas são snapshots (dicts); subclasses convertem de/para objetos em
+_snapshot() e _build().
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+CACHE_INVALIDATION_DIR = os.getenv("CACHE_INVALIDATION_DIR") or os.path.join(tempfile.gettempdir(), "romaneio_cache")
+
+
+class SharedCache:
+    def __init__(self, namespace: str, ttl: float, max_entries: int, directory: str = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory = directory or os.path.join(CACHE_INVALIDATION_DIR, namespace)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    @staticmethod
+    def clock() -> int:
+        """Instante (ns, relógio de parede) a registrar antes de ler o valor do banco."""
+        return time.time_ns()
+
+    def _snapshot(self, value):
+        return value
+
+    def _build(self, snapshot):
+        return snapshot
+
+    def _marker(self, key: Hashable) -> str:
+        return os.path.join(self.directory, hashlib.sha1(str(key).encode()).hexdigest())
+
+    def _invalidated_since(self, key: Hashable, loaded_at: int) -> bool:
+        try:
+            return os.stat(self._marker(key)).st_mtime_ns >= loaded_at
+        except FileNotFoundError:
+            return False
+
+    def get(self, key: Hashable):
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= now:
+                del self._entries[key]
+                return None
+        snapshot, loaded_at, _ = entry
+        if self._invalidated_since(key, loaded_at):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return self._build(snapshot)
+
+    def put(self, key: Hashable, value, loaded_at: int) -> None:
+        if not self.enabled:
+            return
+        snapshot = self._snapshot(value)
+        if snapshot is None:
+            return
+        # Invalidado enquanto lia do banco: não guarda o valor possivelmente velho
+        if self._invalidated_since(key, loaded_at):
+            return
+        with self._lock:
+            self._entries[key] = (snapshot, loaded_at, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: Optional[Hashable]) -> None:
+        """Chamar depois do commit que alterou o valor (vale para todos os workers)."""
+        stamp = self.clock()
+        for key in filter(None, keys):
+            with self._lock:
+                self._entries.pop(key, None)
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._marker(key)
+            with open(path, "a"):
+                pass
+            os.utime(path, ns=(stamp, stamp))
+
+    def clear(self) -> None:
+        """Limpa apenas o cache local deste worker (testes/benchmarks)."""
+        with self._lock:
+            self._entries.clear()
@@ -3,7 +3,7 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from backend.core.database import get_db
-from backend.core.security import get_current_user
+from backend.core.security import get_async_current_user_flexible
 from backend.core.plans_config import PLANS_CONFIG
 
 
@@ -43,7 +43,7 @@ def get_trial_days_remaining(user) -> Optional[int]:
     return max(remaining, 0)
 
 
-def require_active_plan(current_user=Depends(get_current_user)):
+async def require_active_plan(current_user=Depends(get_async_current_user_flexible)):
     """
     FastAPI dependency: bloqueia ações de escrita se o trial expirou.
     Usar em endpoints POST/PUT/PATCH/DELETE.
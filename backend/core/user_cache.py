@@ -0,0 +1,42 @@
+"""
+Cache do usuário autenticado, por subject do JWT (e-mail).
+
+Evita o SELECT em users a cada requisição autenticada. Limitado por tamanho
+(USER_CACHE_MAX_ENTRIES) e por tempo (USER_CACHE_TTL_SECONDS; 0 desativa);
+a invalidação entre workers é a de core.shared_cache.
+
+O cache guarda apenas colunas do perfil (nunca o hash de senha) e devolve uma
+instância User nova e transiente a cada chamada: quem precisa alterar o
+usuário deve recarregá-lo da sessão (db.get(User, current_user.id)).
+"""
+import os
+
+from backend.core.shared_cache import SharedCache
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+# Fotos maiores que isso não entram no cache (o usuário segue sendo lido do banco)
+USER_CACHE_MAX_PHOTO_BYTES = int(os.getenv("USER_CACHE_MAX_PHOTO_BYTES", str(256 * 1024)))
+
+_CACHED_COLUMNS = (
+    "id", "email", "full_name", "phone", "store_name", "photo_base64",
+    "is_admin", "plan_id", "is_active", "created_at", "updated_at",
+)
+
+
+class UserCache(SharedCache):
+    def __init__(self, ttl: float = USER_CACHE_TTL_SECONDS, max_entries: int = USER_CACHE_MAX_ENTRIES, directory: str = None):
+        super().__init__("users", ttl, max_entries, directory)
+
+    def _snapshot(self, user):
+        snapshot = {column: getattr(user, column) for column in _CACHED_COLUMNS}
+        if len(snapshot["photo_base64"] or "") > USER_CACHE_MAX_PHOTO_BYTES:
+            return None
+        return snapshot
+
+    def _build(self, snapshot):
+        from backend.models.users import User
+        return User(**snapshot)
+
+
+user_cache = UserCache()
@@ -4,6 +4,8 @@ from datetime import datetime, timezone
 from typing import Optional, List
 
 from sqlalchemy.orm import Session
+from backend.core.api_key_cache import api_key_cache, usage_buffer
+from backend.core.security import _load_user_by_subject
 from backend.models.api_keys import ApiKey
 
 
@@ -70,38 +72,61 @@ def revoke_api_key(db: Session, user_id: int, key_id: int) -> Optional[ApiKey]:
 
     api_key.is_active = False
     db.commit()
+    api_key_cache.invalidate(api_key.key_hash)
     db.refresh(api_key)
     return api_key
 
 
+def _is_expired(expires_at) -> bool:
+    return bool(expires_at and expires_at < datetime.now(timezone.utc))
+
+
 def get_user_by_api_key(db: Session, raw_key: str):
     """
     Busca o usuário dono da API Key pelo hash.
     Retorna (User, ApiKey) ou None se inválida/expirada/inativa.
+
+    Chaves verificadas ficam em cache (core.api_key_cache) e o dono vem do cache
+    de usuários; last_used_at/usage_count são gravados em lote, então uma chamada
+    em cache não escreve nada no banco.
     """
     key_hash = _hash_key(raw_key)
-    api_key = (
-        db.query(ApiKey)
+
+    cached = api_key_cache.get(key_hash)
+    if cached and not _is_expired(cached["expires_at"]):
+        user = _load_user_by_subject(db, cached["owner_email"])
+        # E-mail do dono alterado desde o cache: segue pelo banco
+        if user and user.id == cached["user_id"]:
+            if not user.is_active:
+                return None
+            usage_buffer.record(db.get_bind(), cached["id"])
+            api_key = ApiKey(**{k: v for k, v in cached.items() if k != "owner_email"}, is_active=True)
+            return user, api_key
+
+    from backend.models.users import User
+    loaded_at = api_key_cache.clock()
+    row = (
+        db.query(ApiKey, User.email)
+        .join(User, User.id == ApiKey.user_id)
         .filter(ApiKey.key_hash == key_hash, ApiKey.is_active == True)
         .first()
     )
 
-    if not api_key:
+    if not row:
         return None
+    api_key, owner_email = row
 
     # Verificar expiração
-    if api_key.expires_at and api_key.expires_at < datetime.now(timezone.utc):
+    if _is_expired(api_key.expires_at):
         api_key.is_active = False
         db.commit()
+        api_key_cache.invalidate(key_hash)
         return None
 
-    # Atualizar last_used_at
-    api_key.last_used_at = datetime.now(timezone.utc)
-    db.commit()
-
-    from backend.models.users import User
-    user = db.query(User).filter(User.id == api_key.user_id).first()
+    api_key_cache.put(key_hash, (api_key, owner_email), loaded_at)
+    user = _load_user_by_subject(db, owner_email)
     if not user or not user.is_active:
         return None
 
+    usage_buffer.record(db.get_bind(), api_key.id)
     return user, api_key
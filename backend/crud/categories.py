@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
 from backend.models.categories import Category
+from backend.models.products import Product
 from backend.schemas.categories import CategoryCreate, CategoryUpdate
+from backend.core.etags import product_key, table_versions
+from backend.core.search import normalize_search_text
 
 
 def get_categories(db: Session, skip: int = 0, limit: int = 100):
@@ -11,6 +14,15 @@ def get_category(db: Session, category_id: int):
     return db.query(Category).filter(Category.id == category_id).first()
 
 
+def count_categories(db: Session):
+    return db.query(Category).count()
+
+
+def get_category_ids_by_name(db: Session) -> dict:
+    """{nome normalizado (sem acentos, minúsculas): id}, para resolver categorias pelo nome."""
+    return {normalize_search_text(name): category_id for category_id, name in db.query(Category.id, Category.name)}
+
+
 def create_category(db: Session, category: CategoryCreate):
     # Assign position as the next available
     max_pos = db.query(Category).count()
@@ -18,6 +30,7 @@ def create_category(db: Session, category: CategoryCreate):
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    table_versions.bump("categories")
     return db_category
 
 
@@ -30,6 +43,7 @@ def update_category(db: Session, category_id: int, category: CategoryUpdate):
         setattr(db_category, key, value)
     db.commit()
     db.refresh(db_category)
+    table_versions.bump("categories")
     return db_category
 
 
@@ -37,8 +51,11 @@ def delete_category(db: Session, category_id: int):
     db_category = db.query(Category).filter(Category.id == category_id).first()
     if not db_category:
         return None
+    # O ORM zera products.category_id desses produtos: o ETag de cada um (GET /products/{id}) muda também
+    product_ids = [product_id for (product_id,) in db.query(Product.id).filter(Product.category_id == category_id)]
     db.delete(db_category)
     db.commit()
+    table_versions.bump("categories", "products", *(product_key(product_id) for product_id in product_ids))
     return db_category
 
 
@@ -48,3 +65,4 @@ def reorder_categories(db: Session, items: list):
         if db_category:
             db_category.position = item.position
     db.commit()
+    table_versions.bump("categories")
@@ -1,9 +1,24 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from backend.core.count_cache import client_counts
 from backend.models.clients import Client
 from backend.schemas.clients import ClientCreate, ClientUpdate
 from typing import Optional
 
-def get_clients(db: Session, user_id: int, skip: int = 0, limit: int = 100, search: Optional[str] = None):
+# Colunas de ClientResponse, na ordem do schema
+_CLIENT_ROW_COLUMNS = (
+    Client.name, Client.phone, Client.document, Client.email, Client.notes,
+    Client.id, Client.user_id, Client.created_at, Client.updated_at,
+)
+
+
+def _client_row(row) -> dict:
+    item = row._asdict()
+    item.pop("total", None)
+    return item
+
+
+def _filtered_clients(db: Session, user_id: int, search: Optional[str] = None):
     query = db.query(Client).filter(Client.user_id == user_id)
     if search:
         query = query.filter(
@@ -11,17 +26,34 @@ def get_clients(db: Session, user_id: int, skip: int = 0, limit: int = 100, sear
             (Client.phone.ilike(f"%{search}%")) |
             (Client.document.ilike(f"%{search}%"))
         )
-    return query.order_by(Client.name.asc()).offset(skip).limit(limit).all()
+    return query
+
+
+def get_clients(db: Session, user_id: int, skip: int = 0, limit: int = 100, search: Optional[str] = None, projected: bool = False):
+    """
+    Retorna (items, total) em uma única ida ao banco (ver crud.products.get_products).
+    projected=True: items são dicts no formato de ClientResponse.
+    """
+    query = _filtered_clients(db, user_id, search=search)
+    ordered = query.order_by(Client.name.asc(), Client.id.asc())
+    if projected:
+        ordered = ordered.with_entities(*_CLIENT_ROW_COLUMNS)
+
+    if not search:
+        total = client_counts.get_or_set(user_id, query.count)
+        rows = ordered.offset(skip).limit(limit).all()
+        return ([_client_row(row) for row in rows] if projected else rows), total
+
+    rows = ordered.add_columns(func.count().over().label("total")).offset(skip).limit(limit).all()
+    if rows:
+        items = [_client_row(row) for row in rows] if projected else [client for client, _ in rows]
+        return items, rows[0].total
+    return [], (query.count() if skip else 0)
+
 
 def count_clients(db: Session, user_id: int, search: Optional[str] = None):
-    query = db.query(Client).filter(Client.user_id == user_id)
-    if search:
-        query = query.filter(
-            (Client.name.ilike(f"%{search}%")) |
-            (Client.phone.ilike(f"%{search}%")) |
-            (Client.document.ilike(f"%{search}%"))
-        )
-    return query.count()
+    return _filtered_clients(db, user_id, search=search).count()
+
 
 def get_client(db: Session, client_id: int, user_id: int):
     return db.query(Client).filter(Client.id == client_id, Client.user_id == user_id).first()
@@ -31,6 +63,7 @@ def create_client(db: Session, client: ClientCreate, user_id: int):
     db.add(db_client)
     db.commit()
     db.refresh(db_client)
+    client_counts.invalidate(user_id)
     return db_client
 
 def update_client(db: Session, client_id: int, client: ClientUpdate, user_id: int):
@@ -53,4 +86,5 @@ def delete_client(db: Session, client_id: int, user_id: int):
     
     db.delete(db_client)
     db.commit()
+    client_counts.invalidate(user_id)
     return db_client
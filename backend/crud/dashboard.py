@@ -0,0 +1,58 @@
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.core.count_cache import dashboard_summaries
+from backend.models.inventory import InventoryMovement
+from backend.models.products import Product
+
+
+def store_day_bounds(day: date):
+    """Retorna (início UTC, fim UTC) do dia day no fuso da loja."""
+    tz = ZoneInfo(settings.STORE_TIMEZONE)
+    start = datetime.combine(day, time.min, tzinfo=tz)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def store_today_bounds(now: datetime = None):
+    """Retorna (data local, início UTC, fim UTC) do dia corrente no fuso da loja."""
+    today = (now or datetime.now(timezone.utc)).astimezone(ZoneInfo(settings.STORE_TIMEZONE)).date()
+    return (today, *store_day_bounds(today))
+
+
+def _compute_summary(db: Session):
+    today, start, end = store_today_bounds()
+
+    low_stock = Product.stock_quantity <= Product.min_stock
+    products = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(case((low_stock, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Product.stock_quantity > 0, Product.stock_quantity * Product.price), else_=0)), 0),
+        ).where(Product.is_active == True)
+    ).one()
+
+    movements = db.execute(
+        select(
+            func.count(),
+            func.count(func.distinct(InventoryMovement.romaneio_id)),
+            func.coalesce(func.sum(case((InventoryMovement.romaneio_id.is_(None), 1), else_=0)), 0),
+        ).where(InventoryMovement.created_at >= start, InventoryMovement.created_at < end)
+    ).one()
+
+    return {
+        "total_products": products[0],
+        "low_stock_count": products[1],
+        "stock_value": float(products[2]),
+        "today": today,
+        "today_movements": movements[0],
+        "today_romaneios": movements[1],
+        "today_operations": movements[1] + movements[2],
+    }
+
+
+def get_summary(db: Session, tenant_key):
+    """Resumo do dashboard em duas consultas agregadas, guardado por alguns segundos por tenant."""
+    return dashboard_summaries.get_or_set(tenant_key, lambda: _compute_summary(db))
@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from backend.models.import_jobs import ImportJob
+
+_UNFINISHED = ("pending", "running")
+
+
+def create_import_job(db: Session, user_id: int, filename: str = None, total_rows: int = None):
+    job = ImportJob(id=str(uuid.uuid4()), user_id=user_id, filename=filename, total_rows=total_rows, status="pending", errors=[])
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_import_job(db: Session, job_id: str, user_id: int) -> Optional[ImportJob]:
+    return db.query(ImportJob).filter(ImportJob.id == job_id, ImportJob.user_id == user_id).first()
+
+
+def update_import_job(db: Session, job_id: str, **fields):
+    """Um UPDATE + commit; status final (completed/failed) grava finished_at."""
+    if fields.get("status") in ("completed", "failed"):
+        fields["finished_at"] = datetime.now(timezone.utc)
+    db.query(ImportJob).filter(ImportJob.id == job_id).update(fields, synchronize_session=False)
+    db.commit()
+
+
+def fail_unfinished_import_jobs(db: Session) -> int:
+    """Jobs que estavam rodando quando os workers pararam não vão terminar (backend.prestart)."""
+    count = (
+        db.query(ImportJob)
+        .filter(ImportJob.status.in_(_UNFINISHED))
+        .update(
+            {"status": "failed", "message": "Importação interrompida pela reinicialização do servidor", "finished_at": datetime.now(timezone.utc)},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return count
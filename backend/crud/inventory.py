@@ -1,7 +1,74 @@
+import secrets
+import time
+from datetime import datetime
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from backend.models.inventory import InventoryMovement, MovementType
 from backend.models.products import Product
-from backend.schemas.inventory import InventoryMovementCreate
+from backend.models.romaneios import Romaneio
+from backend.models.clients import Client
+from backend.schemas.inventory import InventoryMovementCreate, RomaneioCreate
+from backend.core.search import normalize_search_text, escape_like, LIKE_ESCAPE
+from backend.core.count_cache import product_counts, dashboard_summaries
+from backend.core.etags import table_versions, product_key
+from backend.core.blob_store import url_for
+
+
+_SNAPSHOT_MAP = {
+    "product_name_snapshot": "name",
+    "product_barcode_snapshot": "barcode",
+    "unit_price_snapshot": "price",
+    "unit_snapshot": "unit",
+}
+
+
+class MissingProductsError(Exception):
+    """Levantada quando itens de um romaneio referenciam produtos inexistentes."""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Produtos não encontrados: {self.product_ids}")
+
+
+def generate_romaneio_id() -> str:
+    """Gera um identificador no mesmo formato usado pelo frontend (ROM-<ms>-<sufixo>)."""
+    return f"ROM-{int(time.time() * 1000)}-{secrets.token_hex(5)[:9].upper()}"
+
+
+def customer_name_from_notes(notes: str = None):
+    """Extrai o nome do cliente da nota legada "Romaneio: <nome>" gravada pelo frontend."""
+    if notes and notes.startswith("Romaneio: "):
+        return notes[len("Romaneio: "):].strip() or None
+    return None
+
+
+def _resolve_customer_name(db: Session, client_id: int = None, customer_name: str = None, notes: str = None):
+    if customer_name:
+        return customer_name
+    if client_id:
+        client = db.get(Client, client_id)
+        if client:
+            return client.name
+    return customer_name_from_notes(notes)
+
+
+def _add_to_romaneio_header(db: Session, movement: InventoryMovement):
+    """Mantém o cabeçalho em dia quando uma saída avulsa referencia um romaneio_id."""
+    header = db.query(Romaneio).filter(Romaneio.romaneio_id == movement.romaneio_id).with_for_update().first()
+    if not header:
+        header = Romaneio(
+            romaneio_id=movement.romaneio_id,
+            client_id=movement.client_id,
+            customer_name=_resolve_customer_name(db, movement.client_id, notes=movement.notes),
+            notes=movement.notes,
+            item_count=0,
+            total_value=0.0,
+            created_by=movement.created_by,
+        )
+        db.add(header)
+    header.item_count += 1
+    header.total_value += movement.quantity * (movement.unit_price_snapshot or 0)
 
 
 def create_movement(db: Session, movement: InventoryMovementCreate, user_id: int = None):
@@ -12,13 +79,7 @@ def create_movement(db: Session, movement: InventoryMovementCreate, user_id: int
     
     # Preenchimento automático de snapshots se não forem fornecidos
     if product:
-        snapshot_map = {
-            "product_name_snapshot": "name",
-            "product_barcode_snapshot": "barcode", 
-            "unit_price_snapshot": "price",
-            "unit_snapshot": "unit"
-        }
-        for snap_field, prod_field in snapshot_map.items():
+        for snap_field, prod_field in _SNAPSHOT_MAP.items():
             if not movement_data.get(snap_field):
                 movement_data[snap_field] = getattr(product, prod_field)
 
@@ -29,6 +90,9 @@ def create_movement(db: Session, movement: InventoryMovementCreate, user_id: int
     )
     db.add(db_movement)
 
+    if db_movement.romaneio_id and movement.movement_type == MovementType.OUT:
+        _add_to_romaneio_header(db, db_movement)
+
     # Atualizar o estoque do produto
     if product:
         if movement.movement_type == MovementType.IN:
@@ -40,21 +104,181 @@ def create_movement(db: Session, movement: InventoryMovementCreate, user_id: int
 
     db.commit()
     db.refresh(db_movement)
+    dashboard_summaries.invalidate()
+    if product:
+        table_versions.bump("products", product_key(product.id))
     return db_movement
 
 
-def get_movements(
-    db: Session, 
-    product_id: int = None, 
-    search: str = None,
-    movement_type: MovementType = None,
-    skip: int = 0, 
-    limit: int = 100
-):
-    query = db.query(InventoryMovement).options(
-        joinedload(InventoryMovement.product),
-        joinedload(InventoryMovement.client)
+def create_romaneio(db: Session, romaneio: RomaneioCreate, user_id: int = None):
+    """
+    Registra todas as saídas de um romaneio em uma única transação.
+    - um único SELECT ... IN (...) (com lock de linha) para todos os produtos
+    - um único INSERT em lote para as movimentações
+    - baixa de estoque aplicada nos mesmos produtos antes do commit
+    Levanta MissingProductsError se algum produto não existir (nada é gravado).
+    """
+    product_ids = {item.product_id for item in romaneio.items}
+    products = (
+        db.query(Product)
+        .filter(Product.id.in_(product_ids))
+        .order_by(Product.id)
+        .with_for_update()
+        .all()
+    )
+    products_by_id = {product.id: product for product in products}
+
+    missing = product_ids - products_by_id.keys()
+    if missing:
+        db.rollback()
+        raise MissingProductsError(missing)
+
+    romaneio_id = romaneio.romaneio_id or generate_romaneio_id()
+    total_value = 0.0
+    rows = []
+    for item in romaneio.items:
+        product = products_by_id[item.product_id]
+        row = item.model_dump()
+        for snap_field, prod_field in _SNAPSHOT_MAP.items():
+            if not row.get(snap_field):
+                row[snap_field] = getattr(product, prod_field)
+        row.update(
+            movement_type=MovementType.OUT,
+            notes=romaneio.notes,
+            romaneio_id=romaneio_id,
+            client_id=romaneio.client_id,
+            created_by=user_id,
+        )
+        rows.append(row)
+        total_value += item.quantity * (row["unit_price_snapshot"] or 0)
+        product.stock_quantity -= item.quantity
+
+    header = Romaneio(
+        romaneio_id=romaneio_id,
+        client_id=romaneio.client_id,
+        customer_name=_resolve_customer_name(db, romaneio.client_id, romaneio.customer_name, romaneio.notes),
+        notes=romaneio.notes,
+        item_count=len(rows),
+        total_value=total_value,
+        created_by=user_id,
     )
+    db.add(header)
+
+    try:
+        inserted = db.scalars(
+            insert(InventoryMovement).returning(InventoryMovement, sort_by_parameter_order=True),
+            rows,
+        ).all()
+        movement_ids = [movement.id for movement in inserted]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    dashboard_summaries.invalidate()
+    table_versions.bump("products", *(product_key(product_id) for product_id in product_ids))
+
+    # Recarrega tudo em uma consulta em vez de um refresh por linha após o commit
+    reloaded = {
+        movement.id: movement
+        for movement in db.query(InventoryMovement)
+        .options(joinedload(InventoryMovement.product), joinedload(InventoryMovement.client))
+        .filter(InventoryMovement.id.in_(movement_ids))
+    }
+    header.items = [reloaded[movement_id] for movement_id in movement_ids]
+    return header
+
+
+def get_romaneios(db: Session, client_id: int = None, skip: int = 0, limit: int = 50):
+    """Lista os cabeçalhos de romaneio (mais recentes primeiro) sem tocar nas movimentações."""
+    query = db.query(Romaneio)
+    if client_id:
+        query = query.filter(Romaneio.client_id == client_id)
+
+    total = query.count()
+    items = (
+        query.options(joinedload(Romaneio.client))
+        .order_by(Romaneio.created_at.desc(), Romaneio.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return items, total
+
+
+def get_romaneio(db: Session, romaneio_id: str):
+    """Retorna o cabeçalho com as linhas (em `items`) ou None se não existir."""
+    header = (
+        db.query(Romaneio)
+        .options(joinedload(Romaneio.client))
+        .filter(Romaneio.romaneio_id == romaneio_id)
+        .first()
+    )
+    if not header:
+        return None
+    header.items = (
+        db.query(InventoryMovement)
+        .options(_movement_product_load(), joinedload(InventoryMovement.client))
+        .filter(InventoryMovement.romaneio_id == romaneio_id)
+        .order_by(InventoryMovement.id.asc())
+        .all()
+    )
+    return header
+
+
+def _movement_product_load():
+    """A resposta só usa nome (fallback do snapshot) e a URL da imagem do produto."""
+    return joinedload(InventoryMovement.product).load_only(Product.id, Product.name, Product.image_path)
+
+
+# Colunas de InventoryMovementResponse, na ordem do schema; o resto vem dos joins (ver _movement_row)
+_MOVEMENT_ROW_COLUMNS = (
+    InventoryMovement.product_id, InventoryMovement.quantity, InventoryMovement.movement_type,
+    InventoryMovement.notes, InventoryMovement.product_name_snapshot, InventoryMovement.product_barcode_snapshot,
+    InventoryMovement.unit_price_snapshot, InventoryMovement.unit_snapshot, InventoryMovement.romaneio_id,
+    InventoryMovement.client_id, InventoryMovement.id, InventoryMovement.created_by, InventoryMovement.created_at,
+    Product.name.label("product_name"), Product.image_path.label("product_image"),
+    Client.name.label("client_name"), Client.phone.label("client_phone"),
+)
+
+
+# Colunas do export (snapshots com nomes curtos); created_at primeiro para leitura em planilha
+MOVEMENT_EXPORT_COLUMNS = (
+    InventoryMovement.id, InventoryMovement.created_at, InventoryMovement.movement_type,
+    InventoryMovement.product_id, InventoryMovement.product_name_snapshot.label("product_name"),
+    InventoryMovement.product_barcode_snapshot.label("product_barcode"), InventoryMovement.quantity,
+    InventoryMovement.unit_snapshot.label("unit"), InventoryMovement.unit_price_snapshot.label("unit_price"),
+    InventoryMovement.romaneio_id, InventoryMovement.client_id, Client.name.label("client_name"),
+    InventoryMovement.notes, InventoryMovement.created_by,
+)
+
+
+def _movement_row(row) -> dict:
+    """Mesmas regras das propriedades product_name/product_image do modelo."""
+    item = row._asdict()
+    client_name, client_phone = item.pop("client_name"), item.pop("client_phone")
+    snapshot = item["product_name_snapshot"]
+    if snapshot and snapshot.strip():
+        item["product_name"] = snapshot
+    elif item["product_name"] is None:
+        item["product_name"] = "Produto Excluído"
+    item["product_image"] = url_for(item["product_image"])
+    item["client"] = {"id": item["client_id"], "name": client_name, "phone": client_phone} if client_name is not None else None
+    return item
+
+
+def _filtered_movements(db: Session, product_id: int = None, search: str = None, movement_type: MovementType = None, projected: bool = False):
+    if projected:
+        query = (
+            db.query(*_MOVEMENT_ROW_COLUMNS)
+            .select_from(InventoryMovement)
+            .outerjoin(Product, InventoryMovement.product_id == Product.id)
+            .outerjoin(Client, InventoryMovement.client_id == Client.id)
+        )
+    else:
+        query = db.query(InventoryMovement).options(
+            _movement_product_load(),
+            joinedload(InventoryMovement.client)
+        )
     
     if product_id:
         query = query.filter(InventoryMovement.product_id == product_id)
@@ -68,24 +292,184 @@ def get_movements(
         
     if movement_type:
         query = query.filter(InventoryMovement.movement_type == movement_type)
+
+    return query
+
+
+def get_movements(
+    db: Session, 
+    product_id: int = None, 
+    search: str = None,
+    movement_type: MovementType = None,
+    skip: int = 0, 
+    limit: int = 100,
+    projected: bool = False
+):
+    """projected=True: items são dicts no formato de InventoryMovementResponse, sem objetos ORM."""
+    query = _filtered_movements(db, product_id=product_id, search=search, movement_type=movement_type, projected=projected)
         
     total = query.count()
-    items = query.order_by(InventoryMovement.created_at.desc()).offset(skip).limit(limit).all()
+    items = (
+        query.order_by(InventoryMovement.created_at.desc(), InventoryMovement.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    if projected:
+        items = [_movement_row(row) for row in items]
     
     return items, total
 
 
-def get_stock_levels(db: Session):
-    products = db.query(Product).filter(Product.is_active == True).all()
-    levels = []
-    for product in products:
-        levels.append({
-            "product_id": product.id,
-            "product_name": product.name,
-            "barcode": product.barcode,
-            "stock_quantity": product.stock_quantity,
-            "min_stock": product.min_stock,
-            "price": product.price,
-            "is_low_stock": product.stock_quantity <= product.min_stock
-        })
-    return levels
+def movements_export_query(
+    created_from: datetime = None,
+    created_before: datetime = None,
+    product_id: int = None,
+    movement_type: MovementType = None,
+):
+    """
+    SELECT de MOVEMENT_EXPORT_COLUMNS da mais antiga para a mais recente. A ordem
+    (created_at, id) segue ix_inventory_movements_created_at_id: as primeiras linhas
+    saem sem ordenar o histórico inteiro, e o intervalo de datas usa o mesmo índice.
+    """
+    query = (
+        select(*MOVEMENT_EXPORT_COLUMNS)
+        .outerjoin(Client, InventoryMovement.client_id == Client.id)
+    )
+    if created_from:
+        query = query.where(InventoryMovement.created_at >= created_from)
+    if created_before:
+        query = query.where(InventoryMovement.created_at < created_before)
+    if product_id:
+        query = query.where(InventoryMovement.product_id == product_id)
+    if movement_type:
+        query = query.where(InventoryMovement.movement_type == movement_type)
+    return query.order_by(InventoryMovement.created_at, InventoryMovement.id)
+
+
+async def stream_movements_export(db: AsyncSession, batch_size: int = 2000, **filters):
+    """
+    Movimentações em lotes de linhas, lidas por cursor no servidor
+    (AsyncSession.stream + yield_per): memória constante qualquer que seja o histórico.
+    filters: os de movements_export_query.
+    """
+    result = await db.stream(movements_export_query(**filters).execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        yield partition
+
+
+def get_movements_page(
+    db: Session,
+    product_id: int = None,
+    search: str = None,
+    movement_type: MovementType = None,
+    after: int = None,
+    limit: int = 100,
+    projected: bool = False
+):
+    """
+    Paginação por cursor (keyset) sobre (created_at, id), mais recentes primeiro.
+    `after` é o id da última movimentação da página anterior; o created_at dela é
+    resolvido no próprio banco, então a comparação usa o valor armazenado e o índice
+    composto, com custo independente da profundidade da página. Não calcula total.
+    Retorna (items, next_cursor); next_cursor é None na última página.
+    projected=True: items como em get_movements(projected=True).
+    """
+    query = _filtered_movements(db, product_id=product_id, search=search, movement_type=movement_type, projected=projected)
+
+    if after:
+        anchor_created_at = (
+            select(InventoryMovement.created_at)
+            .where(InventoryMovement.id == after)
+            .scalar_subquery()
+        )
+        query = query.filter(
+            tuple_(InventoryMovement.created_at, InventoryMovement.id) < tuple_(anchor_created_at, after)
+        )
+
+    items = (
+        query.order_by(InventoryMovement.created_at.desc(), InventoryMovement.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = items[-1].id if has_more and items else None
+    if projected:
+        items = [_movement_row(row) for row in items]
+    return items, next_cursor
+
+
+def _stock_levels_query(low_stock_only: bool = False, search: str = None, category_id: int = None, after: int = None):
+    """Projeção só com as colunas do StockLevel (sem carregar imagem/descrição), ordenada por id."""
+    query = (
+        select(
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            Product.barcode,
+            Product.stock_quantity,
+            Product.min_stock,
+            Product.unit,
+            Product.price,
+            (Product.stock_quantity <= Product.min_stock).label("is_low_stock"),
+        )
+        .where(Product.is_active == True)
+        .order_by(Product.id.asc())
+    )
+    if low_stock_only:
+        query = query.where(Product.stock_quantity <= Product.min_stock)
+    if category_id:
+        query = query.where(Product.category_id == category_id)
+    term = normalize_search_text(search) if search else ""
+    if term:
+        query = query.where(Product.search_text.like(f"%{escape_like(term)}%", escape=LIKE_ESCAPE))
+    if after is not None:
+        query = query.where(Product.id > after)
+    return query
+
+
+def _stock_level(row):
+    level = dict(row._mapping)
+    # SQLite devolve a comparação como 0/1
+    level["is_low_stock"] = bool(level["is_low_stock"])
+    return level
+
+
+def count_active_products(db: Session):
+    """Total de produtos ativos, pelo mesmo cache de contagem da listagem de produtos."""
+    from backend.crud.products import count_products
+    return product_counts.get_or_set("active", lambda: count_products(db))
+
+
+def get_stock_levels(db: Session, low_stock_only: bool = False, search: str = None, category_id: int = None):
+    rows = db.execute(_stock_levels_query(low_stock_only, search, category_id))
+    return [_stock_level(row) for row in rows]
+
+
+def get_stock_levels_page(db: Session, low_stock_only: bool = False, search: str = None, category_id: int = None, after: int = None, limit: int = 100):
+    """Página por cursor (id do último produto); busca limit+1 linhas para saber se há próxima."""
+    rows = db.execute(_stock_levels_query(low_stock_only, search, category_id, after).limit(limit + 1)).all()
+    items = [_stock_level(row) for row in rows[:limit]]
+    next_cursor = items[-1]["product_id"] if len(rows) > limit else None
+    return items, next_cursor
+
+
+def iter_stock_levels(db: Session, low_stock_only: bool = False, search: str = None, category_id: int = None, batch_size: int = 1000):
+    """
+    Itera os níveis de estoque em lotes com cursor no servidor (yield_per),
+    sem materializar o catálogo inteiro em memória.
+    """
+    result = db.execute(
+        _stock_levels_query(low_stock_only, search, category_id).execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        yield [_stock_level(row) for row in partition]
+
+
+async def stream_stock_levels(db: AsyncSession, low_stock_only: bool = False, search: str = None, category_id: int = None, batch_size: int = 1000):
+    """Versão assíncrona de iter_stock_levels (AsyncSession.stream) para respostas em streaming."""
+    result = await db.stream(
+        _stock_levels_query(low_stock_only, search, category_id).execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield [_stock_level(row) for row in partition]
@@ -1,4 +1,12 @@
+from datetime import datetime
+from sqlalchemy import func, or_, literal, text, insert, select, Integer, Float
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from backend.core.count_cache import product_counts, dashboard_summaries
+from backend.core import blob_store
+from backend.core.etags import table_versions, product_key
+from backend.core.search import normalize_search_text, escape_like, fts5_phrase, product_search_text, LIKE_ESCAPE
+from backend.models.categories import Category
 from backend.models.products import Product
 from backend.schemas.products import ProductCreate, ProductUpdate
 
@@ -9,8 +17,31 @@ _ALLOWED_SORT_COLUMNS = {
     "min_stock", "sku", "barcode", "created_at", "updated_at",
 }
 
+# Colunas de ProductResponse, na ordem do schema; image_url sai de image_path (ver _product_row)
+_PRODUCT_ROW_COLUMNS = (
+    Product.name, Product.sku, Product.barcode, Product.description, Product.price,
+    Product.cost_price, Product.stock_quantity, Product.min_stock, Product.unit,
+    Product.category_id, Product.is_active, Product.id, Product.image_path.label("image_url"),
+    Product.created_at, Product.updated_at,
+)
 
-def get_products(db: Session, skip: int = 0, limit: int = 100, search: str = None, category_id: int = None, sort_by: str = "name", order: str = "asc"):
+
+# Colunas do export; os cabeçalhos são aceitos de volta por POST /products/import
+PRODUCT_EXPORT_COLUMNS = (
+    Product.id, Product.name, Product.sku, Product.barcode, Product.description, Product.price,
+    Product.cost_price, Product.stock_quantity, Product.min_stock, Product.unit,
+    Category.name.label("category"), Product.is_active, Product.created_at, Product.updated_at,
+)
+
+
+def _product_row(row) -> dict:
+    item = row._asdict()
+    item.pop("total", None)
+    item["image_url"] = blob_store.url_for(item["image_url"])
+    return item
+
+
+def _filtered_products(db: Session, search: str = None, category_id: int = None):
     query = db.query(Product).filter(Product.is_active == True)
     if search:
         query = query.filter(
@@ -20,29 +51,81 @@ def get_products(db: Session, skip: int = 0, limit: int = 100, search: str = Non
         )
     if category_id:
         query = query.filter(Product.category_id == category_id)
+    return query
+
+
+def _ranked_search(db: Session, query, search: str):
+    """
+    Aplica a busca indexada sobre products.search_text (sem acentos, minúsculas).
+    Retorna (query, expressão de relevância — maior é melhor).
+    - Postgres: substring ou word_similarity via índice GIN pg_trgm
+    - SQLite:   FTS5 trigram ordenado por bm25 (buscas com menos de 3 letras usam LIKE)
+    """
+    term = normalize_search_text(search)
+    like_term = f"%{escape_like(term)}%"
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        query = query.filter(or_(
+            Product.search_text.like(like_term, escape=LIKE_ESCAPE),
+            literal(term).op("<%")(Product.search_text),
+        ))
+        return query, func.word_similarity(term, Product.search_text)
+
+    if dialect == "sqlite" and len(term) >= 3:
+        fts = (
+            text("SELECT rowid AS product_id, bm25(products_fts) AS score FROM products_fts WHERE products_fts MATCH :match")
+            .bindparams(match=fts5_phrase(term))
+            .columns(product_id=Integer, score=Float)
+            .subquery("fts")
+        )
+        query = query.join(fts, fts.c.product_id == Product.id)
+        return query, -fts.c.score
+
+    query = query.filter(Product.search_text.like(like_term, escape=LIKE_ESCAPE))
+    return query, literal(0)
+
 
-    if sort_by not in _ALLOWED_SORT_COLUMNS:
-        sort_by = "name"
-    column = getattr(Product, sort_by)
-    if order.lower() == "desc":
-        query = query.order_by(column.desc())
+def get_products(db: Session, skip: int = 0, limit: int = 100, search: str = None, category_id: int = None, sort_by: str = "name", order: str = "asc", search_mode: str = "contains", projected: bool = False):
+    """
+    Retorna (items, total) em uma única ida ao banco.
+    - com filtros: total vem de count(*) OVER() na própria consulta da página
+    - sem filtros: total vem do cache de contagem (invalidado nas escritas)
+    - search_mode="ranked": busca indexada sem acentos, ordenada por relevância
+    - projected=True: items são dicts no formato de ProductResponse, sem objetos ORM
+    """
+    if search and search_mode == "ranked" and normalize_search_text(search):
+        query, rank = _ranked_search(db, _filtered_products(db, category_id=category_id), search)
+        ordered = query.order_by(rank.desc(), Product.name.asc(), Product.id.asc())
     else:
-        query = query.order_by(column.asc())
+        query = _filtered_products(db, search=search, category_id=category_id)
+
+        if sort_by not in _ALLOWED_SORT_COLUMNS:
+            sort_by = "name"
+        column = getattr(Product, sort_by)
+        if order.lower() == "desc":
+            ordered = query.order_by(column.desc(), Product.id.desc())
+        else:
+            ordered = query.order_by(column.asc(), Product.id.asc())
+
+    if projected:
+        ordered = ordered.with_entities(*_PRODUCT_ROW_COLUMNS)
 
-    return query.offset(skip).limit(limit).all()
+    if not search and not category_id:
+        total = product_counts.get_or_set("active", query.count)
+        rows = ordered.offset(skip).limit(limit).all()
+        return ([_product_row(row) for row in rows] if projected else rows), total
+
+    rows = ordered.add_columns(func.count().over().label("total")).offset(skip).limit(limit).all()
+    if rows:
+        items = [_product_row(row) for row in rows] if projected else [product for product, _ in rows]
+        return items, rows[0].total
+    # Página além do fim: a janela não devolve linhas, então o total precisa de um COUNT
+    return [], (query.count() if skip else 0)
 
 
 def count_products(db: Session, search: str = None, category_id: int = None):
-    query = db.query(Product).filter(Product.is_active == True)
-    if search:
-        query = query.filter(
-            (Product.name.ilike(f"%{search}%")) |
-            (Product.barcode.ilike(f"%{search}%")) |
-            (Product.sku.ilike(f"%{search}%"))
-        )
-    if category_id:
-        query = query.filter(Product.category_id == category_id)
-    return query.count()
+    return _filtered_products(db, search=search, category_id=category_id).count()
 
 
 def get_product(db: Session, product_id: int):
@@ -57,9 +140,14 @@ def get_product_by_sku(db: Session, sku: str):
     return db.query(Product).filter(Product.sku == sku).first()
 
 
-def create_product(db: Session, product: ProductCreate):
+def create_product(db: Session, product: ProductCreate, image_path: str = None):
+    """image_path: imagem de product.image_base64 já gravada no blob store (os routers async gravam fora do event loop)."""
     from backend.models.inventory import InventoryMovement, MovementType
-    db_product = Product(**product.model_dump())
+    data = product.model_dump()
+    image = data.pop("image_base64", None)
+    db_product = Product(**data)
+    if image:
+        db_product.image_path = image_path or blob_store.save_base64_image(image)
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
@@ -79,10 +167,98 @@ def create_product(db: Session, product: ProductCreate):
         db.add(initial_movement)
         db.commit()
 
+    product_counts.invalidate()
+    dashboard_summaries.invalidate()
+    table_versions.bump("products")
     return db_product
 
 
-def update_product(db: Session, product_id: int, product: ProductUpdate):
+async def stream_products_export(db: AsyncSession, created_from: datetime = None, created_before: datetime = None, batch_size: int = 2000):
+    """
+    Produtos em lotes de linhas (PRODUCT_EXPORT_COLUMNS), em ordem de id, lidos por
+    cursor no servidor (AsyncSession.stream + yield_per): memória constante.
+    """
+    query = select(*PRODUCT_EXPORT_COLUMNS).outerjoin(Category, Product.category_id == Category.id)
+    if created_from:
+        query = query.where(Product.created_at >= created_from)
+    if created_before:
+        query = query.where(Product.created_at < created_before)
+    result = await db.stream(query.order_by(Product.id).execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        yield partition
+
+
+def get_label_products(db: Session, product_ids: list = None, category_id: int = None):
+    """
+    (id, name, barcode, sku, price) para as etiquetas, só de produtos ativos: os
+    pedidos, na ordem (e com as repetições) de product_ids, ou os da categoria por nome.
+    """
+    query = db.query(Product.id, Product.name, Product.barcode, Product.sku, Product.price).filter(Product.is_active == True)
+    if product_ids is not None:
+        rows = {row.id: row for row in query.filter(Product.id.in_(set(product_ids)))}
+        return [rows[product_id] for product_id in product_ids if product_id in rows]
+    return query.filter(Product.category_id == category_id).order_by(Product.name, Product.id).all()
+
+
+def get_existing_codes(db: Session, barcodes, skus):
+    """(barcodes, skus) já cadastrados dentre os informados: uma consulta por índice único cada."""
+    existing_barcodes = {row[0] for row in db.query(Product.barcode).filter(Product.barcode.in_(barcodes))} if barcodes else set()
+    existing_skus = {row[0] for row in db.query(Product.sku).filter(Product.sku.in_(skus))} if skus else set()
+    return existing_barcodes, existing_skus
+
+
+def bulk_create_products(db: Session, rows: list, notes: str = "Estoque Inicial (Importação)") -> int:
+    """
+    Cadastra vários produtos (dicts no formato de ProductBase) em uma transação:
+    INSERTs de várias linhas com RETURNING (insertmanyvalues do SQLAlchemy) e as
+    movimentações de estoque inicial em seguida, como create_product faz uma a uma.
+    Unicidade de barcode/SKU é responsabilidade de quem chama (get_existing_codes);
+    uma violação levanta IntegrityError com nada gravado.
+    """
+    from backend.models.inventory import InventoryMovement, MovementType
+    if not rows:
+        return 0
+    for row in rows:
+        row["search_text"] = product_search_text(row.get("name"), row.get("barcode"), row.get("sku"))
+    try:
+        # No SQLite, sort_by_parameter_order faria o SQLAlchemy voltar a um INSERT por
+        # linha; lá os ids de uma transação crescem na ordem de inserção, então basta ordená-los
+        ordered = db.get_bind().dialect.name != "sqlite"
+        product_ids = db.scalars(
+            insert(Product).returning(Product.id, sort_by_parameter_order=ordered),
+            rows,
+        ).all()
+        if not ordered:
+            product_ids = sorted(product_ids)
+        movements = [
+            {
+                "product_id": product_id,
+                "quantity": row["stock_quantity"],
+                "movement_type": MovementType.IN,
+                "notes": notes,
+                "product_name_snapshot": row["name"],
+                "product_barcode_snapshot": row.get("barcode"),
+                "unit_price_snapshot": row["price"],
+                "unit_snapshot": row["unit"],
+            }
+            for product_id, row in zip(product_ids, rows)
+            if row["stock_quantity"] > 0
+        ]
+        if movements:
+            db.execute(insert(InventoryMovement), movements)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    product_counts.invalidate()
+    dashboard_summaries.invalidate()
+    table_versions.bump("products")
+    return len(product_ids)
+
+
+def update_product(db: Session, product_id: int, product: ProductUpdate, image_path: str = None):
+    """image_path: como em create_product."""
     from backend.models.inventory import InventoryMovement, MovementType
     db_product = db.query(Product).filter(Product.id == product_id).first()
     if not db_product:
@@ -90,6 +266,9 @@ def update_product(db: Session, product_id: int, product: ProductUpdate):
     
     old_stock = db_product.stock_quantity
     update_data = product.model_dump(exclude_unset=True)
+    if "image_base64" in update_data:
+        image = update_data.pop("image_base64")
+        update_data["image_path"] = (image_path or blob_store.save_base64_image(image)) if image else None
     
     for key, value in update_data.items():
         setattr(db_product, key, value)
@@ -115,6 +294,10 @@ def update_product(db: Session, product_id: int, product: ProductUpdate):
 
     db.commit()
     db.refresh(db_product)
+    if "is_active" in update_data:
+        product_counts.invalidate()
+    dashboard_summaries.invalidate()
+    table_versions.bump("products", product_key(product_id))
     return db_product
 
 
@@ -125,4 +308,7 @@ def delete_product(db: Session, product_id: int):
     db_product.is_active = False
     db.commit()
     db.refresh(db_product)
+    product_counts.invalidate()
+    dashboard_summaries.invalidate()
+    table_versions.bump("products", product_key(product_id))
     return db_product
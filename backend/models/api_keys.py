@@ -15,4 +15,6 @@ class ApiKey(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_used_at = Column(DateTime(timezone=True), nullable=True)
+    # Gravados em lote (core.api_key_cache.usage_buffer), não a cada chamada
+    usage_count = Column(Integer, nullable=True, default=0)
     expires_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from backend.core.database import Base
+
+
+class ImportJob(Base):
+    """Importação de produtos em segundo plano; o progresso é lido por qualquer worker."""
+    __tablename__ = "import_jobs"
+
+    # uuid: o id aparece na URL de acompanhamento
+    id = Column(String(36), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String, nullable=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, completed, failed
+    # Estimativa (linhas do arquivo menos o cabeçalho), conhecida antes de começar
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    created_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    # Primeiros erros por linha: [{"line": 12, "error": "..."}]
+    errors = Column(JSON, nullable=True, default=list)
+    message = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
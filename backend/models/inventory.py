@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.core.database import Base
@@ -32,6 +32,12 @@ class InventoryMovement(Base):
     product = relationship("Product", back_populates="movements")
     client = relationship("Client")
 
+    __table_args__ = (
+        # Paginação por cursor: ORDER BY created_at DESC, id DESC (com e sem filtro por produto)
+        Index("ix_inventory_movements_created_at_id", "created_at", "id"),
+        Index("ix_inventory_movements_product_id_created_at_id", "product_id", "created_at", "id"),
+    )
+
     @property
     def product_name(self):
         if self.product_name_snapshot and self.product_name_snapshot.strip():
@@ -40,4 +46,4 @@ class InventoryMovement(Base):
 
     @property
     def product_image(self):
-        return self.product.image_base64 if self.product else None
+        return self.product.image_url if self.product else None
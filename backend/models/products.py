@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, Index, DDL, event, inspect
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from backend.core.database import Base
+from backend.core.search import product_search_text
+from backend.core.blob_store import url_for
 
 
 class Product(Base):
@@ -18,10 +20,72 @@ class Product(Base):
     min_stock = Column(Float, nullable=False, default=0.0)
     unit = Column(String, nullable=False, default="UN")
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
-    image_base64 = Column(Text, nullable=True)
+    # Legado: imagens agora ficam no blob store (image_path); a coluna só é lida pela migração
+    image_base64 = deferred(Column(Text, nullable=True))
+    image_path = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    # nome + barcode + sku sem acentos e em minúsculas (ver core.search); só usado em filtros
+    search_text = deferred(Column(Text, nullable=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     category = relationship("Category", back_populates="products")
     movements = relationship("InventoryMovement", back_populates="product")
+
+    @property
+    def image_url(self):
+        return url_for(self.image_path)
+
+    __table_args__ = (
+        Index(
+            "ix_products_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+_SEARCH_TEXT_SOURCES = ("name", "barcode", "sku")
+
+
+@event.listens_for(Product, "before_insert")
+def _fill_search_text(mapper, connection, target):
+    target.search_text = product_search_text(target.name, target.barcode, target.sku)
+
+
+@event.listens_for(Product, "before_update")
+def _refresh_search_text(mapper, connection, target):
+    # Só recalcula quando nome/barcode/sku mudaram: uma baixa de estoque não
+    # regrava search_text (nem dispara o trigger do FTS no SQLite)
+    attrs = inspect(target).attrs
+    if any(getattr(attrs, name).history.has_changes() for name in _SEARCH_TEXT_SOURCES):
+        _fill_search_text(mapper, connection, target)
+
+
+# Postgres: o índice GIN com gin_trgm_ops precisa da extensão pg_trgm
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# SQLite (testes/dev): índice FTS5 trigram sobre search_text, mantido por triggers
+_SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "search_text, content='products', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF search_text ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO products_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+]
+for _statement in _SQLITE_FTS_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Product.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from backend.core.database import Base
+
+
+class Romaneio(Base):
+    """Cabeçalho de um romaneio: totais pré-calculados no momento da gravação das movimentações."""
+    __tablename__ = "romaneios"
+
+    id = Column(Integer, primary_key=True, index=True)
+    romaneio_id = Column(String, unique=True, nullable=False, index=True)
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=True, index=True)
+    customer_name = Column(String, nullable=True)
+    notes = Column(String, nullable=True)
+    item_count = Column(Integer, nullable=False, default=0)
+    total_value = Column(Float, nullable=False, default=0.0)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    client = relationship("Client")
+
+    __table_args__ = (
+        Index("ix_romaneios_created_at_id", "created_at", "id"),
+    )
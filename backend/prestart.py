@@ -0,0 +1,55 @@
+"""
+Preparação do banco antes de subir a API, executada uma única vez por deploy
+(não em cada worker do uvicorn):
+
+    python -m backend.prestart && uvicorn backend.server:app ...
+
+Cria o enum movementtype e as tabelas que faltarem e garante o usuário admin
+inicial (init_db). Também marca como falhas as importações de produtos que
+estavam rodando e limpa PROMETHEUS_MULTIPROC_DIR. Migrações de colunas
+continuam em database/migrate.py.
+"""
+import sys
+
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy.orm import configure_mappers
+
+from backend.config.logger import get_dynamic_logger, shutdown_logging
+from backend.core import database
+from backend.core.init_db import init_db
+from backend.core.metrics import clear_multiproc_dir
+from backend.models.users import User
+from backend.models.categories import Category
+from backend.models.products import Product
+from backend.models.inventory import InventoryMovement, MovementType
+from backend.models.clients import Client
+from backend.models.api_keys import ApiKey
+from backend.models.romaneios import Romaneio
+from backend.models.import_jobs import ImportJob
+from backend.crud.import_jobs import fail_unfinished_import_jobs
+
+logger = get_dynamic_logger("prestart")
+
+
+def prestart():
+    configure_mappers()
+    SAEnum(MovementType, name="movementtype").create(bind=database.engine, checkfirst=True)
+    database.Base.metadata.create_all(bind=database.engine, checkfirst=True)
+    init_db()
+    with database.SessionLocal() as db:
+        interrupted = fail_unfinished_import_jobs(db)
+    if interrupted:
+        logger.warning(f"{interrupted} importações interrompidas pelo último desligamento marcadas como falhas")
+    clear_multiproc_dir()
+    logger.info("Banco preparado: esquema criado e usuário admin verificado")
+
+
+if __name__ == "__main__":
+    try:
+        prestart()
+    except Exception as e:
+        logger.error(f"Falha na preparação do banco: {e}")
+        print(f"Falha na preparação do banco: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        shutdown_logging()
@@ -5,6 +5,7 @@ from backend.core.database import get_db
 from backend.core.security import verify_password, create_access_token, get_current_user, get_password_hash
 from backend.core.config import settings
 from backend.core.limiter import limiter
+from backend.core.user_cache import user_cache
 from backend.crud.users import get_user_by_email
 from backend.schemas.auth import Token, LoginRequest, UserResponse, UserUpdate, ForgotPasswordRequest, ResetPasswordRequest
 from backend.models.users import User
@@ -65,6 +66,9 @@ def get_me(request: Request, current_user: User = Depends(get_current_user)):
 @limiter.limit("60/minute")
 def update_me(request: Request, update_data: UserUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     try:
+        # current_user pode vir do cache (instância solta): altera a linha da sessão
+        old_email = current_user.email
+        current_user = db.get(User, current_user.id)
         if update_data.full_name is not None:
             current_user.full_name = update_data.full_name
         if update_data.email is not None:
@@ -79,6 +83,7 @@ def update_me(request: Request, update_data: UserUpdate, db: Session = Depends(g
             current_user.hashed_password = get_password_hash(update_data.password)
             
         db.commit()
+        user_cache.invalidate(old_email, current_user.email)
         db.refresh(current_user)
         logger.info(f"Usuário {current_user.email} atualizou o perfil.")
         return current_user
@@ -129,6 +134,7 @@ def reset_password(request: Request, data: ResetPasswordRequest, db: Session = D
         user.reset_token = None
         user.reset_token_expires = None
         db.commit()
+        user_cache.invalidate(user.email)
         
         logger.info(f"Senha redefinida com sucesso para o usuário {user.email}")
         return {"message": "Senha redefinida com sucesso"}
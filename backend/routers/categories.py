@@ -1,14 +1,14 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from backend.core.database import get_db
-from backend.core.security import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.database import get_async_db, get_async_read_db, run_sync
+from backend.core.security import get_async_current_user_flexible
 from backend.core.trial_utils import require_active_plan
 from backend.core.limiter import limiter
+from backend.core.etags import etag_for, not_modified
 from backend.models.users import User
 from backend.schemas.categories import CategoryCreate, CategoryUpdate, CategoryResponse, ReorderRequest
 from backend.crud import categories as crud
-from backend.models.categories import Category
 from backend.config.logger import get_dynamic_logger
 from backend.core.plans_config import PLANS_CONFIG
 
@@ -19,9 +19,16 @@ router = APIRouter(prefix="/categories")
 
 @router.get("/", response_model=List[CategoryResponse])
 @limiter.limit("200/minute")
-def list_categories(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def list_categories(request: Request, response: Response, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_read_db), current_user: User = Depends(get_async_current_user_flexible)):
     try:
-        return crud.get_categories(db, skip=skip, limit=limit)
+        etag = etag_for("categories", request=request)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        categories = await run_sync(db, crud.get_categories, skip=skip, limit=limit)
+        if etag:
+            response.headers["ETag"] = etag
+        return categories
     except HTTPException:
         raise
     except Exception as e:
@@ -31,9 +38,9 @@ def list_categories(request: Request, skip: int = 0, limit: int = 100, db: Sessi
 
 @router.get("/{category_id}", response_model=CategoryResponse)
 @limiter.limit("200/minute")
-def get_category(request: Request, category_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_category(request: Request, category_id: int, db: AsyncSession = Depends(get_async_read_db), current_user: User = Depends(get_async_current_user_flexible)):
     try:
-        category = crud.get_category(db, category_id)
+        category = await run_sync(db, crud.get_category, category_id)
         if not category:
             raise HTTPException(status_code=404, detail="Categoria não encontrada")
         return category
@@ -46,11 +53,11 @@ def get_category(request: Request, category_id: int, db: Session = Depends(get_d
 
 @router.post("/", response_model=CategoryResponse)
 @limiter.limit("30/minute")
-def create_category(request: Request, category: CategoryCreate, db: Session = Depends(get_db), current_user: User = Depends(require_active_plan)):
+async def create_category(request: Request, category: CategoryCreate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(require_active_plan)):
     try:
         # Validação de Limite do Plano
         plan = PLANS_CONFIG.get(current_user.plan_id, PLANS_CONFIG["trial"])
-        current_count = db.query(Category).count()
+        current_count = await run_sync(db, crud.count_categories)
         if current_count >= plan["limit_categories"]:
             raise HTTPException(
                 status_code=403, 
@@ -58,7 +65,7 @@ def create_category(request: Request, category: CategoryCreate, db: Session = De
             )
 
         logger.info(f"Usuário {current_user.email} criando categoria: {category.name}")
-        return crud.create_category(db, category)
+        return await run_sync(db, crud.create_category, category)
     except HTTPException:
         raise
     except Exception as e:
@@ -68,10 +75,10 @@ def create_category(request: Request, category: CategoryCreate, db: Session = De
 
 @router.post("/reorder")
 @limiter.limit("60/minute")
-def reorder_categories(request: Request, reorder_request: ReorderRequest, db: Session = Depends(get_db), current_user: User = Depends(require_active_plan)):
+async def reorder_categories(request: Request, reorder_request: ReorderRequest, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(require_active_plan)):
     try:
         logger.info(f"Usuário {current_user.email} reordenou {len(reorder_request.items)} categorias")
-        crud.reorder_categories(db, reorder_request.items)
+        await run_sync(db, crud.reorder_categories, reorder_request.items)
         return {"detail": "Ordem atualizada com sucesso"}
     except HTTPException:
         raise
@@ -82,10 +89,10 @@ def reorder_categories(request: Request, reorder_request: ReorderRequest, db: Se
 
 @router.put("/{category_id}", response_model=CategoryResponse)
 @limiter.limit("60/minute")
-def update_category(request: Request, category_id: int, category: CategoryUpdate, db: Session = Depends(get_db), current_user: User = Depends(require_active_plan)):
+async def update_category(request: Request, category_id: int, category: CategoryUpdate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(require_active_plan)):
     try:
         logger.info(f"Usuário {current_user.email} atualizou categoria ID={category_id}")
-        updated = crud.update_category(db, category_id, category)
+        updated = await run_sync(db, crud.update_category, category_id, category)
         if not updated:
             raise HTTPException(status_code=404, detail="Categoria não encontrada")
         return updated
@@ -98,10 +105,10 @@ def update_category(request: Request, category_id: int, category: CategoryUpdate
 
 @router.delete("/{category_id}", response_model=CategoryResponse)
 @limiter.limit("30/minute")
-def delete_category(request: Request, category_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_active_plan)):
+async def delete_category(request: Request, category_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(require_active_plan)):
     try:
         logger.warning(f"Usuário {current_user.email} deletou a categoria ID={category_id}")
-        deleted = crud.delete_category(db, category_id)
+        deleted = await run_sync(db, crud.delete_category, category_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Categoria não encontrada")
         return deleted
@@ -1,11 +1,12 @@
 import math
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session
-from backend.core.database import get_db
-from backend.core.security import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.database import get_async_db, get_async_read_db, run_sync
+from backend.core.security import get_async_current_user_flexible
 from backend.core.trial_utils import require_active_plan
 from backend.core.limiter import limiter
+from backend.core.serialization import FastJSONResponse, fast_json_enabled
 from backend.models.users import User
 from backend.schemas.clients import ClientCreate, ClientUpdate, ClientResponse
 from backend.crud import clients as crud
@@ -16,15 +17,15 @@ router = APIRouter(prefix="/clients")
 
 @router.post("/", response_model=ClientResponse)
 @limiter.limit("60/minute")
-def create_client(
+async def create_client(
     request: Request,
     client: ClientCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_active_plan)
 ):
     try:
         logger.info(f"Usuário {current_user.email} está criando o cliente {client.name}")
-        return crud.create_client(db, client, user_id=current_user.id)
+        return await run_sync(db, crud.create_client, client, user_id=current_user.id)
     except Exception as e:
         logger.error(f"Erro ao criar cliente: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
@@ -32,27 +33,28 @@ def create_client(
 
 @router.get("/")
 @limiter.limit("120/minute")
-def list_clients(
+async def list_clients(
     request: Request,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_async_current_user_flexible)
 ):
     try:
         skip = (page - 1) * per_page
-        total = crud.count_clients(db, user_id=current_user.id, search=search)
-        items = crud.get_clients(db, user_id=current_user.id, skip=skip, limit=per_page, search=search)
+        fast = fast_json_enabled()
+        items, total = await run_sync(db, crud.get_clients, user_id=current_user.id, skip=skip, limit=per_page, search=search, projected=fast)
         pages = math.ceil(total / per_page) if total > 0 else 1
         
-        return {
+        payload = {
             "items": items,
             "total": total,
             "page": page,
             "per_page": per_page,
             "pages": pages,
         }
+        return FastJSONResponse(payload) if fast else payload
     except Exception as e:
         logger.error(f"Erro ao listar clientes: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
@@ -60,15 +62,15 @@ def list_clients(
 
 @router.put("/{client_id}", response_model=ClientResponse)
 @limiter.limit("60/minute")
-def update_client(
+async def update_client(
     request: Request,
     client_id: int,
     client: ClientUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_active_plan)
 ):
     try:
-        db_client = crud.update_client(db, client_id, client, user_id=current_user.id)
+        db_client = await run_sync(db, crud.update_client, client_id, client, user_id=current_user.id)
         if not db_client:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
         logger.info(f"Usuário {current_user.email} atualizou o cliente {client_id}")
@@ -82,14 +84,14 @@ def update_client(
 
 @router.delete("/{client_id}", response_model=ClientResponse)
 @limiter.limit("60/minute")
-def delete_client(
+async def delete_client(
     request: Request,
     client_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_active_plan)
 ):
     try:
-        db_client = crud.delete_client(db, client_id, user_id=current_user.id)
+        db_client = await run_sync(db, crud.delete_client, client_id, user_id=current_user.id)
         if not db_client:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
         logger.info(f"Usuário {current_user.email} excluiu o cliente {client_id}")
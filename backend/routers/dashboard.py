@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from backend.core.database import get_read_db
+from backend.core.security import get_current_user
+from backend.core.limiter import limiter
+from backend.models.users import User
+from backend.schemas.dashboard import DashboardSummary
+from backend.crud import dashboard as crud
+from backend.config.logger import get_dynamic_logger
+
+logger = get_dynamic_logger("dashboard")
+router = APIRouter(prefix="/dashboard")
+
+
+@router.get("/summary", response_model=DashboardSummary)
+@limiter.limit("200/minute")
+def get_summary(request: Request, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    try:
+        return crud.get_summary(db, tenant_key=current_user.id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao calcular resumo do dashboard: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
@@ -0,0 +1,128 @@
+import csv
+import io
+import os
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.database import get_async_read_db
+from backend.core.security import get_async_current_user_flexible
+from backend.core.limiter import limiter
+from backend.core.serialization import dumps
+from backend.models.users import User
+from backend.models.inventory import MovementType
+from backend.crud import products as products_crud
+from backend.crud import inventory as inventory_crud
+from backend.crud.dashboard import store_day_bounds
+from backend.config.logger import get_dynamic_logger
+
+logger = get_dynamic_logger("exports")
+router = APIRouter(prefix="/exports")
+
+# Linhas por ida ao cursor do banco; cada lote vira um pedaço da resposta
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _date_range(start_date: Optional[date], end_date: Optional[date]):
+    """Datas inclusivas da query string (dias no fuso da loja) -> intervalo [início, fim) em UTC."""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date deve ser anterior ou igual a end_date")
+    created_from = store_day_bounds(start_date)[0] if start_date else None
+    created_before = store_day_bounds(end_date)[1] if end_date else None
+    return created_from, created_before
+
+
+async def _csv_stream(columns, batches, delimiter: str):
+    """Cabeçalho antes da consulta (primeiro byte imediato), depois um pedaço por lote do cursor."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+    writer.writerow([column.key for column in columns])
+    yield buffer.getvalue().encode()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+
+async def _ndjson_stream(columns, batches):
+    keys = [column.key for column in columns]
+    async for rows in batches:
+        yield b"".join(dumps(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+async def _logged(stream, filename: str):
+    """Depois do primeiro byte o status já foi enviado: uma falha só pode interromper a resposta."""
+    try:
+        async for chunk in stream:
+            yield chunk
+    except Exception as e:
+        logger.error(f"Erro durante a exportação de {filename}: {e}")
+        raise
+
+
+def _export_response(fmt: str, filename: str, columns, batches, delimiter: str):
+    stream = _ndjson_stream(columns, batches) if fmt == "ndjson" else _csv_stream(columns, batches, delimiter)
+    return StreamingResponse(
+        _logged(stream, filename),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"', "Cache-Control": "no-store"},
+    )
+
+
+@router.get("/products.{fmt}")
+@limiter.limit("10/minute")
+async def export_products(
+    request: Request,
+    fmt: str = Path(..., pattern="^(csv|ndjson)$", description="csv ou ndjson"),
+    start_date: Optional[date] = Query(None, description="Cadastrados a partir desta data (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Cadastrados até esta data (inclusive)"),
+    sep: str = Query(",", pattern="^[,;]$", description="Separador do CSV (';' para Excel em português)"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_async_current_user_flexible)
+):
+    """Catálogo completo em CSV ou NDJSON, em streaming a partir de um cursor no servidor."""
+    try:
+        created_from, created_before = _date_range(start_date, end_date)
+        batches = products_crud.stream_products_export(
+            db, created_from=created_from, created_before=created_before, batch_size=EXPORT_BATCH_SIZE
+        )
+        logger.info(f"Usuário {current_user.email} exportou produtos ({fmt})")
+        return _export_response(fmt, "produtos", products_crud.PRODUCT_EXPORT_COLUMNS, batches, sep)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao exportar produtos: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/movements.{fmt}")
+@limiter.limit("10/minute")
+async def export_movements(
+    request: Request,
+    fmt: str = Path(..., pattern="^(csv|ndjson)$", description="csv ou ndjson"),
+    start_date: Optional[date] = Query(None, description="Movimentações a partir desta data (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Movimentações até esta data (inclusive)"),
+    product_id: Optional[int] = Query(None, description="Filtrar por produto"),
+    movement_type: Optional[MovementType] = Query(None, description="Filtrar por tipo"),
+    sep: str = Query(",", pattern="^[,;]$", description="Separador do CSV (';' para Excel em português)"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_async_current_user_flexible)
+):
+    """Histórico de movimentações em CSV ou NDJSON, do mais antigo ao mais recente, em streaming."""
+    try:
+        created_from, created_before = _date_range(start_date, end_date)
+        batches = inventory_crud.stream_movements_export(
+            db, created_from=created_from, created_before=created_before,
+            product_id=product_id, movement_type=movement_type, batch_size=EXPORT_BATCH_SIZE,
+        )
+        logger.info(f"Usuário {current_user.email} exportou movimentações ({fmt})")
+        return _export_response(fmt, "movimentacoes", inventory_crud.MOVEMENT_EXPORT_COLUMNS, batches, sep)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao exportar movimentações: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
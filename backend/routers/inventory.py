@@ -1,30 +1,74 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session
-from backend.core.database import get_db
-from backend.core.security import get_current_user
+import json
+import math
+import os
+import re
+from datetime import timezone
+from typing import List, Optional, Union
+from zoneinfo import ZoneInfo
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.config import settings
+from backend.core.database import get_async_db, get_async_read_db, run_sync
+from backend.core.file_cache import FileCache
+from backend.core.render_pool import run_in_pool
+from backend.core.romaneio_document import FORMATS, LAYOUT_VERSION, render_romaneio_document
+from backend.core.security import get_async_current_user_flexible
 from backend.core.trial_utils import require_active_plan
 from backend.core.limiter import limiter
+from backend.core.etags import etag_for, not_modified
+from backend.core.serialization import FastJSONResponse, fast_json_enabled
 from backend.models.users import User
-from backend.schemas.inventory import InventoryMovementCreate, InventoryMovementResponse, StockLevel, InventoryMovementPaginatedResponse, MovementType
+from backend.schemas.inventory import InventoryMovementCreate, InventoryMovementResponse, StockLevel, StockLevelCursorResponse, InventoryMovementPaginatedResponse, InventoryMovementCursorResponse, MovementType, RomaneioCreate, RomaneioHeaderResponse, RomaneioResponse, RomaneioPaginatedResponse
 from backend.crud import inventory as crud
 from backend.config.logger import get_dynamic_logger
 
 logger = get_dynamic_logger("inventory")
 router = APIRouter(prefix="/inventory")
 
+# Acima deste número de produtos ativos a lista completa de estoque é enviada em streaming
+STOCK_LEVELS_STREAM_THRESHOLD = int(os.getenv("STOCK_LEVELS_STREAM_THRESHOLD", "5000"))
+
+# PDF/PNG já renderizados, compartilhados pelos workers do host
+document_cache = FileCache(
+    "romaneio_documents",
+    max_files=settings.ROMANEIO_DOCUMENT_CACHE_MAX_FILES,
+    max_bytes=settings.ROMANEIO_DOCUMENT_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def _validated(model, fn):
+    """
+    Converte o retorno do CRUD no schema ainda dentro do greenlet (run_sync):
+    relações como movement.client podem precisar de uma consulta ao serem lidas,
+    o que não é possível depois, na serialização feita pelo FastAPI.
+    """
+    def call(db, *args, **kwargs):
+        result = fn(db, *args, **kwargs)
+        return model.model_validate(result) if result is not None else None
+    return call
+
+
+def _validated_page(model, fn):
+    def call(db, *args, **kwargs):
+        items, extra = fn(db, *args, **kwargs)
+        return [model.model_validate(item) for item in items], extra
+    return call
+
 
 @router.post("/movements", response_model=InventoryMovementResponse)
 @limiter.limit("60/minute")
-def create_movement(
+async def create_movement(
     request: Request,
     movement: InventoryMovementCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_active_plan)
 ):
     try:
         logger.info(f"Usuário {current_user.email} registrou movimentação de {movement.quantity} para o produto ID={movement.product_id} do tipo {movement.movement_type}")
-        return crud.create_movement(db, movement, user_id=current_user.id)
+        return await run_sync(db, _validated(InventoryMovementResponse, crud.create_movement), movement, user_id=current_user.id)
     except HTTPException:
         raise
     except Exception as e:
@@ -32,33 +76,182 @@ def create_movement(
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/movements", response_model=InventoryMovementPaginatedResponse)
+@router.post("/romaneios", response_model=RomaneioResponse)
+@limiter.limit("60/minute")
+async def create_romaneio(
+    request: Request,
+    romaneio: RomaneioCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_active_plan)
+):
+    try:
+        logger.info(f"Usuário {current_user.email} finalizou romaneio com {len(romaneio.items)} itens")
+        return await run_sync(db, _validated(RomaneioResponse, crud.create_romaneio), romaneio, user_id=current_user.id)
+    except crud.MissingProductsError as e:
+        raise HTTPException(status_code=404, detail=f"Produtos não encontrados: {', '.join(map(str, e.product_ids))}")
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Romaneio já registrado")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao registrar romaneio: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/romaneios", response_model=RomaneioPaginatedResponse)
 @limiter.limit("60/minute")
-def list_movements(
+async def list_romaneios(
+    request: Request,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    client_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_async_current_user_flexible)
+):
+    try:
+        skip = (page - 1) * per_page
+        items, total = await run_sync(db, _validated_page(RomaneioHeaderResponse, crud.get_romaneios), client_id=client_id, skip=skip, limit=per_page)
+        return {
+            "items": items,
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "pages": math.ceil(total / per_page) if total > 0 else 1,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao listar romaneios: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/romaneios/{romaneio_id}", response_model=RomaneioResponse)
+@limiter.limit("120/minute")
+async def get_romaneio(request: Request, romaneio_id: str, db: AsyncSession = Depends(get_async_read_db), current_user: User = Depends(get_async_current_user_flexible)):
+    try:
+        romaneio = await run_sync(db, _validated(RomaneioResponse, crud.get_romaneio), romaneio_id)
+        if not romaneio:
+            raise HTTPException(status_code=404, detail="Romaneio não encontrado")
+        return romaneio
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao buscar romaneio {romaneio_id}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+def build_document(romaneio: RomaneioResponse) -> dict:
+    """Dados do romaneio que entram no documento, em tipos simples (vão para o pool de processos)."""
+    created_at = romaneio.created_at
+    if created_at is not None:
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        created_at = created_at.astimezone(ZoneInfo(settings.STORE_TIMEZONE))
+    return {
+        "romaneio_id": romaneio.romaneio_id,
+        "customer_name": romaneio.customer_name or (romaneio.client.name if romaneio.client else None),
+        "date": created_at.strftime("%d/%m/%Y %H:%M:%S") if created_at else "",
+        "notes": romaneio.notes,
+        "items": [
+            {
+                "quantity": item.quantity,
+                "unit": item.unit_snapshot,
+                "name": item.product_name,
+                "barcode": item.product_barcode_snapshot,
+                "price": item.unit_price_snapshot,
+            }
+            for item in romaneio.items
+        ],
+    }
+
+
+@router.get("/romaneios/{romaneio_id}/document")
+@limiter.limit("30/minute")
+async def get_romaneio_document(
+    request: Request,
+    romaneio_id: str,
+    fmt: str = Query("pdf", alias="format", pattern="^(pdf|png)$"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_async_current_user_flexible)
+):
+    """
+    Documento do romaneio renderizado no servidor (PDF A4 ou PNG). A chave do cache
+    é o próprio conteúdo do documento: uma saída avulsa que entra no romaneio depois
+    gera outro documento, sem invalidação explícita.
+    """
+    try:
+        romaneio = await run_sync(db, _validated(RomaneioResponse, crud.get_romaneio), romaneio_id)
+        if not romaneio:
+            raise HTTPException(status_code=404, detail="Romaneio não encontrado")
+        document = build_document(romaneio)
+        key = f"v{LAYOUT_VERSION}:{fmt}:{json.dumps(document, sort_keys=True, ensure_ascii=False)}"
+        content = await to_thread.run_sync(document_cache.get, key)
+        if content is None:
+            content = await run_in_pool(render_romaneio_document, document, fmt)
+            await to_thread.run_sync(document_cache.put, key, content)
+        return Response(
+            content=content,
+            media_type=FORMATS[fmt],
+            headers={
+                "Content-Disposition": f'inline; filename="romaneio-{re.sub(r"[^A-Za-z0-9_-]", "_", romaneio_id)}.{fmt}"',
+                "Cache-Control": "private, max-age=300",
+            },
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao gerar documento do romaneio {romaneio_id}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/movements", response_model=Union[InventoryMovementPaginatedResponse, InventoryMovementCursorResponse])
+@limiter.limit("60/minute")
+async def list_movements(
     request: Request,
     product_id: Optional[int] = Query(None),
     search: Optional[str] = Query(None),
     movement_type: Optional[MovementType] = Query(None),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (com total) ou cursor (keyset, sem total)"),
+    after: Optional[int] = Query(None, description="next_cursor da página anterior; ativa o modo cursor"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_async_current_user_flexible)
 ):
     try:
-        items, total = crud.get_movements(
-            db, 
-            product_id=product_id, 
+        # Caminho rápido: linhas projetadas já no formato da resposta, sem validar item a item
+        fast = fast_json_enabled()
+        if pagination == "cursor" or after is not None:
+            items, next_cursor = await run_sync(
+                db,
+                crud.get_movements_page if fast else _validated_page(InventoryMovementResponse, crud.get_movements_page),
+                product_id=product_id,
+                search=search,
+                movement_type=movement_type,
+                after=after,
+                limit=limit,
+                projected=fast
+            )
+            payload = {"items": items, "next_cursor": next_cursor, "per_page": limit}
+            return FastJSONResponse(payload) if fast else payload
+
+        items, total = await run_sync(
+            db,
+            crud.get_movements if fast else _validated_page(InventoryMovementResponse, crud.get_movements),
+            product_id=product_id,
             search=search, 
             movement_type=movement_type, 
             skip=skip, 
-            limit=limit
+            limit=limit,
+            projected=fast
         )
-        return {
+        payload = {
             "items": items,
             "total": total,
             "page": (skip // limit) + 1,
             "per_page": limit
         }
+        return FastJSONResponse(payload) if fast else payload
     except HTTPException:
         raise
     except Exception as e:
@@ -66,11 +259,51 @@ def list_movements(
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
-@router.get("/stock-levels", response_model=List[StockLevel])
+async def _stream_stock_levels(db: AsyncSession, **filters):
+    """Array JSON gerado lote a lote a partir do cursor do banco: memória constante."""
+    yield b"["
+    first = True
+    async for batch in crud.stream_stock_levels(db, **filters):
+        if not batch:
+            continue
+        chunk = json.dumps(batch, ensure_ascii=False, separators=(",", ":"))[1:-1]
+        yield (chunk if first else "," + chunk).encode()
+        first = False
+    yield b"]"
+
+
+@router.get("/stock-levels", response_model=Union[List[StockLevel], StockLevelCursorResponse])
 @limiter.limit("200/minute")
-def get_stock_levels(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_stock_levels(
+    request: Request,
+    response: Response,
+    low_stock_only: bool = Query(False, description="Apenas produtos com estoque <= mínimo"),
+    search: Optional[str] = Query(None, description="Busca por nome, código de barras ou SKU"),
+    category_id: Optional[int] = Query(None, description="Filtrar por categoria"),
+    after: Optional[int] = Query(None, description="next_cursor da página anterior; ativa a paginação por cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Tamanho da página; ativa a paginação por cursor"),
+    stream: bool = Query(False, description="Força a resposta completa em streaming"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_async_current_user_flexible)
+):
     try:
-        return crud.get_stock_levels(db)
+        etag = etag_for("products", "categories", request=request)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        headers = {"ETag": etag} if etag else {}
+        response.headers.update(headers)
+
+        filters = {"low_stock_only": low_stock_only, "search": search, "category_id": category_id}
+        if after is not None or limit is not None:
+            per_page = limit or 100
+            items, next_cursor = await run_sync(db, crud.get_stock_levels_page, after=after, limit=per_page, **filters)
+            return {"items": items, "next_cursor": next_cursor, "per_page": per_page}
+
+        if stream or await run_sync(db, crud.count_active_products) > STOCK_LEVELS_STREAM_THRESHOLD:
+            return StreamingResponse(_stream_stock_levels(db, **filters), media_type="application/json", headers=headers)
+
+        return await run_sync(db, crud.get_stock_levels, **filters)
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,19 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from backend.core.config import settings
+from backend.core.metrics import render_latest
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics(request: Request, authorization: Optional[str] = Header(None)):
+    """Métricas Prometheus. Exige Authorization: Bearer <METRICS_TOKEN>; sem token configurado, não existe."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not authorization or not hmac.compare_digest(authorization.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Token de métricas inválido", headers={"WWW-Authenticate": "Bearer"})
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
@@ -7,6 +7,7 @@ from backend.models.products import Product
 from backend.models.categories import Category
 from pydantic import BaseModel
 from backend.core.plans_config import PLANS_CONFIG
+from backend.core.user_cache import user_cache
 
 router = APIRouter(prefix="/plans")
 
@@ -37,6 +38,8 @@ def subscribe(request: SubscribeRequest, db: Session = Depends(get_db), current_
     if request.plan_id not in PLANS_CONFIG:
         raise HTTPException(status_code=400, detail="Plano inválido")
     
-    current_user.plan_id = request.plan_id
+    user = db.get(User, current_user.id)
+    user.plan_id = request.plan_id
     db.commit()
+    user_cache.invalidate(user.email)
     return {"message": f"Assinatura atualizada para {request.plan_id}", "plan_id": request.plan_id}
@@ -1,26 +1,38 @@
+import asyncio
 import math
 import os
-from PIL import Image
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, File, UploadFile
-from sqlalchemy.orm import Session
-from backend.core.database import get_db
-from backend.core.security import get_current_user
+from anyio import to_thread
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, File, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.database import get_async_db, get_async_read_db, run_sync
+from backend.core.security import get_async_current_user_flexible
 from backend.core.trial_utils import require_active_plan
 from backend.core.limiter import limiter
+from backend.core.etags import etag_for, not_modified, product_key
+from backend.core.serialization import FastJSONResponse, fast_json_enabled
 from backend.models.users import User
-from backend.schemas.products import ProductCreate, ProductUpdate, ProductResponse
+from backend.schemas.products import ProductCreate, ProductUpdate, ProductResponse, ProductPaginatedResponse, LabelSheetRequest
+from backend.schemas.import_jobs import ImportJobResponse
+from backend.core import blob_store, labels, product_import
+from backend.core.read_routing import read_only
+from backend.core.render_pool import run_in_pool
+from backend.core.blob_store import InvalidImageError
 from backend.crud import products as crud
+from backend.crud import import_jobs as import_jobs_crud
 from backend.config.logger import get_dynamic_logger
 from backend.core.plans_config import PLANS_CONFIG
 
 logger = get_dynamic_logger("products")
 router = APIRouter(prefix="/products")
 
+# Etiquetas por pedido (produtos x cópias)
+LABELS_MAX_PER_REQUEST = int(os.getenv("LABELS_MAX_PER_REQUEST", "2000"))
 
-@router.get("/")
+
+@router.get("/", response_model=ProductPaginatedResponse)
 @limiter.limit("200/minute")
-def list_products(
+async def list_products(
     request: Request,
     page: int = Query(1, ge=1, description="Número da página"),
     per_page: int = Query(20, ge=1, le=100, description="Itens por página"),
@@ -28,21 +40,23 @@ def list_products(
     category_id: Optional[int] = Query(None, description="Filtrar por categoria"),
     sort_by: str = Query("name", description="Coluna para ordenação"),
     order: str = Query("asc", description="Ordem: asc ou desc"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    search_mode: str = Query("contains", pattern="^(contains|ranked)$", description="contains (ILIKE) ou ranked (indexada, sem acentos, por relevância)"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_async_current_user_flexible)
 ):
     try:
         skip = (page - 1) * per_page
-        total = crud.count_products(db, search=search, category_id=category_id)
-        items = crud.get_products(db, skip=skip, limit=per_page, search=search, category_id=category_id, sort_by=sort_by, order=order)
+        fast = fast_json_enabled()
+        items, total = await run_sync(db, crud.get_products, skip=skip, limit=per_page, search=search, category_id=category_id, sort_by=sort_by, order=order, search_mode=search_mode, projected=fast)
         pages = math.ceil(total / per_page) if total > 0 else 1
-        return {
+        payload = {
             "items": items,
             "total": total,
             "page": page,
             "per_page": per_page,
             "pages": pages,
         }
+        return FastJSONResponse(payload) if fast else payload
     except HTTPException:
         raise
     except Exception as e:
@@ -52,11 +66,18 @@ def list_products(
 
 @router.get("/barcode/{barcode}", response_model=ProductResponse)
 @limiter.limit("200/minute")
-def get_product_by_barcode(request: Request, barcode: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_product_by_barcode(request: Request, response: Response, barcode: str, db: AsyncSession = Depends(get_async_read_db), current_user: User = Depends(get_async_current_user_flexible)):
     try:
-        product = crud.get_product_by_barcode(db, barcode)
+        # O id só é conhecido depois da consulta: vale a versão da tabela
+        etag = etag_for("products", request=request)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        product = await run_sync(db, crud.get_product_by_barcode, barcode)
         if not product:
             raise HTTPException(status_code=404, detail="Produto não encontrado com este código de barras")
+        if etag:
+            response.headers["ETag"] = etag
         return product
     except HTTPException:
         raise
@@ -67,11 +88,17 @@ def get_product_by_barcode(request: Request, barcode: str, db: Session = Depends
 
 @router.get("/{product_id}", response_model=ProductResponse)
 @limiter.limit("200/minute")
-def get_product(request: Request, product_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_product(request: Request, response: Response, product_id: int, db: AsyncSession = Depends(get_async_read_db), current_user: User = Depends(get_async_current_user_flexible)):
     try:
-        product = crud.get_product(db, product_id)
+        etag = etag_for(product_key(product_id), request=request)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        product = await run_sync(db, crud.get_product, product_id)
         if not product:
             raise HTTPException(status_code=404, detail="Produto não encontrado")
+        if etag:
+            response.headers["ETag"] = etag
         return product
     except HTTPException:
         raise
@@ -80,13 +107,20 @@ def get_product(request: Request, product_id: int, db: Session = Depends(get_db)
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
+async def _store_image(image_base64: Optional[str]) -> Optional[str]:
+    """Decodifica (Pillow) e grava a imagem no blob store numa thread, fora do event loop."""
+    if not image_base64:
+        return None
+    return await to_thread.run_sync(blob_store.save_base64_image, image_base64)
+
+
 @router.post("/", response_model=ProductResponse)
 @limiter.limit("30/minute")
-def create_product(request: Request, product: ProductCreate, db: Session = Depends(get_db), current_user: User = Depends(require_active_plan)):
+async def create_product(request: Request, product: ProductCreate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(require_active_plan)):
     try:
         # Validação de Limite do Plano
         plan = PLANS_CONFIG.get(current_user.plan_id, PLANS_CONFIG["trial"])
-        current_count = crud.count_products(db)
+        current_count = await run_sync(db, crud.count_products)
         if current_count >= plan["limit_products"]:
             raise HTTPException(
                 status_code=403, 
@@ -95,14 +129,17 @@ def create_product(request: Request, product: ProductCreate, db: Session = Depen
 
         logger.info(f"Usuário {current_user.email} criando novo produto: sku={product.sku} barcode={product.barcode}")
         if product.barcode:
-            existing = crud.get_product_by_barcode(db, product.barcode)
+            existing = await run_sync(db, crud.get_product_by_barcode, product.barcode)
             if existing:
                 raise HTTPException(status_code=400, detail="Código de barras já cadastrado")
         if product.sku:
-            existing = crud.get_product_by_sku(db, product.sku)
+            existing = await run_sync(db, crud.get_product_by_sku, product.sku)
             if existing:
                 raise HTTPException(status_code=400, detail="SKU já cadastrado")
-        return crud.create_product(db, product)
+        image_path = await _store_image(product.image_base64)
+        return await run_sync(db, crud.create_product, product, image_path=image_path)
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -110,15 +147,122 @@ def create_product(request: Request, product: ProductCreate, db: Session = Depen
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
+@router.post("/import", response_model=ImportJobResponse, status_code=202)
+@limiter.limit("5/minute")
+async def import_products(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="Planilha .csv ou .xlsx; cabeçalho com name/nome e, opcionalmente, sku, barcode, price, stock_quantity..."),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_active_plan)
+):
+    """Agenda a importação e responde na hora; acompanhe em GET /products/import/{id}."""
+    try:
+        fmt = product_import.detect_format(file.filename, file.content_type)
+        if fmt is None:
+            raise HTTPException(status_code=400, detail="Formato não suportado: envie um arquivo .csv ou .xlsx")
+        if fmt == "xlsx" and not product_import.xlsx_supported():
+            raise HTTPException(status_code=400, detail="Importação de XLSX indisponível no servidor; envie um arquivo .csv")
+
+        plan = PLANS_CONFIG.get(current_user.plan_id, PLANS_CONFIG["trial"])
+        remaining = plan["limit_products"] - await run_sync(db, crud.count_products)
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=403,
+                detail=f"Limite de produtos atingido para o plano {current_user.plan_id.capitalize()}. (Limite: {plan['limit_products']})"
+            )
+
+        path = await product_import.save_upload(file, fmt)
+        total_rows = await to_thread.run_sync(product_import.count_rows, path, fmt)
+        job = await run_sync(db, import_jobs_crud.create_import_job, user_id=current_user.id, filename=file.filename, total_rows=total_rows)
+        background_tasks.add_task(product_import.run_product_import, job.id, path, fmt, db.bind, remaining)
+        logger.info(f"Usuário {current_user.email} iniciou a importação {job.id} ({file.filename}, ~{total_rows} linhas)")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao iniciar importação de produtos: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/import/{job_id}", response_model=ImportJobResponse)
+@limiter.limit("120/minute")
+async def get_import_job(request: Request, job_id: str, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_async_current_user_flexible)):
+    try:
+        job = await run_sync(db, import_jobs_crud.get_import_job, job_id, user_id=current_user.id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Importação não encontrada")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao consultar importação {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.post("/labels", dependencies=[Depends(read_only)])
+@limiter.limit("10/minute")
+async def create_labels(request: Request, sheet: LabelSheetRequest, db: AsyncSession = Depends(get_async_read_db), current_user: User = Depends(get_async_current_user_flexible)):
+    """Folha de etiquetas (PDF A4 de 21 por página ou ZPL) com o código de cada produto."""
+    try:
+        products = await run_sync(db, crud.get_label_products, product_ids=sheet.product_ids, category_id=sheet.category_id)
+        if sheet.product_ids is not None:
+            missing = set(sheet.product_ids) - {product.id for product in products}
+            if missing:
+                raise HTTPException(status_code=404, detail=f"Produtos não encontrados: {', '.join(map(str, sorted(missing)))}")
+        if not products:
+            raise HTTPException(status_code=404, detail="Nenhum produto ativo na categoria")
+        if len(products) * sheet.copies > LABELS_MAX_PER_REQUEST:
+            raise HTTPException(status_code=400, detail=f"Máximo de {LABELS_MAX_PER_REQUEST} etiquetas por pedido")
+
+        items, invalid = [], []
+        for product in products:
+            try:
+                value = labels.label_value(sheet.symbology, product.barcode, product.sku)
+            except ValueError:
+                invalid.append(product.id)
+                continue
+            items.append({"name": product.name, "price": product.price, "value": value})
+        if invalid:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Produtos sem código válido para {labels.SYMBOLOGIES[sheet.symbology]}: {', '.join(map(str, sorted(set(invalid))))}",
+            )
+
+        if sheet.format == "zpl":
+            content = labels.render_zpl(items, sheet.symbology, sheet.copies)
+        else:
+            sequence = [item for item in items for _ in range(sheet.copies)]
+            pages = await asyncio.gather(*(
+                run_in_pool(labels.render_label_page, sequence[start:start + labels.LABELS_PER_PAGE], sheet.symbology)
+                for start in range(0, len(sequence), labels.LABELS_PER_PAGE)
+            ))
+            content = labels.build_label_pdf(pages)
+        logger.info(f"Usuário {current_user.email} gerou {len(items) * sheet.copies} etiquetas {sheet.symbology} em {sheet.format}")
+        return Response(
+            content=content,
+            media_type=labels.FORMATS[sheet.format],
+            headers={"Content-Disposition": f'attachment; filename="etiquetas.{sheet.format}"'},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao gerar etiquetas: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
 @router.put("/{product_id}", response_model=ProductResponse)
 @limiter.limit("60/minute")
-def update_product(request: Request, product_id: int, product: ProductUpdate, db: Session = Depends(get_db), current_user: User = Depends(require_active_plan)):
+async def update_product(request: Request, product_id: int, product: ProductUpdate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(require_active_plan)):
     try:
         logger.info(f"Usuário {current_user.email} modificou o produto ID={product_id}")
-        updated = crud.update_product(db, product_id, product)
+        image_path = await _store_image(product.image_base64)
+        updated = await run_sync(db, crud.update_product, product_id, product, image_path=image_path)
         if not updated:
             raise HTTPException(status_code=404, detail="Produto não encontrado")
         return updated
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -128,10 +272,10 @@ def update_product(request: Request, product_id: int, product: ProductUpdate, db
 
 @router.delete("/{product_id}", response_model=ProductResponse)
 @limiter.limit("30/minute")
-def delete_product(request: Request, product_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_active_plan)):
+async def delete_product(request: Request, product_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(require_active_plan)):
     try:
         logger.warning(f"Usuário {current_user.email} solicitou exclusão do produto ID={product_id}")
-        deleted = crud.delete_product(db, product_id)
+        deleted = await run_sync(db, crud.delete_product, product_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Produto não encontrado")
         return deleted
@@ -14,6 +14,7 @@ class ApiKeyResponse(BaseModel):
     is_active: bool
     created_at: Optional[datetime] = None
     last_used_at: Optional[datetime] = None
+    usage_count: Optional[int] = None
     expires_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
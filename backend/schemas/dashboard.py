@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from datetime import date
+
+
+class DashboardSummary(BaseModel):
+    total_products: int
+    low_stock_count: int
+    stock_value: float
+    today: date
+    today_movements: int
+    today_romaneios: int
+    # Romaneios do dia + movimentações avulsas (cada romaneio conta uma vez)
+    today_operations: int
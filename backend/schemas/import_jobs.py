@@ -0,0 +1,24 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
+from datetime import datetime
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportJobResponse(BaseModel):
+    id: str
+    filename: Optional[str] = None
+    status: str
+    total_rows: Optional[int] = None
+    processed_rows: int = 0
+    created_count: int = 0
+    error_count: int = 0
+    errors: List[ImportRowError] = []
+    message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
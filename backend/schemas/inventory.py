@@ -39,7 +39,7 @@ class InventoryMovementResponse(InventoryMovementBase):
 
     @property
     def product_image(self) -> Optional[str]:
-        return self.product.image_base64 if self.product else None
+        return self.product.image_url if self.product else None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -51,6 +51,56 @@ class InventoryMovementPaginatedResponse(BaseModel):
     per_page: int
 
 
+class InventoryMovementCursorResponse(BaseModel):
+    items: List[InventoryMovementResponse]
+    next_cursor: Optional[int] = None
+    per_page: int
+
+
+class RomaneioItem(BaseModel):
+    product_id: int = Field(..., gt=0)
+    quantity: float = Field(..., gt=0, le=999_999_999)
+    product_name_snapshot: Optional[str] = Field(None, max_length=250)
+    product_barcode_snapshot: Optional[str] = Field(None, max_length=100)
+    unit_price_snapshot: Optional[float] = Field(None, ge=0)
+    unit_snapshot: Optional[str] = Field(None, max_length=20)
+
+
+class RomaneioCreate(BaseModel):
+    romaneio_id: Optional[str] = Field(None, max_length=100)
+    client_id: Optional[int] = None
+    customer_name: Optional[str] = Field(None, max_length=150)
+    notes: Optional[str] = Field(None, max_length=1000)
+    items: List[RomaneioItem] = Field(..., min_length=1, max_length=500)
+
+
+class RomaneioHeaderResponse(BaseModel):
+    id: int
+    romaneio_id: str
+    client_id: Optional[int] = None
+    customer_name: Optional[str] = None
+    notes: Optional[str] = None
+    item_count: int
+    total_value: float
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    client: Optional[ClientInfo] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RomaneioResponse(RomaneioHeaderResponse):
+    items: List[InventoryMovementResponse]
+
+
+class RomaneioPaginatedResponse(BaseModel):
+    items: List[RomaneioHeaderResponse]
+    total: int
+    page: int
+    per_page: int
+    pages: int
+
+
 class StockLevel(BaseModel):
     product_id: int
     product_name: str
@@ -62,3 +112,9 @@ class StockLevel(BaseModel):
     is_low_stock: bool
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class StockLevelCursorResponse(BaseModel):
+    items: List[StockLevel]
+    next_cursor: Optional[int] = None
+    per_page: int
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Literal, Optional, List
 from datetime import datetime
 
 # Tamanho máximo de imagem base64 ≈ 3 MB em base64
@@ -17,12 +17,12 @@ class ProductBase(BaseModel):
     min_stock: float = Field(0.0, ge=0)
     unit: str = Field("UN", max_length=20)
     category_id: Optional[int] = None
-    image_base64: Optional[str] = Field(None, max_length=_MAX_IMAGE_BASE64)
     is_active: bool = True
 
 
 class ProductCreate(ProductBase):
-    pass
+    # Recebida como base64/data URL e gravada no blob store; a resposta traz image_url
+    image_base64: Optional[str] = Field(None, max_length=_MAX_IMAGE_BASE64)
 
 
 class ProductUpdate(BaseModel):
@@ -42,7 +42,31 @@ class ProductUpdate(BaseModel):
 
 class ProductResponse(ProductBase):
     id: int
+    image_url: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ProductPaginatedResponse(BaseModel):
+    items: List[ProductResponse]
+    total: int
+    page: int
+    per_page: int
+    pages: int
+
+
+class LabelSheetRequest(BaseModel):
+    # Produtos na ordem das etiquetas, ou todos os ativos de uma categoria (por nome)
+    product_ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    category_id: Optional[int] = None
+    symbology: Literal["ean13", "code128", "qr"] = "ean13"
+    format: Literal["pdf", "zpl"] = "pdf"
+    copies: int = Field(1, ge=1, le=100)
+
+    @model_validator(mode="after")
+    def one_source(self):
+        if (self.product_ids is None) == (self.category_id is None):
+            raise ValueError("Informe product_ids ou category_id")
+        return self
@@ -1,24 +1,29 @@
 import os
-import time
 import warnings
+from contextlib import asynccontextmanager
 
 warnings.filterwarnings("ignore", category=DeprecationWarning, message="'crypt' is deprecated")
 
-from fastapi import FastAPI, Request, HTTPException, status
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from backend.config.logger import get_dynamic_logger
 from backend.core.limiter import limiter
 from backend.core import database
+from backend.core.read_routing import ReadYourWritesMiddleware
+from backend.core.middleware import CompressionMiddleware, MaxBodySizeMiddleware, RequestLogMiddleware
+from backend.core.metrics import MetricsMiddleware, mark_process_dead, record_rate_limited
+from backend.core.render_pool import shutdown_pool
 from backend.models.users import User
 from backend.models.categories import Category
 from backend.models.products import Product
 from backend.models.inventory import InventoryMovement
 from backend.models.clients import Client
 from backend.models.api_keys import ApiKey
+from backend.models.romaneios import Romaneio
 from sqlalchemy.orm import configure_mappers
 
 logger = get_dynamic_logger("server")
@@ -26,22 +31,31 @@ configure_mappers()
 
 from backend.core.router_loader import include_routers
 
-if os.getenv("TESTING") != "1":
-    from backend.models.inventory import MovementType as _MT
-    from sqlalchemy import Enum as _SAEnum
-    _mt_enum = _SAEnum(_MT, name="movementtype")
-    _mt_enum.create(bind=database.engine, checkfirst=True)
-    database.Base.metadata.create_all(bind=database.engine, checkfirst=True)
-    from backend.core.init_db import init_db
-    init_db()
-
 # Em produção (ENVIRONMENT=production) desativa /docs, /redoc e /openapi.json
 _is_production = os.getenv("ENVIRONMENT", "development").lower() == "production"
 _docs_url     = None if _is_production else "/docs"
 _redoc_url    = None if _is_production else "/redoc"
 _openapi_url  = None if _is_production else "/openapi.json"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # O uvicorn só aceita conexões depois do startup: as primeiras requisições
+    # já encontram DB_POOL_MIN_CONNECTIONS conexões abertas em cada pool
+    if os.getenv("TESTING") != "1":
+        try:
+            await database.warm_up_pools()
+            logger.info(f"Pools aquecidos: {database.pool_status()}")
+        except Exception as e:
+            logger.error(f"Erro ao aquecer pool de conexões: {e}")
+    yield
+    shutdown_pool()
+    await database.dispose_engines()
+    mark_process_dead()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="RomaneioRapido API",
     description="API para gestão de estoque e inventário",
     version="1.0.0",
@@ -52,17 +66,14 @@ app = FastAPI(
 
 _MAX_BODY_SIZE = int(os.getenv("MAX_BODY_SIZE_BYTES", 10 * 1024 * 1024))  # 10 MB
 
-class MaxBodySizeMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        content_length = request.headers.get("content-length")
-        if content_length and int(content_length) > _MAX_BODY_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="Payload excede o limite máximo permitido.",
-            )
-        return await call_next(request)
-
-app.add_middleware(MaxBodySizeMiddleware)
+app.add_middleware(MaxBodySizeMiddleware, max_size=_MAX_BODY_SIZE)
+# /uploads são imagens endereçadas por conteúdo, já comprimidas
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE_BYTES", "1024")),
+    exclude_paths=("/uploads",),
+)
+app.add_middleware(ReadYourWritesMiddleware)
 
 _allowed_hosts_env = os.getenv("ALLOWED_HOSTS", "")
 if _allowed_hosts_env:
@@ -79,7 +90,12 @@ app.add_middleware(TrustedHostMiddleware, allowed_hosts=_allowed_hosts)
 
 # Rate Limiting
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+def _rate_limit_exceeded(request: Request, exc: RateLimitExceeded):
+    record_rate_limited(request.scope)
+    return _rate_limit_exceeded_handler(request, exc)
+
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded)
 
 # ── CORS ─────────────────────────────────────────────────────────────────────
 cors_origins_env = os.getenv("CORS_ORIGINS", "")
@@ -100,24 +116,43 @@ app.add_middleware(
     allow_headers=["Authorization", "Content-Type", "X-API-Key"],
 )
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    logger.info(f"{request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.4f}s")
-    return response
+app.add_middleware(RequestLogMiddleware, logger=logger)
+
+# Por último = mais externo: mede a requisição inteira, incluindo os outros middlewares
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/health", tags=["Health"])
 def health_check():
     """Endpoint para verificação de saúde da API"""
     return {"status": "healthy", "service": "RomaneioRapido API"}
 
+@app.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    """Prontidão: o banco responde? Inclui o estado dos pools de conexão deste worker."""
+    try:
+        await database.ping_database()
+    except Exception as e:
+        logger.error(f"Banco indisponível na verificação de prontidão: {e}")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "pools": database.pool_status()},
+        )
+    return {"status": "ready", "pools": database.pool_status()}
+
 from fastapi.staticfiles import StaticFiles
+from backend.core.blob_store import UPLOADS_DIR
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Arquivos endereçados por conteúdo nunca mudam: o navegador pode guardá-los para sempre."""
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
 
 # Servir arquivos de upload
-import os
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+os.makedirs(UPLOADS_DIR, exist_ok=True)
+app.mount("/uploads", ImmutableStaticFiles(directory=UPLOADS_DIR), name="uploads")
 
 include_routers(app)
@@ -0,0 +1,108 @@
+"""
+Relatório do tempo de subida de um worker da API.
+
+1. Importação: roda `python -X importtime -c "import backend.server"` em um
+   processo novo e lista os módulos mais caros (tempo acumulado).
+2. Exec até pronto: sobe `uvicorn backend.server:app` BENCH_RUNS vezes e mede do
+   exec até o primeiro 200 em /health (inclui o aquecimento do pool no lifespan).
+   Meta: menos de 1 s.
+
+Uso:
+    python -m backend.startup_profile
+    python -m backend.startup_profile --no-db     # sem aquecer o pool (sem Postgres local)
+    python -m backend.startup_profile --top 30 --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+TARGET_SECONDS = 1.0
+
+
+def _env(no_db: bool):
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "startup-profile")
+    if no_db:
+        env["DB_POOL_MIN_CONNECTIONS"] = "0"
+    return env
+
+
+def import_profile(env, top: int):
+    """[(acumulado_ms, próprio_ms, módulo)] ordenado do mais caro, e o total."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.server"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            own, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((int(cumulative) / 1000, int(own) / 1000, name.rstrip()))
+        except ValueError:
+            continue  # cabeçalho
+    total = next((cumulative for cumulative, _, name in rows if name.strip() == "backend.server"), 0.0)
+    rows.sort(reverse=True)
+    return rows[:top], total
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_ready(env, timeout: float = 30.0):
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn terminou com código {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"API não respondeu em {timeout:.0f}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de subida do worker da API")
+    parser.add_argument("--top", type=int, default=20, help="módulos listados no perfil de importação")
+    parser.add_argument("--runs", type=int, default=int(os.getenv("BENCH_RUNS", "3")), help="subidas medidas")
+    parser.add_argument("--no-db", action="store_true", help="não aquece o pool de conexões")
+    args = parser.parse_args()
+    env = _env(args.no_db)
+
+    rows, total = import_profile(env, args.top)
+    print(f"Importação de backend.server: {total:.0f} ms")
+    print(f"{'acumulado ms':>12}  {'próprio ms':>10}  módulo")
+    for cumulative, own, name in rows:
+        print(f"{cumulative:12.1f}  {own:10.1f}  {name}")
+
+    timings = [time_to_ready(env) for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print()
+    print(f"Exec até pronto (/health 200), {args.runs} subidas: "
+          f"mediana {median * 1000:.0f} ms, mín {min(timings) * 1000:.0f} ms, máx {max(timings) * 1000:.0f} ms")
+    print(f"Meta < {TARGET_SECONDS:.0f} s: {'OK' if median < TARGET_SECONDS else 'ACIMA'}")
+    return 0 if median < TARGET_SECONDS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import pytest
+import os
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from backend.server import app
+from backend.core.database import Base, get_db
+from backend.core.security import create_access_token
+from backend.core.user_cache import UserCache, user_cache
+from backend.models.users import User
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_auth_db.sqlite"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    if os.path.exists("./test_auth_db.sqlite"):
+        os.remove("./test_auth_db.sqlite")
+    Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    if previous is not None:
+        app.dependency_overrides[get_db] = previous
+    engine.dispose()
+    if os.path.exists("./test_auth_db.sqlite"):
+        os.remove("./test_auth_db.sqlite")
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def auth_header():
+    db = TestingSessionLocal()
+    user = User(
+        email="auth@user.com",
+        hashed_password="hashed_password",
+        full_name="Auth User",
+        plan_id="trial",
+        is_active=True
+    )
+    db.add(user)
+    db.commit()
+    token = create_access_token(data={"sub": user.email})
+    db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_me_is_served_from_cache_and_invalidated_on_update(auth_header):
+    user_selects = []
+
+    def count_user_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            user_selects.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_user_selects)
+    try:
+        assert client.get("/auth/me", headers=auth_header).json()["full_name"] == "Auth User"
+        assert client.get("/auth/me", headers=auth_header).status_code == 200
+        assert len(user_selects) == 1
+
+        response = client.put("/auth/me", json={"full_name": "Novo Nome"}, headers=auth_header)
+        assert response.status_code == 200
+        assert response.json()["full_name"] == "Novo Nome"
+        assert client.get("/auth/me", headers=auth_header).json()["full_name"] == "Novo Nome"
+
+        response = client.patch("/plans/subscribe", json={"plan_id": "pro"}, headers=auth_header)
+        assert response.status_code == 200
+        assert client.get("/auth/me", headers=auth_header).json()["plan_id"] == "pro"
+    finally:
+        event.remove(engine, "before_cursor_execute", count_user_selects)
+
+
+def test_invalidation_reaches_other_workers(tmp_path):
+    worker_a = UserCache(ttl=60, max_entries=10, directory=str(tmp_path))
+    worker_b = UserCache(ttl=60, max_entries=10, directory=str(tmp_path))
+    user = User(id=1, email="a@b.com", full_name="A", is_admin=False, plan_id="trial", is_active=True)
+
+    worker_a.put("a@b.com", user, worker_a.clock())
+    assert worker_a.get("a@b.com").full_name == "A"
+
+    worker_b.invalidate("a@b.com")
+    assert worker_a.get("a@b.com") is None
+
+
+def test_cache_is_size_bounded(tmp_path):
+    cache = UserCache(ttl=60, max_entries=2, directory=str(tmp_path))
+    for i in range(3):
+        cache.put(f"u{i}@b.com", User(id=i, email=f"u{i}@b.com", full_name="U", plan_id="trial"), cache.clock())
+    assert cache.get("u0@b.com") is None
+    assert cache.get("u2@b.com") is not None
+
+
+def test_api_key_auth_is_cached_and_revocation_is_immediate(auth_header):
+    from backend.core.api_key_cache import usage_buffer
+    from backend.crud.api_keys import create_api_key, get_user_by_api_key, revoke_api_key
+    from backend.models.api_keys import ApiKey
+
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.email == "auth@user.com").first()
+    api_key, raw_key = create_api_key(db, user.id, "Integração")
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement.lstrip().split()[0].upper())
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(3):
+            owner, _ = get_user_by_api_key(db, raw_key)
+            assert owner.id == user.id
+        assert "UPDATE" not in statements and "INSERT" not in statements
+        assert len(statements) <= 2
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    usage_buffer.flush()
+    db.expire_all()
+    stored = db.get(ApiKey, api_key.id)
+    assert stored.usage_count == 3
+    assert stored.last_used_at is not None
+
+    revoke_api_key(db, user.id, api_key.id)
+    assert get_user_by_api_key(db, raw_key) is None
+    db.close()
@@ -2,9 +2,10 @@ import pytest
 import os
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from backend.server import app
-from backend.core.database import Base, get_db
+from backend.core.database import Base, get_db, get_async_db
 from backend.core.security import create_access_token
 from backend.models.users import User
 from backend.models.categories import Category
@@ -16,6 +17,8 @@ from backend.models.clients import Client
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.sqlite"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_db.sqlite")
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_database():
@@ -43,7 +46,13 @@ def override_get_db():
     finally:
         db.close()
 
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 client = TestClient(app)
 
 @pytest.fixture
@@ -0,0 +1,113 @@
+import pytest
+import os
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.server import app
+from backend.core.database import Base, get_db
+from backend.core.count_cache import CountCache, dashboard_summaries
+from backend.core.security import create_access_token
+from backend.crud.dashboard import store_today_bounds
+from backend.models.users import User
+from backend.models.products import Product
+from backend.models.inventory import InventoryMovement, MovementType
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_dashboard_db.sqlite"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    if os.path.exists("./test_dashboard_db.sqlite"):
+        os.remove("./test_dashboard_db.sqlite")
+    Base.metadata.create_all(bind=engine)
+    dashboard_summaries.invalidate()
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    if previous is not None:
+        app.dependency_overrides[get_db] = previous
+    engine.dispose()
+    if os.path.exists("./test_dashboard_db.sqlite"):
+        os.remove("./test_dashboard_db.sqlite")
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def auth_header():
+    db = TestingSessionLocal()
+    user = User(
+        email="dashboard@user.com",
+        hashed_password="hashed_password",
+        full_name="Dashboard User",
+        plan_id="pro",
+        is_active=True
+    )
+    db.add(user)
+    db.commit()
+    token = create_access_token(data={"sub": user.email})
+    db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_store_today_uses_store_timezone():
+    # 02:00 UTC ainda é o dia anterior em São Paulo (UTC-3)
+    today, start, end = store_today_bounds(datetime(2026, 10, 18, 2, 0, tzinfo=timezone.utc))
+    assert today.isoformat() == "2026-10-17"
+    assert start == datetime(2026, 10, 17, 3, 0, tzinfo=timezone.utc)
+    assert end == datetime(2026, 10, 18, 3, 0, tzinfo=timezone.utc)
+
+
+def test_count_cache_invalidates_other_workers(tmp_path):
+    # Duas instâncias no mesmo diretório de marcadores = dois workers
+    worker_a = CountCache("counts", ttl=60, directory=str(tmp_path))
+    worker_b = CountCache("counts", ttl=60, directory=str(tmp_path))
+    assert worker_a.get_or_set("tenant", lambda: 1) == 1
+    assert worker_a.get_or_set("tenant", lambda: 2) == 1
+
+    worker_b.invalidate("tenant")
+    assert worker_a.get_or_set("tenant", lambda: 3) == 3
+
+    worker_b.invalidate()
+    assert worker_a.get_or_set("tenant", lambda: 4) == 4
+
+
+def test_dashboard_summary(auth_header):
+    db = TestingSessionLocal()
+    ok = Product(name="Ok", price=2.0, stock_quantity=10.0, min_stock=1.0)
+    low = Product(name="Baixo", price=5.0, stock_quantity=1.0, min_stock=3.0)
+    inactive = Product(name="Inativo", price=100.0, stock_quantity=10.0, is_active=False)
+    db.add_all([ok, low, inactive])
+    db.flush()
+    _, start, _ = store_today_bounds()
+    db.add_all([
+        InventoryMovement(product_id=ok.id, quantity=1, movement_type=MovementType.OUT, romaneio_id="ROM-A", created_at=start + timedelta(minutes=1)),
+        InventoryMovement(product_id=low.id, quantity=1, movement_type=MovementType.OUT, romaneio_id="ROM-A", created_at=start + timedelta(minutes=1)),
+        InventoryMovement(product_id=ok.id, quantity=2, movement_type=MovementType.IN, created_at=start + timedelta(minutes=2)),
+        # Ontem no fuso da loja: fica de fora
+        InventoryMovement(product_id=ok.id, quantity=3, movement_type=MovementType.IN, created_at=start - timedelta(minutes=1)),
+    ])
+    db.commit()
+    db.close()
+
+    response = client.get("/dashboard/summary", headers=auth_header)
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["total_products"] == 2
+    assert summary["low_stock_count"] == 1
+    assert summary["stock_value"] == pytest.approx(25.0)
+    assert summary["today_movements"] == 3
+    assert summary["today_romaneios"] == 1
+    assert summary["today_operations"] == 2
@@ -0,0 +1,137 @@
+import asyncio
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.server import app
+from backend.core.database import Base, get_db, get_async_db
+from backend.core.security import create_access_token
+from backend.models.categories import Category
+from backend.models.clients import Client
+from backend.models.inventory import InventoryMovement, MovementType
+from backend.models.products import Product
+from backend.models.users import User
+from backend.routers import exports
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_exports_db.sqlite"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_exports_db.sqlite")
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    if os.path.exists("./test_exports_db.sqlite"):
+        os.remove("./test_exports_db.sqlite")
+    Base.metadata.create_all(bind=engine)
+    previous = app.dependency_overrides.get(get_db)
+    previous_async = app.dependency_overrides.get(get_async_db)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield
+    if previous is not None:
+        app.dependency_overrides[get_db] = previous
+    if previous_async is not None:
+        app.dependency_overrides[get_async_db] = previous_async
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+    if os.path.exists("./test_exports_db.sqlite"):
+        os.remove("./test_exports_db.sqlite")
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def auth_header():
+    db = TestingSessionLocal()
+    user = User(email="exports@user.com", hashed_password="hashed_password", full_name="Exports User", is_active=True)
+    category = Category(name="Papelaria")
+    db.add_all([user, category])
+    db.commit()
+    customer = Client(user_id=user.id, name="Mercado Central")
+    products = [
+        Product(name=f"Produto {i}", sku=f"EXP-{i}", barcode=f"789100000{i:03d}", price=1.5 + i,
+                category_id=category.id if i % 2 else None, created_at=datetime(2026, 1, 1 + i))
+        for i in range(5)
+    ]
+    db.add_all([customer, *products])
+    db.commit()
+    db.add_all([
+        InventoryMovement(product_id=products[i % 5].id, quantity=1 + i, movement_type=MovementType.OUT if i % 3 else MovementType.IN,
+                          product_name_snapshot=products[i % 5].name, client_id=customer.id if i % 2 else None,
+                          notes="linha, com vírgula" if i == 0 else None, created_at=datetime(2026, 2, 1 + i, 10))
+        for i in range(12)
+    ])
+    db.commit()
+    token = create_access_token(data={"sub": user.email})
+    db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_export_products_csv_and_ndjson(auth_header, monkeypatch):
+    # lotes pequenos: a resposta é montada em vários pedaços do cursor
+    monkeypatch.setattr(exports, "EXPORT_BATCH_SIZE", 2)
+    response = client.get("/exports/products.csv", headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="produtos.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["sku"] for row in rows] == [f"EXP-{i}" for i in range(5)]
+    assert [row["category"] for row in rows[:2]] == ["", "Papelaria"]
+
+    # Dias no fuso da loja: meia-noite UTC de 02/01 (EXP-1) ainda é 01/01 em São Paulo
+    lines = client.get("/exports/products.ndjson", params={"start_date": "2026-01-02", "end_date": "2026-01-03"}, headers=auth_header).text.splitlines()
+    assert [json.loads(line)["sku"] for line in lines] == ["EXP-2", "EXP-3"]
+
+    semicolon = client.get("/exports/products.csv", params={"sep": ";"}, headers=auth_header).text
+    assert semicolon.splitlines()[0].startswith("id;name;sku;barcode")
+
+    assert client.get("/exports/products.xml", headers=auth_header).status_code == 422
+    assert client.get("/exports/products.csv").status_code == 401
+
+
+def test_export_movements_filters(auth_header, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_BATCH_SIZE", 5)
+    response = client.get("/exports/movements.csv", headers=auth_header)
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 12
+    assert rows[0]["notes"] == "linha, com vírgula"
+    assert rows[0]["movement_type"] == "IN"
+    assert rows[1]["client_name"] == "Mercado Central"
+    assert [row["created_at"][:10] for row in rows] == sorted(row["created_at"][:10] for row in rows)
+
+    lines = client.get(
+        "/exports/movements.ndjson",
+        params={"start_date": "2026-02-03", "end_date": "2026-02-08", "movement_type": "OUT"},
+        headers=auth_header,
+    ).text.splitlines()
+    items = [json.loads(line) for line in lines]
+    assert [item["quantity"] for item in items] == [3, 5, 6, 8]
+    assert all(item["movement_type"] == "OUT" for item in items)
+
+    empty = client.get("/exports/movements.csv", params={"start_date": "2030-01-01"}, headers=auth_header)
+    assert empty.text.strip().split(",")[:3] == ["id", "created_at", "movement_type"]
+    assert client.get("/exports/movements.csv", params={"start_date": "2026-02-05", "end_date": "2026-02-01"}, headers=auth_header).status_code == 400
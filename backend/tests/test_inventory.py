@@ -0,0 +1,335 @@
+import pytest
+import os
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from backend.server import app
+from backend.core.database import Base, get_db, get_async_db
+from backend.core.count_cache import product_counts
+from backend.core.security import create_access_token
+from backend.models.users import User
+from backend.models.products import Product
+from backend.models.inventory import InventoryMovement
+from backend.models.clients import Client
+from backend.core.config import settings
+from backend.core.file_cache import FileCache
+from backend.routers import inventory as inventory_router
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_inventory_db.sqlite"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_inventory_db.sqlite")
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    if os.path.exists("./test_inventory_db.sqlite"):
+        os.remove("./test_inventory_db.sqlite")
+    Base.metadata.create_all(bind=engine)
+    # contagens em cache são por processo; outro módulo de teste usa outro banco
+    product_counts.invalidate()
+    previous = app.dependency_overrides.get(get_db)
+    previous_async = app.dependency_overrides.get(get_async_db)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield
+    if previous is not None:
+        app.dependency_overrides[get_db] = previous
+    if previous_async is not None:
+        app.dependency_overrides[get_async_db] = previous_async
+    engine.dispose()
+    async_engine.sync_engine.dispose()
+    if os.path.exists("./test_inventory_db.sqlite"):
+        os.remove("./test_inventory_db.sqlite")
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def auth_header():
+    db = TestingSessionLocal()
+    user = User(
+        email="inventory@user.com",
+        hashed_password="hashed_password",
+        full_name="Inventory User",
+        is_active=True
+    )
+    db.add(user)
+    db.commit()
+    token = create_access_token(data={"sub": user.email})
+    db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def products():
+    db = TestingSessionLocal()
+    offset = db.query(Product).count()
+    items = [
+        Product(name=f"Produto Romaneio {i}", barcode=f"ROM-TEST-{offset + i}", price=10.0 * (i + 1), stock_quantity=50.0, unit="UN")
+        for i in range(3)
+    ]
+    db.add_all(items)
+    db.commit()
+    ids = [p.id for p in items]
+    db.close()
+    return ids
+
+
+def test_create_romaneio_batch(auth_header, products):
+    payload = {
+        "client_id": None,
+        "notes": "Romaneio: Cliente Teste",
+        "items": [{"product_id": pid, "quantity": 2 + i} for i, pid in enumerate(products)],
+    }
+    response = client.post("/inventory/romaneios", json=payload, headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["romaneio_id"].startswith("ROM-")
+    assert [item["product_id"] for item in data["items"]] == products
+    assert all(item["movement_type"] == "OUT" for item in data["items"])
+    assert data["items"][0]["product_name_snapshot"] == "Produto Romaneio 0"
+    assert data["items"][1]["unit_price_snapshot"] == 20.0
+
+    db = TestingSessionLocal()
+    stocks = {p.id: p.stock_quantity for p in db.query(Product).filter(Product.id.in_(products))}
+    assert stocks == {products[0]: 48.0, products[1]: 47.0, products[2]: 46.0}
+    assert db.query(InventoryMovement).filter(InventoryMovement.romaneio_id == data["romaneio_id"]).count() == 3
+    db.close()
+
+
+def test_create_romaneio_missing_product_is_atomic(auth_header, products):
+    payload = {
+        "romaneio_id": "ROM-ATOMICO",
+        "items": [{"product_id": products[0], "quantity": 1}, {"product_id": 999999, "quantity": 1}],
+    }
+    response = client.post("/inventory/romaneios", json=payload, headers=auth_header)
+    assert response.status_code == 404
+    assert "999999" in response.json()["detail"]
+
+    db = TestingSessionLocal()
+    assert db.query(Product).filter(Product.id == products[0]).first().stock_quantity == 50.0
+    assert db.query(InventoryMovement).filter(InventoryMovement.romaneio_id == "ROM-ATOMICO").count() == 0
+    db.close()
+
+
+def test_romaneio_headers_and_detail(auth_header, products):
+    payload = {
+        "customer_name": "Cliente Header",
+        "items": [{"product_id": pid, "quantity": 1} for pid in products],
+    }
+    created = client.post("/inventory/romaneios", json=payload, headers=auth_header).json()
+    assert created["item_count"] == 3
+    assert created["total_value"] == 60.0
+    assert created["customer_name"] == "Cliente Header"
+
+    response = client.get("/inventory/romaneios", params={"per_page": 1}, headers=auth_header)
+    assert response.status_code == 200
+    page = response.json()
+    assert page["items"][0]["romaneio_id"] == created["romaneio_id"]
+    assert page["items"][0]["item_count"] == 3
+    assert "items" not in page["items"][0]
+    assert page["pages"] == page["total"]
+
+    response = client.get(f"/inventory/romaneios/{created['romaneio_id']}", headers=auth_header)
+    assert response.status_code == 200
+    detail = response.json()
+    assert [line["product_id"] for line in detail["items"]] == products
+
+    assert client.get("/inventory/romaneios/ROM-INEXISTENTE", headers=auth_header).status_code == 404
+
+
+def test_single_movement_updates_romaneio_header(auth_header, products):
+    for pid in products[:2]:
+        response = client.post("/inventory/movements", json={
+            "product_id": pid,
+            "quantity": 2,
+            "movement_type": "OUT",
+            "romaneio_id": "ROM-LEGADO",
+            "notes": "Romaneio: Cliente Legado ",
+        }, headers=auth_header)
+        assert response.status_code == 200
+
+    detail = client.get("/inventory/romaneios/ROM-LEGADO", headers=auth_header).json()
+    assert detail["item_count"] == 2
+    assert detail["total_value"] == 2 * 10.0 + 2 * 20.0
+    assert detail["customer_name"] == "Cliente Legado"
+
+
+def test_create_romaneio_duplicate_id_is_rejected(auth_header, products):
+    payload = {"romaneio_id": "ROM-DUPLICADO", "items": [{"product_id": products[0], "quantity": 1}]}
+    assert client.post("/inventory/romaneios", json=payload, headers=auth_header).status_code == 200
+    assert client.post("/inventory/romaneios", json=payload, headers=auth_header).status_code == 409
+
+    db = TestingSessionLocal()
+    assert db.query(Product).filter(Product.id == products[0]).first().stock_quantity == 49.0
+    db.close()
+
+
+def test_romaneio_document_pdf_png_and_cache(auth_header, products, monkeypatch, tmp_path):
+    # Renderiza numa thread (sem subir processos no teste) e conta as renderizações
+    monkeypatch.setattr(settings, "RENDER_POOL_WORKERS", 0)
+    monkeypatch.setattr(inventory_router, "document_cache", FileCache("romaneio_documents", 100, directory=str(tmp_path)))
+    renders = []
+
+    def counting_render(document, fmt):
+        renders.append(fmt)
+        return render(document, fmt)
+
+    render = inventory_router.render_romaneio_document
+    monkeypatch.setattr(inventory_router, "render_romaneio_document", counting_render)
+
+    payload = {"romaneio_id": "ROM-DOC", "customer_name": "Padaria São João", "items": [{"product_id": pid, "quantity": 1.5} for pid in products]}
+    assert client.post("/inventory/romaneios", json=payload, headers=auth_header).status_code == 200
+
+    response = client.get("/inventory/romaneios/ROM-DOC/document", headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert 'filename="romaneio-ROM-DOC.pdf"' in response.headers["content-disposition"]
+    assert response.content.startswith(b"%PDF-") and response.content.rstrip().endswith(b"%%EOF")
+    assert "content-encoding" not in response.headers  # páginas já comprimidas: o middleware não recomprime
+
+    png = client.get("/inventory/romaneios/ROM-DOC/document", params={"format": "png"}, headers=auth_header)
+    assert png.headers["content-type"] == "image/png"
+    assert png.content.startswith(b"\x89PNG\r\n\x1a\n")
+
+    # Segunda vez sai do cache; uma saída avulsa no mesmo romaneio muda o documento
+    assert client.get("/inventory/romaneios/ROM-DOC/document", headers=auth_header).content == response.content
+    assert renders == ["pdf", "png"]
+    client.post("/inventory/movements", json={"product_id": products[0], "quantity": 1, "movement_type": "OUT", "romaneio_id": "ROM-DOC"}, headers=auth_header)
+    assert client.get("/inventory/romaneios/ROM-DOC/document", headers=auth_header).content != response.content
+    assert renders == ["pdf", "png", "pdf"]
+
+    assert client.get("/inventory/romaneios/ROM-DOC/document", params={"format": "docx"}, headers=auth_header).status_code == 422
+    assert client.get("/inventory/romaneios/ROM-INEXISTENTE/document", headers=auth_header).status_code == 404
+
+
+def test_document_cache_caps_bytes_and_survives_full_disk(auth_header, products, monkeypatch, tmp_path):
+    cache = FileCache("romaneio_documents", 100, max_bytes=2500, directory=str(tmp_path / "cache"))
+    for index in range(4):
+        cache.put(f"doc-{index}", b"x" * 1000)
+        os.utime(cache._path(f"doc-{index}"), ns=(index, index))
+    cache.prune()
+    # Os mais antigos saem até caber em max_bytes
+    assert [cache.get(f"doc-{index}") is not None for index in range(4)] == [False, False, True, True]
+
+    # Disco cheio: o documento é entregue sem ir para o cache
+    def full_disk(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(settings, "RENDER_POOL_WORKERS", 0)
+    monkeypatch.setattr(inventory_router, "document_cache", cache)
+    monkeypatch.setattr("backend.core.file_cache.tempfile.mkstemp", full_disk)
+    payload = {"romaneio_id": "ROM-DISCO", "items": [{"product_id": products[1], "quantity": 1}]}
+    assert client.post("/inventory/romaneios", json=payload, headers=auth_header).status_code == 200
+    response = client.get("/inventory/romaneios/ROM-DISCO/document", headers=auth_header)
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF-")
+
+
+def test_movements_cursor_pagination(auth_header, products):
+    expected = client.get("/inventory/movements", params={"limit": 1000}, headers=auth_header).json()
+    assert expected["total"] >= 5
+    expected_ids = [item["id"] for item in expected["items"]]
+
+    seen, after = [], None
+    while True:
+        params = {"pagination": "cursor", "limit": 2}
+        if after:
+            params["after"] = after
+        response = client.get("/inventory/movements", params=params, headers=auth_header)
+        assert response.status_code == 200
+        page = response.json()
+        assert "total" not in page
+        seen.extend(item["id"] for item in page["items"])
+        after = page["next_cursor"]
+        if after is None:
+            break
+
+    assert seen == expected_ids
+
+
+def test_stock_levels_filters_and_cursor(auth_header, products):
+    db = TestingSessionLocal()
+    low = db.get(Product, products[0])
+    low.stock_quantity, low.min_stock = 1.0, 5.0
+    db.commit()
+    db.close()
+
+    full = client.get("/inventory/stock-levels", headers=auth_header)
+    assert full.status_code == 200
+    levels = full.json()
+    assert isinstance(levels, list)
+    assert {"product_id", "product_name", "barcode", "stock_quantity", "min_stock", "unit", "price", "is_low_stock"} <= set(levels[0])
+
+    low_only = client.get("/inventory/stock-levels", params={"low_stock_only": True}, headers=auth_header).json()
+    assert products[0] in [level["product_id"] for level in low_only]
+    assert all(level["is_low_stock"] is True for level in low_only)
+
+    found = client.get("/inventory/stock-levels", params={"search": "produto romaneio"}, headers=auth_header).json()
+    assert set(products) <= {level["product_id"] for level in found}
+
+    seen, after = [], None
+    while True:
+        params = {"limit": 2}
+        if after:
+            params["after"] = after
+        page = client.get("/inventory/stock-levels", params=params, headers=auth_header).json()
+        seen.extend(level["product_id"] for level in page["items"])
+        after = page["next_cursor"]
+        if after is None:
+            break
+    assert seen == [level["product_id"] for level in levels]
+
+    streamed = client.get("/inventory/stock-levels", params={"stream": True}, headers=auth_header)
+    assert streamed.status_code == 200
+    assert streamed.json() == levels
+
+
+def test_fast_json_lists_match_default_serialization(auth_header, products, monkeypatch):
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.email == "inventory@user.com").one()
+    customer = Client(user_id=user.id, name="Cliente Fast", phone="11999990000", document="123")
+    db.add(customer)
+    db.commit()
+    customer_id = customer.id
+    db.close()
+    response = client.post(
+        "/inventory/movements",
+        json={"product_id": products[0], "quantity": 1, "movement_type": "OUT", "client_id": customer_id},
+        headers=auth_header,
+    )
+    assert response.status_code == 200
+
+    requests = [
+        ("/inventory/movements", {"limit": 1000}),
+        ("/inventory/movements", {"pagination": "cursor", "limit": 3}),
+        ("/products/", {"per_page": 100}),
+        ("/products/", {"search": "romaneio"}),
+        ("/products/", {"search": "romaneio", "search_mode": "ranked"}),
+        ("/clients/", {}),
+    ]
+    default = [client.get(path, params=params, headers=auth_header).json() for path, params in requests]
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    fast = [client.get(path, params=params, headers=auth_header).json() for path, params in requests]
+
+    assert fast == default
+    with_client = [item for item in fast[0]["items"] if item["client"]]
+    assert with_client[0]["client"] == {"id": customer_id, "name": "Cliente Fast", "phone": "11999990000"}
+    assert fast[5]["items"][0]["name"] == "Cliente Fast"
@@ -0,0 +1,26 @@
+import json
+
+from backend.config import logger as log_config
+
+
+def test_logs_are_written_as_json_lines(tmp_path):
+    logger = log_config.get_logger("tests.logging", context="testlog", base_folder=str(tmp_path))
+    logger.info("Produto %s criado", 42, extra={"path": "/products/"})
+    try:
+        raise ValueError("falhou")
+    except ValueError:
+        logger.exception("Erro ao criar produto")
+    log_config.shutdown_logging(str(tmp_path))
+
+    (log_file,) = (tmp_path / "testlog").glob("testlog_*.log")
+    first, second = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert first["message"] == "Produto 42 criado"
+    assert first["level"] == "INFO" and first["module"] == "tests.logging" and first["path"] == "/products/"
+    assert second["level"] == "ERROR" and "ValueError: falhou" in second["exc"]
+
+
+def test_filename_is_deprecated(tmp_path):
+    import pytest
+
+    with pytest.warns(DeprecationWarning):
+        log_config.get_logger("tests.logging.filename", context="testlog", base_folder=str(tmp_path), filename="outro.log")
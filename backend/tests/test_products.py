@@ -0,0 +1,497 @@
+import asyncio
+import pytest
+import os
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from backend.server import app
+from backend.core.database import Base, get_db, get_async_db
+from backend.core.count_cache import product_counts
+from backend.core.security import create_access_token
+from backend.models.users import User
+from backend.models.products import Product
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_products_db.sqlite"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_products_db.sqlite")
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    if os.path.exists("./test_products_db.sqlite"):
+        os.remove("./test_products_db.sqlite")
+    Base.metadata.create_all(bind=engine)
+    # contagens em cache são por processo; outro módulo de teste usa outro banco
+    product_counts.invalidate()
+    previous = app.dependency_overrides.get(get_db)
+    previous_async = app.dependency_overrides.get(get_async_db)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield
+    if previous is not None:
+        app.dependency_overrides[get_db] = previous
+    if previous_async is not None:
+        app.dependency_overrides[get_async_db] = previous_async
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+    if os.path.exists("./test_products_db.sqlite"):
+        os.remove("./test_products_db.sqlite")
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def auth_header():
+    db = TestingSessionLocal()
+    user = User(
+        email="products@user.com",
+        hashed_password="hashed_password",
+        full_name="Products User",
+        plan_id="pro",
+        is_active=True
+    )
+    db.add(user)
+    db.commit()
+    token = create_access_token(data={"sub": user.email})
+    db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    db = TestingSessionLocal()
+    names = ["Caneta Azul", "Caneta Preta", "Caderno", "Lápis", "Borracha"]
+    db.add_all([Product(name=name, sku=f"SKU-{i}", barcode=f"7890000000{i}", price=1.0 + i) for i, name in enumerate(names)])
+    db.commit()
+    db.close()
+    return names
+
+
+def test_list_products_totals(auth_header, catalogue):
+    response = client.get("/products/", params={"per_page": 2}, headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 5
+    assert data["pages"] == 3
+    assert [item["name"] for item in data["items"]] == ["Borracha", "Caderno"]
+
+    data = client.get("/products/", params={"search": "caneta", "per_page": 1}, headers=auth_header).json()
+    assert data["total"] == 2
+    assert len(data["items"]) == 1
+
+    data = client.get("/products/", params={"search": "caneta", "page": 5, "per_page": 1}, headers=auth_header).json()
+    assert data["total"] == 2
+    assert data["items"] == []
+
+
+def test_list_products_total_refreshes_on_write(auth_header, catalogue):
+    before = client.get("/products/", headers=auth_header).json()["total"]
+    created = client.post("/products/", json={"name": "Régua"}, headers=auth_header)
+    assert created.status_code == 200
+    assert client.get("/products/", headers=auth_header).json()["total"] == before + 1
+
+    assert client.delete(f"/products/{created.json()['id']}", headers=auth_header).status_code == 200
+    assert client.get("/products/", headers=auth_header).json()["total"] == before
+
+
+def test_ranked_search_ignores_accents(auth_header):
+    db = TestingSessionLocal()
+    db.add_all([
+        Product(name="Eletrônicos Diversos", sku="ELE-1"),
+        Product(name="Cabo Eletrico", sku="ELE-2"),
+        Product(name="Pão de Açúcar", sku="PAO-1"),
+    ])
+    db.commit()
+    db.close()
+
+    data = client.get("/products/", params={"search": "eletronicos", "search_mode": "ranked"}, headers=auth_header).json()
+    assert [item["name"] for item in data["items"]] == ["Eletrônicos Diversos"]
+    assert data["total"] == 1
+
+    data = client.get("/products/", params={"search": "ACUCAR", "search_mode": "ranked"}, headers=auth_header).json()
+    assert [item["name"] for item in data["items"]] == ["Pão de Açúcar"]
+
+    data = client.get("/products/", params={"search": "ele", "search_mode": "ranked"}, headers=auth_header).json()
+    assert {item["name"] for item in data["items"]} == {"Eletrônicos Diversos", "Cabo Eletrico"}
+
+    data = client.get("/products/", params={"search": "ELE-2", "search_mode": "ranked"}, headers=auth_header).json()
+    assert [item["sku"] for item in data["items"]] == ["ELE-2"]
+
+
+def test_ranked_search_follows_updates(auth_header):
+    created = client.post("/products/", json={"name": "Feijão Carioca"}, headers=auth_header).json()
+    assert client.get("/products/", params={"search": "feijao", "search_mode": "ranked"}, headers=auth_header).json()["total"] == 1
+
+    client.put(f"/products/{created['id']}", json={"name": "Arroz Agulhinha"}, headers=auth_header)
+    assert client.get("/products/", params={"search": "feijao", "search_mode": "ranked"}, headers=auth_header).json()["total"] == 0
+    assert client.get("/products/", params={"search": "agulhinha", "search_mode": "ranked"}, headers=auth_header).json()["total"] == 1
+
+
+def test_search_text_only_rewritten_when_sources_change():
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE products"):
+            statements.append(statement)
+
+    db = TestingSessionLocal()
+    product = Product(name="Sabão Neutro", sku="SAB-1")
+    db.add(product)
+    db.commit()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        product.stock_quantity = 5
+        db.commit()
+        assert statements and "search_text" not in statements[-1]
+
+        product.sku = "SAB-2"
+        db.commit()
+        assert "search_text" in statements[-1]
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        db.close()
+
+
+def test_product_image_goes_to_blob_store(auth_header, tmp_path, monkeypatch):
+    import base64
+    import io
+    from PIL import Image
+    from backend.core import blob_store
+
+    monkeypatch.setattr(blob_store, "UPLOADS_DIR", str(tmp_path))
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buffer, format="PNG")
+    data_url = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+    response = client.post("/products/", json={"name": "Com Foto", "price": 1.0, "image_base64": data_url}, headers=auth_header)
+    assert response.status_code == 200
+    product = response.json()
+    assert "image_base64" not in product
+    assert product["image_url"].startswith("/uploads/images/") and product["image_url"].endswith(".png")
+    assert (tmp_path / product["image_url"][len("/uploads/"):]).exists()
+
+    # Mesma imagem em outro produto reaproveita o arquivo
+    other = client.post("/products/", json={"name": "Com Foto 2", "price": 1.0, "image_base64": data_url}, headers=auth_header).json()
+    assert other["image_url"] == product["image_url"]
+
+    listed = client.get("/products/", params={"search": "Com Foto"}, headers=auth_header).json()
+    assert {item["image_url"] for item in listed["items"]} == {product["image_url"]}
+
+    response = client.put(f"/products/{product['id']}", json={"image_base64": "não é imagem"}, headers=auth_header)
+    assert response.status_code == 400
+
+
+def test_reads_go_to_replica_except_after_own_write(auth_header, tmp_path, monkeypatch):
+    from backend.core import database
+    from backend.core.read_routing import recent_writes
+
+    # "Réplica" atrasada: mesmo esquema, sem nenhum produto
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.sqlite'}")
+    sync_replica = create_engine(f"sqlite:///{tmp_path / 'replica.sqlite'}")
+    Base.metadata.create_all(bind=sync_replica)
+    sync_replica.dispose()
+    monkeypatch.setattr(database, "async_replica_engine", replica_engine)
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", async_sessionmaker(replica_engine, expire_on_commit=False))
+    monkeypatch.setattr(recent_writes, "directory", str(tmp_path / "writes"))
+
+    db = TestingSessionLocal()
+    product = Product(name="Só no Primário", sku="PRIM-1")
+    db.add(product)
+    db.commit()
+    product_id = product.id
+    db.close()
+
+    assert client.get(f"/products/{product_id}", headers=auth_header).status_code == 404
+
+    created = client.post("/products/", json={"name": "Escrito Agora"}, headers=auth_header)
+    assert created.status_code == 200
+    assert client.get(f"/products/{created.json()['id']}", headers=auth_header).status_code == 200
+    assert client.get(f"/products/{product_id}", headers=auth_header).status_code == 200
+
+    monkeypatch.setattr(recent_writes, "window", 0)
+    assert client.get(f"/products/{product_id}", headers=auth_header).status_code == 404
+    replica_engine.sync_engine.dispose()
+
+
+def test_large_lists_are_compressed(auth_header):
+    db = TestingSessionLocal()
+    db.add_all([Product(name=f"Produto Comprimido {i}", sku=f"GZ-{i}", description="Descrição repetida " * 5) for i in range(60)])
+    db.commit()
+    db.close()
+
+    for encoding in ("gzip", "br"):
+        response = client.get("/products/", params={"per_page": 100}, headers={**auth_header, "Accept-Encoding": encoding})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == encoding
+        assert response.num_bytes_downloaded < len(response.content) / 3
+        assert len(response.json()["items"]) > 60
+
+    # Abaixo do limite de tamanho vai sem compressão
+    response = client.get("/products/", params={"per_page": 1}, headers={**auth_header, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    # Streaming também é comprimido
+    response = client.get("/inventory/stock-levels", params={"stream": True}, headers={**auth_header, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) > 60
+
+
+def test_conditional_get_with_etags(auth_header, tmp_path, monkeypatch):
+    from backend.core.etags import table_versions
+    monkeypatch.setattr(table_versions, "directory", str(tmp_path / "versions"))
+
+    product = client.post("/products/", json={"name": "Com ETag", "barcode": "ETAG-001", "price": 3.0}, headers=auth_header).json()
+    for path in (f"/products/{product['id']}", "/products/barcode/ETAG-001", "/inventory/stock-levels", "/categories/"):
+        first = client.get(path, headers=auth_header)
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+        cached = client.get(path, headers={**auth_header, "If-None-Match": etag})
+        assert cached.status_code == 304, path
+        assert cached.content == b""
+
+    etag = client.get(f"/products/{product['id']}", headers=auth_header).headers["etag"]
+    stock_etag = client.get("/inventory/stock-levels", headers=auth_header).headers["etag"]
+    client.post("/inventory/movements", json={"product_id": product["id"], "quantity": 2, "movement_type": "IN"}, headers=auth_header)
+
+    changed = client.get(f"/products/{product['id']}", headers={**auth_header, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["stock_quantity"] == 2
+    assert client.get("/inventory/stock-levels", headers={**auth_header, "If-None-Match": stock_etag}).status_code == 200
+
+    categories_etag = client.get("/categories/", headers=auth_header).headers["etag"]
+    client.post("/categories/", json={"name": "Nova Categoria ETag"}, headers=auth_header)
+    assert client.get("/categories/", headers={**auth_header, "If-None-Match": categories_etag}).status_code == 200
+
+    # Excluir a categoria tira o produto dela: o ETag do produto muda também
+    category = client.post("/categories/", json={"name": "Categoria Excluída ETag"}, headers=auth_header).json()
+    client.put(f"/products/{product['id']}", json={"category_id": category["id"]}, headers=auth_header)
+    etag = client.get(f"/products/{product['id']}", headers=auth_header).headers["etag"]
+    client.delete(f"/categories/{category['id']}", headers=auth_header)
+    changed = client.get(f"/products/{product['id']}", headers={**auth_header, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["category_id"] is None
+
+
+def _poll_import(job, auth_header):
+    # O TestClient só devolve a resposta depois das BackgroundTasks: o job já terminou
+    assert job["status"] == "pending"
+    return client.get(f"/products/import/{job['id']}", headers=auth_header).json()
+
+
+def test_import_products_from_csv(auth_header, catalogue):
+    from backend.models.inventory import InventoryMovement
+
+    content = (
+        "Nome;Código de Barras;SKU;Preço;Estoque\n"
+        "Grampeador;IMP-0001;IMP-SKU-1;12,50;4\n"
+        "Caneta Repetida;78900000001;;2,00;1\n"
+        "Clips;IMP-0002;IMP-SKU-2;1.234,90;0\n"
+        ";IMP-0003;;5;1\n"
+        "Clips de Novo;IMP-0002;;3;1\n"
+        "\n"
+        "Régua;IMP-0004;;abc;2\n"
+    )
+    response = client.post(
+        "/products/import", files={"file": ("produtos.csv", content.encode("utf-8"), "text/csv")}, headers=auth_header
+    )
+    assert response.status_code == 202
+    job = _poll_import(response.json(), auth_header)
+    assert job["status"] == "completed"
+    assert (job["total_rows"], job["processed_rows"]) == (7, 7)
+    assert (job["created_count"], job["error_count"]) == (2, 4)
+    assert [error["line"] for error in job["errors"]] == [3, 5, 6, 8]
+
+    stapler = client.get("/products/barcode/IMP-0001", headers=auth_header).json()
+    assert (stapler["price"], stapler["stock_quantity"]) == (12.5, 4)
+    assert client.get("/products/barcode/IMP-0002", headers=auth_header).json()["price"] == 1234.9
+
+    db = TestingSessionLocal()
+    movements = db.query(InventoryMovement).filter(InventoryMovement.product_id == stapler["id"]).all()
+    db.close()
+    assert [(m.quantity, m.notes) for m in movements] == [(4, "Estoque Inicial (Importação)")]
+
+    other = client.get(f"/products/import/{job['id']}", headers={"Authorization": f"Bearer {create_access_token(data={'sub': 'nobody@user.com'})}"})
+    assert other.status_code in (401, 404)
+    assert client.post("/products/import", files={"file": ("produtos.txt", b"x", "text/plain")}, headers=auth_header).status_code == 400
+
+
+def test_import_products_from_xlsx(auth_header):
+    openpyxl = pytest.importorskip("openpyxl")
+    import io
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["name", "barcode", "price", "stock_quantity"])
+    sheet.append(["Pasta Sanfonada", 7891234567895, 19.9, 3])
+    sheet.append(["Preço Negativo", "XLSX-0002", -1, 1])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    response = client.post(
+        "/products/import",
+        files={"file": ("planilha.xlsx", buffer.getvalue(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+        headers=auth_header,
+    )
+    job = _poll_import(response.json(), auth_header)
+    assert (job["status"], job["created_count"], job["error_count"]) == ("completed", 1, 1)
+    assert client.get("/products/barcode/7891234567895", headers=auth_header).json()["stock_quantity"] == 3
+
+
+def test_import_duplicates_do_not_use_plan_room(auth_header, catalogue, monkeypatch):
+    from backend.core.plans_config import PLANS_CONFIG
+
+    db = TestingSessionLocal()
+    total = db.query(Product).filter(Product.is_active == True).count()
+    db.close()
+    # Plano quase cheio: cabem só mais 2 produtos
+    monkeypatch.setitem(PLANS_CONFIG["pro"], "limit_products", total + 2)
+    content = (
+        "Nome;Código de Barras;SKU\n"
+        "Caneta Repetida;78900000001;\n"
+        "Caderno Repetido;;SKU-2\n"
+        "Estojo;LIM-0001;\n"
+        "Mochila;LIM-0002;\n"
+        "Lancheira;LIM-0003;\n"
+    )
+    response = client.post(
+        "/products/import", files={"file": ("produtos.csv", content.encode("utf-8"), "text/csv")}, headers=auth_header
+    )
+    job = _poll_import(response.json(), auth_header)
+    assert (job["status"], job["created_count"], job["error_count"]) == ("completed", 2, 3)
+    assert [(error["line"], error["error"]) for error in job["errors"]] == [
+        (2, "Código de barras já cadastrado: 78900000001"),
+        (3, "SKU já cadastrado: SKU-2"),
+        (6, "Limite de produtos do plano atingido"),
+    ]
+    assert "Limite de produtos do plano atingido" in job["message"]
+    assert client.get("/products/barcode/LIM-0002", headers=auth_header).status_code == 200
+
+
+def test_labels_pdf_zpl_and_barcode_cache(auth_header, catalogue, monkeypatch, tmp_path):
+    from backend.core import labels
+    from backend.core.config import settings
+    from backend.core.file_cache import FileCache
+    from backend.models.categories import Category
+
+    db = TestingSessionLocal()
+    category = Category(name="Etiquetas")
+    db.add(category)
+    db.commit()
+    shelf = [Product(name=f"Etiqueta {i}", sku=f"LBL-{i}", barcode=f"78955500000{i}", price=3.0 + i, category_id=category.id) for i in range(2)]
+    db.add_all(shelf)
+    db.commit()
+    ids, category_id = [p.id for p in shelf], category.id
+    db.close()
+
+    # Renderiza numa thread, com o cache de códigos num diretório do teste
+    monkeypatch.setattr(settings, "RENDER_POOL_WORKERS", 0)
+    monkeypatch.setattr(labels, "_cache", FileCache("barcodes", 100, directory=str(tmp_path)))
+    labels.barcode_image.cache_clear()
+
+    response = client.post("/products/labels", json={"product_ids": ids, "copies": 11}, headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF-") and b"/Count 2" in response.content  # 22 etiquetas: 2 páginas
+    assert len([f for _, _, files in os.walk(tmp_path) for f in files]) == 2
+
+    # Reimpressão: os códigos vêm do cache em disco, sem desenhar de novo
+    labels.barcode_image.cache_clear()
+    monkeypatch.setattr(labels, "_draw_linear", lambda *args: pytest.fail("código redesenhado"))
+    again = client.post("/products/labels", json={"category_id": category_id, "copies": 11}, headers=auth_header)
+    assert again.content == response.content
+
+    zpl = client.post("/products/labels", json={"product_ids": ids[:1], "symbology": "qr", "format": "zpl", "copies": 3}, headers=auth_header)
+    assert zpl.status_code == 200
+    text = zpl.text
+    assert text.startswith("^XA") and "^BQN,2," in text and "^FDMA,789555000000^FS" in text and "^PQ3" in text
+    code128 = client.post("/products/labels", json={"product_ids": ids, "symbology": "code128", "format": "zpl"}, headers=auth_header).text
+    assert code128.count("^XZ") == 2 and "^BCN" in code128
+
+    # Códigos do catálogo têm 11 dígitos: não servem para EAN-13
+    catalogue_ids = client.get("/products/", params={"per_page": 100}, headers=auth_header).json()["items"]
+    invalid = [p["id"] for p in catalogue_ids if p["sku"] == "SKU-0"]
+    response = client.post("/products/labels", json={"product_ids": invalid}, headers=auth_header)
+    assert response.status_code == 422 and str(invalid[0]) in response.json()["detail"]
+    assert client.post("/products/labels", json={"product_ids": [999999]}, headers=auth_header).status_code == 404
+    assert client.post("/products/labels", json={"product_ids": ids, "category_id": category_id}, headers=auth_header).status_code == 422
+
+
+def test_labels_skip_inactive_products_and_do_not_count_as_writes(auth_header, monkeypatch, tmp_path):
+    from backend.core import labels
+    from backend.core.config import settings
+    from backend.core.read_routing import recent_writes
+
+    db = TestingSessionLocal()
+    active = Product(name="Etiqueta Ativa", barcode="789555000100", price=2.0)
+    inactive = Product(name="Etiqueta Inativa", barcode="789555000101", price=2.0, is_active=False)
+    db.add_all([active, inactive])
+    db.commit()
+    active_id, inactive_id = active.id, inactive.id
+    db.close()
+
+    monkeypatch.setattr(settings, "RENDER_POOL_WORKERS", 0)
+    monkeypatch.setattr(recent_writes, "directory", str(tmp_path / "writes"))
+    response = client.post("/products/labels", json={"product_ids": [active_id, inactive_id]}, headers=auth_header)
+    assert response.status_code == 404 and str(inactive_id) in response.json()["detail"]
+
+    # Disco do cache de códigos cheio: a folha sai mesmo assim
+    def full_disk(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    labels.barcode_image.cache_clear()
+    monkeypatch.setattr("backend.core.file_cache.tempfile.mkstemp", full_disk)
+    assert client.post("/products/labels", json={"product_ids": [active_id]}, headers=auth_header).status_code == 200
+    # Rota marcada com read_only: não manda as leituras seguintes para o primário
+    assert not os.path.exists(tmp_path / "writes")
+
+    assert client.post("/products/", json={"name": "Escrita de Verdade"}, headers=auth_header).status_code == 200
+    assert os.listdir(tmp_path / "writes")
+
+
+def test_api_key_requests_respect_plan_rate_limit(auth_header, monkeypatch):
+    from limits import parse
+    from backend.core import limiter as limiter_module
+    from backend.core.api_key_cache import usage_buffer
+    from backend.crud.api_keys import create_api_key
+    from backend.models.api_keys import ApiKey
+
+    db = TestingSessionLocal()
+    user = User(email="integration@user.com", hashed_password="x", full_name="Integração", plan_id="plus", is_active=True)
+    db.add(user)
+    db.commit()
+    api_key, raw_key = create_api_key(db, user.id, "ERP")
+    api_key_id = api_key.id
+    db.close()
+
+    monkeypatch.setattr(limiter_module.limiter, "enabled", True)
+    # contadores por id de chave: zera o que outros testes (outro banco, mesmos ids) deixaram
+    limiter_module.limiter.reset()
+    monkeypatch.setitem(limiter_module._plan_limits, "plus", parse("3/minute"))
+    statuses = [client.get("/products/", headers={"X-API-Key": raw_key}).status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    # O limite do plano vale só para API Key: o app (JWT) segue normalmente
+    assert client.get("/products/", headers=auth_header).status_code == 200
+    assert client.get("/products/", headers={"X-API-Key": "invalida"}).status_code == 401
+
+    # O uso registrado pela sessão async é gravado pela thread de flush
+    usage_buffer.flush()
+    db = TestingSessionLocal()
+    assert db.get(ApiKey, api_key_id).usage_count == 4
+    db.close()
@@ -0,0 +1,70 @@
+import multiprocessing
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.core import limiter as limiter_module
+from backend.core.database import Base, get_db
+from backend.core.security import get_current_user_flexible
+from backend.crud.api_keys import create_api_key
+from backend.models.users import User
+
+
+def _hit_many(uri, hits, results):
+    strategy = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    item = parse("15/minute")
+    results.put(sum(strategy.hit(item, "shared") for _ in range(hits)))
+
+
+def test_sqlite_storage_counts_across_processes(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'rate_limits.sqlite'}"
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_hit_many, args=(uri, 10, results)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    # 30 tentativas em 3 processos: o limite vale para o conjunto, não por processo
+    assert sum(results.get(timeout=5) for _ in workers) == 15
+
+
+def test_api_key_plan_limit_is_per_key(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'keys.sqlite'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as db:
+        user = User(email="ratelimit@user.com", hashed_password="x", full_name="Rate Limit", plan_id="plus", is_active=True)
+        db.add(user)
+        db.commit()
+        _, first_key = create_api_key(db, user.id, "integração A")
+        _, second_key = create_api_key(db, user.id, "integração B")
+
+    def override_get_db():
+        with SessionLocal() as db:
+            yield db
+
+    api = FastAPI()
+    api.state.limiter = limiter_module.limiter
+    api.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    api.dependency_overrides[get_db] = override_get_db
+
+    @api.get("/external")
+    def external(user: User = Depends(get_current_user_flexible)):
+        return {"email": user.email}
+
+    monkeypatch.setitem(limiter_module._plan_limits, "plus", parse("3/minute"))
+    limiter_module.limiter.reset()
+    client = TestClient(api)
+    statuses = [client.get("/external", headers={"X-API-Key": first_key}).status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    assert client.get("/external", headers={"X-API-Key": second_key}).status_code == 200
+    engine.dispose()
@@ -29,6 +29,29 @@ def test_health():
     assert response.status_code == 200
     assert response.json() == {"status": "healthy", "service": "RomaneioRapido API"}
 
+def test_readiness_reports_pools(monkeypatch):
+    """Prontidão devolve o estado dos pools e 503 quando o banco não responde"""
+    from backend.core import database
+
+    async def ping_ok():
+        return None
+
+    async def ping_fail():
+        raise ConnectionError("sem banco")
+
+    monkeypatch.setattr(database, "ping_database", ping_ok)
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert set(body["pools"]) == {"sync", "async"}
+    assert {"size", "checked_out", "idle", "overflow"} <= set(body["pools"]["async"])
+
+    monkeypatch.setattr(database, "ping_database", ping_fail)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
+
 def test_products_route():
     """Verifica o estado da rota de produtos (deve retornar 401 sem token)"""
     response = client.get("/products/")
@@ -48,3 +71,85 @@ def test_inventory_route():
     """Verifica o estado da rota de inventário/estoque (deve retornar 401 sem token)"""
     response = client.get("/inventory/movements")
     assert response.status_code == 401
+
+def test_metrics_requires_token(monkeypatch):
+    """/metrics só existe com METRICS_TOKEN e exige o token; conta requisições por rota"""
+    from backend.core.config import settings
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "segredo")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer errado"}).status_code == 401
+
+    client.get("/health")
+    client.get("/products/")
+    response = client.get("/metrics", headers={"Authorization": "Bearer segredo"})
+    assert response.status_code == 200
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/health",status="2xx"}' in body
+    assert 'http_requests_total{method="GET",route="/products/",status="4xx"}' in body
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/health"}' in body
+    assert "threadpool_capacity" in body
+
+def test_max_body_size_is_enforced_on_the_stream():
+    """Corpo chunked (sem content-length) acima do limite vira 413 durante a leitura"""
+    from fastapi import FastAPI, Request
+    from backend.core.middleware import MaxBodySizeMiddleware
+
+    small_app = FastAPI()
+
+    @small_app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    small_app.add_middleware(MaxBodySizeMiddleware, max_size=10)
+    small_client = TestClient(small_app)
+
+    def chunks(count):
+        for _ in range(count):
+            yield b"12345"
+
+    assert small_client.post("/echo", content=b"12345").json() == {"size": 5}
+    assert small_client.post("/echo", content=chunks(2)).json() == {"size": 10}
+    response = small_client.post("/echo", content=chunks(5))
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Payload excede o limite máximo permitido."}
+    assert small_client.post("/echo", content=b"x" * 11).status_code == 413
+
+
+def test_compression_offloads_large_chunks_and_sets_vary(monkeypatch):
+    """Pedaços grandes vão para uma thread; sem br/gzip aceito a resposta ainda leva Vary"""
+    import anyio.to_thread
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+    from backend.core.middleware import CompressionMiddleware
+
+    small_app = FastAPI()
+
+    @small_app.get("/big")
+    async def big():
+        return PlainTextResponse("romaneio " * 20000)
+
+    small_app.add_middleware(CompressionMiddleware, minimum_size=100, thread_minimum_size=64 * 1024)
+    small_client = TestClient(small_app)
+
+    offloaded = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def tracking_run_sync(fn, *args, **kwargs):
+        offloaded.append(fn)
+        return await run_sync(fn, *args, **kwargs)
+
+    monkeypatch.setattr(anyio.to_thread, "run_sync", tracking_run_sync)
+    for encoding in ("gzip", "br"):
+        offloaded.clear()
+        response = small_client.get("/big", headers={"Accept-Encoding": encoding})
+        assert response.headers["content-encoding"] == encoding
+        assert response.text == "romaneio " * 20000
+        assert offloaded
+
+    response = small_client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
@@ -108,6 +108,116 @@ def sync_model_to_db(model_class):
     else:
         print(f"  🔧 Added {added_count} new column(s) to '{table_name}'")
 
+def sync_indexes(model_class):
+    """Cria os índices declarados no modelo que ainda não existem no banco"""
+    table = model_class.__table__
+    if not inspect(engine).has_table(table.name):
+        return
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+def ensure_extensions():
+    """Extensões usadas pelos índices (pg_trgm: busca de produtos)"""
+    with engine.connect() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+        conn.commit()
+
+
+def backfill_product_search_text(batch_size=1000):
+    """Preenche products.search_text (nome + barcode + sku sem acentos) em lotes"""
+    from backend.core.search import product_search_text
+
+    print(f"\n📋 Backfilling column: products.search_text")
+    updated = 0
+    with engine.connect() as conn:
+        while True:
+            rows = conn.execute(text("""
+                SELECT id, name, barcode, sku FROM products
+                WHERE search_text IS NULL
+                ORDER BY id
+                LIMIT :limit;
+            """), {"limit": batch_size}).fetchall()
+            if not rows:
+                break
+            conn.execute(
+                text("UPDATE products SET search_text = :search_text WHERE id = :id;"),
+                [{"id": row.id, "search_text": product_search_text(row.name, row.barcode, row.sku)} for row in rows],
+            )
+            conn.commit()
+            updated += len(rows)
+    print(f"  🔧 Updated {updated} product(s)")
+
+
+def migrate_product_images(batch_size=100):
+    """Move products.image_base64 para o blob store (uploads/images) e grava image_path, em lotes"""
+    from backend.core.blob_store import save_base64_image, InvalidImageError
+
+    print(f"\n📋 Migrating column: products.image_base64 -> image_path")
+    moved = failed = 0
+    last_id = 0
+    with engine.connect() as conn:
+        while True:
+            rows = conn.execute(text("""
+                SELECT id, image_base64 FROM products
+                WHERE image_base64 IS NOT NULL AND image_path IS NULL AND id > :last_id
+                ORDER BY id
+                LIMIT :limit;
+            """), {"last_id": last_id, "limit": batch_size}).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            updates = []
+            for row in rows:
+                try:
+                    updates.append({"id": row.id, "image_path": save_base64_image(row.image_base64)})
+                except InvalidImageError as e:
+                    # Mantém o base64 para análise manual; o lote segue
+                    failed += 1
+                    print(f"  ⚠️  Product {row.id}: {e}")
+            if updates:
+                conn.execute(
+                    text("UPDATE products SET image_path = :image_path, image_base64 = NULL WHERE id = :id;"),
+                    updates,
+                )
+            conn.commit()
+            moved += len(updates)
+    print(f"  🔧 Moved {moved} image(s), {failed} invalid")
+
+
+def backfill_romaneios():
+    """Cria os cabeçalhos de romaneio que ainda não existem a partir das movimentações agrupadas."""
+    from backend.models.romaneios import Romaneio
+
+    print(f"\n📋 Backfilling table: romaneios")
+    Romaneio.__table__.create(bind=engine, checkfirst=True)
+
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            INSERT INTO romaneios (romaneio_id, client_id, customer_name, notes, item_count, total_value, created_by, created_at)
+            SELECT
+                m.romaneio_id,
+                MAX(m.client_id),
+                COALESCE(
+                    MAX(c.name),
+                    NULLIF(TRIM(SUBSTRING(MIN(m.notes) FILTER (WHERE m.notes LIKE 'Romaneio: %') FROM 11)), '')
+                ),
+                MIN(m.notes),
+                COUNT(*),
+                COALESCE(SUM(m.quantity * COALESCE(m.unit_price_snapshot, 0)), 0),
+                MIN(m.created_by),
+                MIN(m.created_at)
+            FROM inventory_movements m
+            LEFT JOIN clients c ON c.id = m.client_id
+            WHERE m.romaneio_id IS NOT NULL
+              AND m.movement_type = 'OUT'
+              AND NOT EXISTS (SELECT 1 FROM romaneios r WHERE r.romaneio_id = m.romaneio_id)
+            GROUP BY m.romaneio_id;
+        """))
+        conn.commit()
+        print(f"  🔧 Created {result.rowcount} romaneio header(s)")
+
+
 def run_migrations():
     """Run all migrations by syncing all models"""
     print("=" * 50)
@@ -119,6 +229,8 @@ def run_migrations():
     from backend.models.categories import Category
     from backend.models.inventory import InventoryMovement
     from backend.models.clients import Client
+    from backend.models.romaneios import Romaneio
+    from backend.models.api_keys import ApiKey
     
     models = [
         User,
@@ -126,13 +238,36 @@ def run_migrations():
         Product,
         InventoryMovement,
         Client,
+        Romaneio,
+        ApiKey,
     ]
     
+    try:
+        ensure_extensions()
+    except Exception as e:
+        print(f"  ❌ Error creating extensions: {e}")
+
     for model in models:
         try:
             sync_model_to_db(model)
+            sync_indexes(model)
         except Exception as e:
             print(f"  ❌ Error syncing {model.__tablename__}: {e}")
+
+    try:
+        backfill_product_search_text()
+    except Exception as e:
+        print(f"  ❌ Error backfilling products.search_text: {e}")
+
+    try:
+        migrate_product_images()
+    except Exception as e:
+        print(f"  ❌ Error migrating product images: {e}")
+
+    try:
+        backfill_romaneios()
+    except Exception as e:
+        print(f"  ❌ Error backfilling romaneios: {e}")
     
     print("\n" + "=" * 50)
     print("✅ Migration completed!")
@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef } from 'react'
 import type { FormEvent } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import api from '../services/api'
+import api, { resolveUploadUrl } from '../services/api'
 import LoadingOverlay from '../components/LoadingOverlay'
 import { toast } from 'react-hot-toast'
 import {
@@ -44,7 +44,7 @@ interface Product {
     min_stock: number
     category_id: number | null
     unit: string
-    image_base64: string | null
+    image_url: string | null
     is_active: boolean
 }
 
@@ -180,9 +180,9 @@ export default function CategoryProductsPage() {
             min_stock: String(p.min_stock),
             unit: p.unit || 'UN',
             category_id: p.category_id ? String(p.category_id) : String(categoryId),
-            image_base64: p.image_base64 || ''
+            image_base64: ''
         })
-        setImagePreview(p.image_base64 || null)
+        setImagePreview(resolveUploadUrl(p.image_url))
         setCropImageSrc(null)
         setModalOpen(true)
     }
@@ -225,7 +225,8 @@ export default function CategoryProductsPage() {
                 min_stock: parseFloat(form.min_stock) || 0,
                 unit: form.unit,
                 category_id: form.category_id ? parseInt(form.category_id) : categoryId,
-                image_base64: form.image_base64 || null
+                // Só envia a imagem quando uma nova foi recortada; sem o campo a atual é mantida
+                ...(form.image_base64 ? { image_base64: form.image_base64 } : {})
             }
 
             if (editingProduct) {
@@ -369,8 +370,8 @@ export default function CategoryProductsPage() {
                                             <td className="px-4 py-3">
                                                 <div className="flex items-center gap-3">
                                                     <div className="flex-shrink-0 w-10 h-10 bg-gray-100 rounded-lg overflow-hidden border border-gray-200 flex items-center justify-center">
-                                                        {p.image_base64 ? (
-                                                            <img src={p.image_base64} alt={p.name} className="w-full h-full object-cover" />
+                                                        {p.image_url ? (
+                                                            <img src={resolveUploadUrl(p.image_url)!} alt={p.name} className="w-full h-full object-cover" />
                                                         ) : (
                                                             <ImageIcon className="w-4 h-4 text-gray-400" />
                                                         )}
@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
-import api from '../services/api'
+import api, { resolveUploadUrl } from '../services/api'
 import { useAuth } from '../context/AuthContext'
 import LoadingOverlay from '../components/LoadingOverlay'
 import { Plus, Boxes, ArrowRightLeft, AlertTriangle, Search, Pencil, Image as ImageIcon } from 'lucide-react'
@@ -18,7 +18,7 @@ interface Product {
     stock_quantity: number
     min_stock: number
     unit: string
-    image_base64: string | null
+    image_url: string | null
 }
 
 export default function DashboardPage() {
@@ -32,40 +32,19 @@ export default function DashboardPage() {
     useEffect(() => {
         const fetchDashboardData = async () => {
             try {
-                const [productsRes, movementsRes, stockLevelsRes] = await Promise.all([
+                const [productsRes, summaryRes] = await Promise.all([
                     api.get('/products/', { params: { per_page: 100 } }),
-                    api.get('/inventory/movements'),
-                    api.get('/inventory/stock-levels'),
+                    api.get('/dashboard/summary'),
                 ])
 
                 const dbProducts = productsRes.data.items || productsRes.data
-                const numProducts = productsRes.data.total || dbProducts.length
-
-                const allMovements = movementsRes.data.items || (Array.isArray(movementsRes.data) ? movementsRes.data : [])
-                const todayStr = new Date().toISOString().split('T')[0]
-                const filteredMovs = allMovements.filter((m: any) => m.created_at && m.created_at.startsWith(todayStr))
-
-                const seenRomaneios = new Set()
-                let todayCount = 0
-
-                filteredMovs.forEach((m: any) => {
-                    if (m.romaneio_id) {
-                        if (!seenRomaneios.has(m.romaneio_id)) {
-                            seenRomaneios.add(m.romaneio_id)
-                            todayCount++
-                        }
-                    } else {
-                        todayCount++
-                    }
-                })
-
-                const lowStockList = stockLevelsRes.data || []
-                const lowStockFiltered = lowStockList.filter((s: any) => s.is_low_stock)
+                const summary = summaryRes.data
 
+                // Agregados calculados no servidor, com o "hoje" no fuso da loja
                 setStats({
-                    totalProducts: numProducts,
-                    todayMovements: todayCount,
-                    lowStockCount: lowStockFiltered.length,
+                    totalProducts: summary.total_products,
+                    todayMovements: summary.today_operations,
+                    lowStockCount: summary.low_stock_count,
                 })
 
                 // Get all products sorted by most recent for filtering
@@ -264,8 +243,8 @@ export default function DashboardPage() {
                                             <td className="px-8 py-5">
                                                 <div className="flex items-center gap-4">
                                                     <div className="w-12 h-12 rounded-2xl bg-white border border-slate-100 flex items-center justify-center overflow-hidden shrink-0 shadow-sm group-hover:scale-110 transition-transform duration-300">
-                                                        {p.image_base64 ? (
-                                                            <img src={p.image_base64} alt={p.name} className="w-full h-full object-cover" />
+                                                        {p.image_url ? (
+                                                            <img src={resolveUploadUrl(p.image_url)!} alt={p.name} className="w-full h-full object-cover" />
                                                         ) : (
                                                             <ImageIcon className="w-5 h-5 text-slate-300" />
                                                         )}
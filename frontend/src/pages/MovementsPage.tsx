@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react'
-import api from '../services/api'
+import api, { resolveUploadUrl } from '../services/api'
 import {
     Search,
     ArrowUpCircle,
@@ -71,7 +71,7 @@ export default function MovementsPage() {
             if (typeFilter) params.movement_type = typeFilter
 
             const response = await api.get('/inventory/movements', { params })
-            setMovements(response.data.items)
+            setMovements(response.data.items.map((m: Movement) => ({ ...m, product_image: resolveUploadUrl(m.product_image) })))
             setTotal(response.data.total)
         } catch (error) {
             console.error('Erro ao buscar movimentações:', error)
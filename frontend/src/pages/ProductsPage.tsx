@@ -1,5 +1,5 @@
 import { useState, useEffect, useRef, type FormEvent } from 'react'
-import api from '../services/api'
+import api, { resolveUploadUrl } from '../services/api'
 import LoadingOverlay from '../components/LoadingOverlay'
 import { toast } from 'react-hot-toast'
 import {
@@ -40,7 +40,7 @@ interface Product {
     min_stock: number
     category_id: number | null
     unit: string
-    image_base64: string | null
+    image_url: string | null
     is_active: boolean
 }
 
@@ -246,9 +246,9 @@ export default function ProductsPage() {
             min_stock: String(p.min_stock),
             unit: p.unit || 'UN',
             category_id: p.category_id ? String(p.category_id) : '',
-            image_base64: p.image_base64 || ''
+            image_base64: ''
         })
-        setImagePreview(p.image_base64 || null)
+        setImagePreview(resolveUploadUrl(p.image_url))
         setCropImageSrc(null)
         setIsCreatingCategory(false)
         setNewCategoryName('')
@@ -312,7 +312,8 @@ export default function ProductsPage() {
                 min_stock: parseFloat(form.min_stock) || 0,
                 unit: form.unit,
                 category_id: form.category_id ? parseInt(form.category_id) : null,
-                image_base64: form.image_base64 || null
+                // Só envia a imagem quando uma nova foi recortada; sem o campo a atual é mantida
+                ...(form.image_base64 ? { image_base64: form.image_base64 } : {})
             }
 
             if (editingProduct) {
@@ -487,8 +488,8 @@ export default function ProductsPage() {
                                             <td className="px-4 py-3">
                                                 <div className="flex items-center gap-3">
                                                     <div className="flex-shrink-0 w-10 h-10 bg-gray-100 rounded-lg overflow-hidden border border-gray-200 flex items-center justify-center">
-                                                        {p.image_base64 ? (
-                                                            <img src={p.image_base64} alt={p.name} className="w-full h-full object-cover" />
+                                                        {p.image_url ? (
+                                                            <img src={resolveUploadUrl(p.image_url)!} alt={p.name} className="w-full h-full object-cover" />
                                                         ) : (
                                                             <ImageIcon className="w-4 h-4 text-gray-400" />
                                                         )}
@@ -83,7 +83,9 @@ export default function RomaneioPage() {
     const productListRef = useRef<HTMLDivElement>(null)
     const [clientModalOpen, setClientModalOpen] = useState(false)
 
-    const [movements, setMovements] = useState<any[]>([])
+    const [romaneios, setRomaneios] = useState<any[]>([])
+    const [romaneiosPage, setRomaneiosPage] = useState(1)
+    const [romaneiosPages, setRomaneiosPages] = useState(1)
     const [stockLevels, setStockLevels] = useState<StockLevel[]>([])
 
     // Estado para Regerar Romaneio Histórico
@@ -122,62 +124,19 @@ export default function RomaneioPage() {
         return () => document.removeEventListener('mousedown', handleClickOutside)
     }, [])
 
-    // Agrupamento de Movimentações para permitir Re-gerar Romaneios
+    // Cabeçalhos de romaneio já agrupados e totalizados pelo backend
     const groupedMovements = useMemo(() => {
-        const groups: Record<string, any> = {}
-        const singles: any[] = []
-
-        if (!Array.isArray(movements)) return []
-
-        movements.forEach(m => {
-            if (m.romaneio_id) {
-                if (!groups[m.romaneio_id]) {
-                    // Tenta extrair o nome do cliente da nota "Romaneio: Nome do Cliente "
-                    let cName = ""
-                    if (m.notes && m.notes.startsWith("Romaneio: ")) {
-                        cName = m.notes.replace("Romaneio: ", "").trim()
-                    }
-
-                    groups[m.romaneio_id] = {
-                        id: m.romaneio_id,
-                        created_at: m.created_at,
-                        customerName: m.client?.name || cName || 'Consumidor',
-                        customerPhone: m.client?.phone || null,
-                        items: [],
-                        type: m.movement_type,
-                        totalValue: 0
-                    }
-                }
-                groups[m.romaneio_id].items.push(m)
-                groups[m.romaneio_id].totalValue += (m.quantity * (m.unit_price_snapshot || 0))
-
-                // Atualiza com dados do cliente se disponíveis (em caso de múltiplos itens, o último sobrescreve mas são do mesmo romaneio)
-                if (m.client) {
-                    groups[m.romaneio_id].customerName = m.client.name;
-                    groups[m.romaneio_id].customerPhone = m.client.phone;
-                }
-            } else {
-                singles.push({
-                    ...m,
-                    totalValue: (m.quantity * (m.unit_price_snapshot || 0))
-                })
-            }
-        })
-
-        const result = [
-            ...Object.values(groups).map(g => ({ ...g, isGroup: true })),
-            ...singles.map(s => ({
-                ...s,
-                isGroup: false,
-                id: s.id,
-                items: [s], // Treat as a single-item group for actions
-                customerName: s.notes && s.notes.includes("Romaneio: ") ? s.notes.replace("Romaneio: ", "").trim() : (s.notes || ""),
-                totalValue: s.totalValue
-            }))
-        ]
-
-        return result.sort((a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime())
-    }, [movements])
+        return romaneios.map(r => ({
+            id: r.romaneio_id,
+            created_at: r.created_at,
+            customerName: r.customer_name || r.client?.name || 'Consumidor',
+            customerPhone: r.client?.phone || null,
+            itemCount: r.item_count,
+            type: 'OUT',
+            totalValue: r.total_value,
+            isGroup: true
+        }))
+    }, [romaneios])
 
     // Filtros e Paginação do Estoque
     const [estoqueSearch, setEstoqueSearch] = useState('')
@@ -220,7 +179,7 @@ export default function RomaneioPage() {
         }
         setIsSearchingText(true)
         try {
-            const res = await api.get('/products/', { params: { search: val, per_page: 5 } })
+            const res = await api.get('/products/', { params: { search: val, per_page: 5, search_mode: 'ranked' } })
             setDropdownResults(res.data.items)
             setActiveProductIndex(res.data.items.length > 0 ? 0 : -1)
         } catch (err) {
@@ -304,18 +263,27 @@ export default function RomaneioPage() {
 
     const ESTOQUE_PER_PAGE = 20
 
-    const fetchMovements = async () => {
+    const fetchMovements = async (page = 1) => {
         setLoading(true)
         try {
-            const res = await api.get('/inventory/movements', { params: { movement_type: 'OUT', limit: 300 } })
-            setMovements(res.data.items || (Array.isArray(res.data) ? res.data : []))
+            const res = await api.get('/inventory/romaneios', { params: { page, per_page: 50 } })
+            const items = res.data.items || []
+            setRomaneios(prev => page === 1 ? items : [...prev, ...items])
+            setRomaneiosPage(page)
+            setRomaneiosPages(res.data.pages || 1)
         } catch (err) {
-            console.error('Erro ao buscar movimentações:', err)
+            console.error('Erro ao buscar romaneios:', err)
         } finally {
             setLoading(false)
         }
     }
 
+    // As linhas do romaneio só são buscadas quando alguma ação do menu precisa delas
+    const fetchRomaneioItems = async (romaneioId: string) => {
+        const res = await api.get(`/inventory/romaneios/${romaneioId}`)
+        return res.data.items || []
+    }
+
     const fetchStockLevels = async () => {
         setLoading(true)
         try {
@@ -514,24 +482,21 @@ export default function RomaneioPage() {
     const executeFinalize = async () => {
         setSubmitting(true)
         try {
-            // Gerar um ID de agrupamento para este Romaneio (Batch UUID)
-            const romaneioBatchId = `ROM-${Date.now()}-${Math.random().toString(36).substr(2, 9).toUpperCase()}`
-
-            // Envia cada item do carrinho como uma movimentação de SAÍDA individual
-            for (const item of cartItems) {
-                await api.post('/inventory/movements', {
+            // Envia o carrinho inteiro de uma vez: o backend grava todas as saídas
+            // em uma única transação e gera o ID de agrupamento do romaneio
+            await api.post('/inventory/romaneios', {
+                customer_name: customerName || null,
+                notes: customerName ? `Romaneio: ${customerName} ` : 'Romaneio Rápido',
+                client_id: selectedClientId,
+                items: cartItems.map(item => ({
                     product_id: item.id,
                     quantity: item.quantity,
-                    movement_type: 'OUT',
-                    notes: customerName ? `Romaneio: ${customerName} ` : 'Romaneio Rápido',
-                    romaneio_id: romaneioBatchId,
-                    client_id: selectedClientId,
                     product_name_snapshot: item.name,
                     product_barcode_snapshot: item.barcode,
                     unit_price_snapshot: item.price,
                     unit_snapshot: item.unit
-                })
-            }
+                }))
+            })
 
             // Exibe modal de exportação ao invés de limpar a tela direto
             setShowExportModal(true)
@@ -557,44 +522,57 @@ export default function RomaneioPage() {
     const renderHistoryMenu = (g: any) => {
         if (openHistoryMenuId !== (g.id || g.romaneio_id)) return null
 
-        const exportItems = g.items.map((m: any) => ({
-            id: m.product_id,
-            name: m.product_name || 'Produto Excluído',
-            barcode: m.product_barcode_snapshot || m.product?.barcode || null,
-            quantity: m.quantity,
-            unit: m.unit_snapshot || m.product?.unit || 'un',
-            price: m.unit_price_snapshot || m.product?.price || 0
-        }))
+        const loadExportItems = async (): Promise<CartItem[]> => {
+            const items = await fetchRomaneioItems(g.id)
+            return items.map((m: any) => ({
+                id: m.product_id,
+                name: m.product_name || 'Produto Excluído',
+                barcode: m.product_barcode_snapshot || m.product?.barcode || null,
+                quantity: m.quantity,
+                unit: m.unit_snapshot || m.product?.unit || 'un',
+                price: m.unit_price_snapshot || m.product?.price || 0
+            }))
+        }
 
         return (
             <>
                 <div className="fixed inset-0 z-40" onClick={() => setOpenHistoryMenuId(null)} />
                 <div className="absolute right-0 top-12 w-52 bg-white rounded-2xl shadow-2xl border border-slate-100 z-50 py-2 animate-in fade-in zoom-in-95 duration-200 origin-top-right text-left">
                     <button
-                        onClick={() => {
-                            setViewMovement({
-                                clientId: g.id ? null : g.id,
-                                customerName: g.customerName || 'Consumidor',
-                                createdAt: g.created_at,
-                                items: exportItems
-                            })
-                            setCustomerPhone(g.customerPhone)
+                        onClick={async () => {
                             setOpenHistoryMenuId(null)
+                            try {
+                                const items = await loadExportItems()
+                                setViewMovement({
+                                    clientId: null,
+                                    customerName: g.customerName || 'Consumidor',
+                                    createdAt: g.created_at,
+                                    items
+                                })
+                                setCustomerPhone(g.customerPhone)
+                            } catch {
+                                toast.error('Erro ao carregar itens do romaneio.')
+                            }
                         }}
                         className="w-full flex items-center gap-3 px-4 py-3 text-sm font-bold text-slate-600 hover:bg-slate-50 hover:text-emerald-600 transition-colors"
                     >
                         <ShoppingCart className="w-4 h-4" /> Ver Itens / Detalhes
                     </button>
                     <button
-                        onClick={() => {
-                            setHistoricExport({
-                                clientId: g.id ? null : g.id, // we might not have client_id in grouped easily, but let's pass null for safety unless available. The API gets complex grouped items. Actually g has it? Let's check: g doesn't store client metadata well. To fix we'd need more data, let's keep it simple.
-                                customerName: g.customerName || 'Consumidor',
-                                createdAt: g.created_at,
-                                items: exportItems
-                            })
-                            setCustomerPhone(g.customerPhone)
+                        onClick={async () => {
                             setOpenHistoryMenuId(null)
+                            try {
+                                const items = await loadExportItems()
+                                setHistoricExport({
+                                    clientId: null,
+                                    customerName: g.customerName || 'Consumidor',
+                                    createdAt: g.created_at,
+                                    items
+                                })
+                                setCustomerPhone(g.customerPhone)
+                            } catch {
+                                toast.error('Erro ao carregar itens do romaneio.')
+                            }
                         }}
                         className="w-full flex items-center gap-3 px-4 py-3 text-sm font-bold text-slate-600 hover:bg-slate-50 hover:text-blue-600 transition-colors"
                     >
@@ -606,7 +584,8 @@ export default function RomaneioPage() {
                             try {
                                 setLoading(true)
                                 const newCart: CartItem[] = []
-                                for (const historicItem of g.items) {
+                                const historicItems = await fetchRomaneioItems(g.id)
+                                for (const historicItem of historicItems) {
                                     try {
                                         const res = await api.get(`/products/${historicItem.product_id}`)
                                         if (res.data) {
@@ -1060,7 +1039,7 @@ export default function RomaneioPage() {
                                                 <td className="px-4 py-3 text-right">
                                                     {g.isGroup ? (
                                                         <div className="flex flex-col items-end">
-                                                            <span className="font-bold text-blue-600">{g.items.length} itens</span>
+                                                            <span className="font-bold text-blue-600">{g.itemCount} itens</span>
                                                             <span className="text-xs font-black text-emerald-600 mt-0.5">
                                                                 {new Intl.NumberFormat('pt-BR', { style: 'currency', currency: 'BRL' }).format(g.totalValue)}
                                                             </span>
@@ -1133,7 +1112,7 @@ export default function RomaneioPage() {
                                             )}
                                             <div className="flex flex-col">
                                                 <p className="text-sm font-black text-slate-700 mt-1">
-                                                    {g.isGroup ? `${g.items.length} Produtos` : `${g.quantity} ${g.unit || 'UN'}`}
+                                                    {g.isGroup ? `${g.itemCount} Produtos` : `${g.quantity} ${g.unit || 'UN'}`}
                                                 </p>
                                                 {g.totalValue > 0 && (
                                                     <p className="text-xs font-black text-emerald-600">
@@ -1161,6 +1140,18 @@ export default function RomaneioPage() {
                             ))
                         )}
                     </div>
+
+                    {romaneiosPage < romaneiosPages && (
+                        <div className="flex justify-center">
+                            <button
+                                onClick={() => fetchMovements(romaneiosPage + 1)}
+                                disabled={loading}
+                                className="px-5 py-2 text-sm font-semibold text-blue-600 bg-white border border-gray-100 rounded-xl shadow-sm hover:bg-blue-50 disabled:opacity-50 transition-all"
+                            >
+                                Carregar mais
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
 
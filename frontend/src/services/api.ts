@@ -27,4 +27,11 @@ api.interceptors.response.use(
     }
 )
 
+// Imagens ficam no blob store do backend (/uploads/...), servido atrás do mesmo prefixo da API
+export function resolveUploadUrl(path: string | null | undefined): string | null {
+    if (!path) return null
+    if (/^(https?:|data:|blob:)/.test(path)) return path
+    return `${API_URL}${path}`
+}
+
 export default api